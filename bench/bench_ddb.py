@@ -0,0 +1,177 @@
+"""
+DynamoDB データ層のマイクロベンチマーク（resource vs 低レベル client + dynamo.py）
+
+  python bench/bench_ddb.py [-n 2000]
+
+ネットワークは使わない（botocore の Stubber で応答を差し込む）。比較するもの:
+  - cold     : boto3.resource("dynamodb") / DynamoDB(boto3.client("dynamodb")) の生成と Table 取得
+  - get_item : Events の get_item（1件、募集メッセージ描画で使う形）
+  - query    : EventMembers の begins_with query（50件）
+  - marshal  : 型変換だけ（TypeSerializer/TypeDeserializer vs dynamo.marshal/unmarshal）
+
+cold は新しいプロセスで1回だけ測る（モジュール/モデルのキャッシュが効かない状態）
+"""
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+
+import boto3  # noqa: E402
+from boto3.dynamodb.conditions import Key as ResourceKey  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+import dynamo  # noqa: E402
+
+COLD_SNIPPETS = {
+    "resource": (
+        "import boto3; d = boto3.resource('dynamodb'); d.Table('Events').name"
+    ),
+    "client": (
+        "import boto3, dynamo; d = dynamo.DynamoDB(boto3.client('dynamodb')); d.Table('Events').name"
+    ),
+}
+
+GUILD = "123456789012345678"
+EVENT = "EVT#" + "0" * 32
+
+
+def _event_item():
+    return {
+        "guild_id": GUILD,
+        "event_id": EVENT,
+        "title": "週末レイド",
+        "status": "OPEN",
+        "start_at": "2026-01-10 21:00",
+        "recruit_channel_id": "223456789012345678",
+        "notice_channel_id": "323456789012345678",
+        "recruit_message_id": "423456789012345678",
+        "created_by": "523456789012345678",
+        "created_at": "2026-01-07T12:00:00+00:00",
+    }
+
+
+def _member_items(n=50):
+    return [
+        {
+            "guild_id": GUILD,
+            "member_key": f"{EVENT}#USER#{600000000000000000 + i}",
+            "user_id": str(600000000000000000 + i),
+            "username": f"user{i}",
+            "joined_at": "2026-01-07T12:00:00+00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def _wire(item):
+    return dynamo.marshal_item(item)
+
+
+def cold(kind: str) -> float:
+    code = (
+        "import time, sys; sys.path.insert(0, %r); t = time.perf_counter(); %s; "
+        "print(time.perf_counter() - t)" % (SRC, COLD_SNIPPETS[kind])
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=os.environ)
+    return float(out.stdout.strip())
+
+
+def _stub_many(client, op, response, n):
+    stubber = Stubber(client)
+    for _ in range(n):
+        stubber.add_response(op, response)
+    stubber.activate()
+    return stubber
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args(argv)
+    n = args.n
+
+    for kind in ("resource", "client"):
+        best = min(cold(kind) for _ in range(3))
+        print(f"cold     {kind:9s} {best * 1000:9.1f} ms  (new process, best of 3)")
+
+    event_wire = {"Item": _wire(_event_item())}
+    members = _member_items()
+    query_wire = {"Items": [_wire(m) for m in members], "Count": len(members), "ScannedCount": len(members)}
+    key = {"guild_id": GUILD, "event_id": EVENT}
+
+    res = boto3.resource("dynamodb")
+    res_events = res.Table("Events")
+    res_members = res.Table("EventMembers")
+    lite = dynamo.DynamoDB(boto3.client("dynamodb"))
+    lite_events = lite.Table("Events")
+    lite_members = lite.Table("EventMembers")
+
+    def res_get():
+        for _ in range(n):
+            res_events.get_item(Key=key)
+
+    def lite_get():
+        for _ in range(n):
+            lite_events.get_item(Key=key)
+
+    def res_query():
+        for _ in range(n):
+            res_members.query(
+                KeyConditionExpression=ResourceKey("guild_id").eq(GUILD)
+                & ResourceKey("member_key").begins_with(f"{EVENT}#USER#")
+            )
+
+    def lite_query():
+        for _ in range(n):
+            lite_members.query(
+                KeyConditionExpression=dynamo.Key("guild_id").eq(GUILD)
+                & dynamo.Key("member_key").begins_with(f"{EVENT}#USER#")
+            )
+
+    cases = (
+        ("get_item", "resource", res.meta.client, "get_item", event_wire, res_get),
+        ("get_item", "client", lite.client, "get_item", event_wire, lite_get),
+        ("query", "resource", res.meta.client, "query", query_wire, res_query),
+        ("query", "client", lite.client, "query", query_wire, lite_query),
+    )
+    for label, kind, client, op, wire, fn in cases:
+        times = []
+        for _ in range(5):
+            stubber = _stub_many(client, op, wire, n)
+            times.append(timeit.timeit(fn, number=1))
+            stubber.deactivate()
+        print(f"{label:8s} {kind:9s} {min(times) / n * 1e6:9.2f} us/call  ({n} calls, best of 5)")
+
+    ser, de = TypeSerializer(), TypeDeserializer()
+    wires = query_wire["Items"]
+
+    def res_marshal():
+        for _ in range(n // 10 or 1):
+            for m in members:
+                {k: ser.serialize(v) for k, v in m.items()}
+            for w in wires:
+                {k: de.deserialize(v) for k, v in w.items()}
+
+    def lite_marshal():
+        for _ in range(n // 10 or 1):
+            for m in members:
+                dynamo.marshal_item(m)
+            for w in wires:
+                dynamo.unmarshal_item(w)
+
+    items = (n // 10 or 1) * len(members) * 2
+    for kind, fn in (("resource", res_marshal), ("client", lite_marshal)):
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"marshal  {kind:9s} {best / items * 1e6:9.2f} us/item ({items} items, best of 5)")
+
+
+if __name__ == "__main__":
+    main()
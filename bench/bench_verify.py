@@ -0,0 +1,81 @@
+"""
+署名検証パスのマイクロベンチマーク
+
+  python bench/bench_verify.py [-n 2000]
+
+比較するもの:
+  - legacy   : リクエストごとに VerifyKey を hex から生成して verify（旧実装）
+  - cached   : _verify_discord_request（VerifyKey キャッシュ + 時刻窓 + リプレイキャッシュ）
+  - stale    : 時刻窓外のリクエストを拒否するコスト（暗号処理なし）
+  - replayed : 同一署名の再送を拒否するコスト（暗号処理なし）
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+
+from nacl.signing import SigningKey, VerifyKey  # noqa: E402
+
+import app  # noqa: E402
+
+
+def _signed(sk: SigningKey, body: str, ts: int):
+    timestamp = str(ts)
+    sig = sk.sign((timestamp + body).encode("utf-8")).signature.hex()
+    return {"x-signature-ed25519": sig, "x-signature-timestamp": timestamp}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args(argv)
+    n = args.n
+
+    sk = SigningKey.generate()
+    pub_hex = sk.verify_key.encode().hex()
+    os.environ["DISCORD_PUBLIC_KEY"] = pub_hex
+    os.environ["SIGNATURE_REPLAY_CACHE_SIZE"] = str(n * 2)
+
+    body = json.dumps({"type": 3, "data": {"custom_id": "join_event:EVT#" + "0" * 32}})
+    now = int(time.time())
+    fresh = [_signed(sk, body + " " * i, now) for i in range(n)]
+    bodies = [body + " " * i for i in range(n)]
+
+    def legacy():
+        for h, b in zip(fresh, bodies):
+            msg = (h["x-signature-timestamp"] + b).encode("utf-8")
+            VerifyKey(bytes.fromhex(pub_hex)).verify(msg, bytes.fromhex(h["x-signature-ed25519"]))
+
+    def cached():
+        app._seen_signatures.clear()
+        for h, b in zip(fresh, bodies):
+            ok, err = app._verify_discord_request(h, b)
+            assert ok, err
+
+    stale_headers = _signed(sk, body, now - 3600)
+
+    def stale():
+        for _ in range(n):
+            ok, _ = app._verify_discord_request(stale_headers, body)
+            assert not ok
+
+    replay_headers = fresh[0]
+
+    def replayed():
+        app._remember_signature(bytes.fromhex(replay_headers["x-signature-ed25519"]))
+        for _ in range(n):
+            ok, _ = app._verify_discord_request(replay_headers, bodies[0])
+            assert not ok
+
+    for name, fn in (("legacy", legacy), ("cached", cached), ("stale", stale), ("replayed", replayed)):
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"{name:9s} {best / n * 1e6:9.2f} us/req  ({n} reqs, best of 5)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+アーカイブ操作用 CLI（Lambda ジョブ archive_sweep / archive_restore と同じ処理）
+
+例:
+  python scripts/archive.py sweep --days 30 --dry-run
+  python scripts/archive.py restore <guild_id> <event_id>
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import app  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Events/Notices archive tool")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_sweep = sub.add_parser("sweep", help="保持期間を過ぎたイベント/連絡をアーカイブ")
+    p_sweep.add_argument("--days", type=int, default=None, help="既定: ARCHIVE_AFTER_DAYS or 30")
+    p_sweep.add_argument("--limit", type=int, default=None)
+    p_sweep.add_argument("--dry-run", action="store_true")
+
+    p_restore = sub.add_parser("restore", help="アーカイブからホットテーブルへ戻す")
+    p_restore.add_argument("guild_id")
+    p_restore.add_argument("event_id", help="EVT#<uuid> または <uuid>")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "sweep":
+        result = app.archive_sweep(days=args.days, dry_run=args.dry_run, limit=args.limit)
+    else:
+        event_id = args.event_id if args.event_id.startswith("EVT#") else f"EVT#{args.event_id}"
+        result = app.restore_archived_event(args.guild_id, event_id)
+
+    print(json.dumps(result, ensure_ascii=False))
+    return 0 if result.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+既存 Event の /event list 用属性を埋める CLI（status_start / member_count が無い Event だけ）
+
+例:
+  python scripts/backfill_events.py --dry-run
+  python scripts/backfill_events.py --limit 500
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import app  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill status_start / member_count on legacy Events")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = app.backfill_event_list_fields(dry_run=args.dry_run, limit=args.limit)
+    print(json.dumps(result, ensure_ascii=False))
+    return 0 if result.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+イベント一括作成 CLI（シーズン日程などをまとめて登録）
+
+CSV（ヘッダ必須）:
+  guild_id,title,start_at,recruit_channel_id,notice_channel_id[,created_by,created_by_name]
+  start_at は /event create と同じ 'YYYY-MM-DD HH:MM'（JST）
+
+処理:
+  1. 全行を検証（_parse_jst_state_at）。不正行があれば何もせず終了（--skip-invalid で不正行だけ除外）
+  2. Events を BatchWriteItem でまとめて書き込み（既に存在するものはスキップ）
+  3. 募集メッセージを投稿。チャンネルごとの X-RateLimit-* を見て間隔を空ける
+  4. 前日リマインドの Schedule を並列で登録
+
+event_id は行の内容から決定的に作る（uuid5）ので、途中で止まっても同じ CSV で再実行すれば
+DynamoDB 上の状態（recruit_message_id / event_remind_schedule_name）を見て続きから再開する。
+
+例:
+  python scripts/bulk_import.py season.csv --dry-run
+  python scripts/bulk_import.py season.csv --schedule-workers 4
+"""
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import app  # noqa: E402
+
+# event_id を決定的に作るための名前空間
+IMPORT_NAMESPACE = uuid.UUID("5b0f2d7e-2b8e-4c55-9d59-3f3c6f1a9e21")
+REQUIRED_COLUMNS = ("guild_id", "title", "start_at", "recruit_channel_id", "notice_channel_id")
+
+
+class PacedSender:
+    """
+    Discord のレート制限ヘッダを見ながら投稿するチャンネルごとのペース制御
+      - X-RateLimit-Remaining が 0 なら X-RateLimit-Reset-After だけ待ってから次を送る
+      - 最低間隔 min_interval（既定 0.25 秒）も守る
+    429 は discord_bot_request 側で retry_after だけ待って再試行する
+    """
+
+    def __init__(self, min_interval: float = 0.25):
+        self.min_interval = min_interval
+        self.next_at = {}
+
+    def send(self, channel_id: str, message: dict) -> dict:
+        wait = self.next_at.get(channel_id, 0.0) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        data, headers = app.discord_bot_request(
+            "POST", f"/channels/{channel_id}/messages", message, api="SEND_MESSAGE"
+        )
+        headers = {k.lower(): v for k, v in headers.items()}
+        delay = self.min_interval
+        if headers.get("x-ratelimit-remaining") == "0":
+            delay = max(delay, float(headers.get("x-ratelimit-reset-after") or 1.0))
+        self.next_at[channel_id] = time.monotonic() + delay
+        return data
+
+
+def _event_id_for(row: dict) -> str:
+    key = "|".join(row[c] for c in ("guild_id", "title", "start_at", "recruit_channel_id"))
+    return f"EVT#{uuid.uuid5(IMPORT_NAMESPACE, key).hex}"
+
+
+def load_rows(path: str):
+    rows, errors = [], []
+    seen = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise SystemExit(f"missing columns: {', '.join(missing)}")
+        for lineno, raw in enumerate(reader, start=2):
+            row = {k: (v or "").strip() for k, v in raw.items() if k}
+            empty = [c for c in REQUIRED_COLUMNS if not row.get(c)]
+            if empty:
+                errors.append((lineno, f"empty: {', '.join(empty)}"))
+                continue
+            start_at_dt = app._parse_jst_state_at(row["start_at"])
+            if not start_at_dt:
+                errors.append((lineno, f"start_at の形式が不正です: {row['start_at']!r}"))
+                continue
+            row["lineno"] = lineno
+            row["start_at_dt"] = start_at_dt
+            row["event_id"] = _event_id_for(row)
+            if row["event_id"] in seen:
+                errors.append((lineno, f"duplicate of line {seen[row['event_id']]}"))
+                continue
+            seen[row["event_id"]] = lineno
+            rows.append(row)
+    return rows, errors
+
+
+def _progress(phase: str, done: int, total: int, started: float):
+    elapsed = time.monotonic() - started
+    print(f"[{phase}] {done}/{total} ({elapsed:.1f}s)", file=sys.stderr)
+
+
+def write_events(rows, existing, dry_run):
+    events_table, _, _, _ = app._get_tables()
+    todo = [r for r in rows if r["event_id"] not in existing]
+    print(f"[events] new={len(todo)} existing={len(rows) - len(todo)}", file=sys.stderr)
+    if dry_run or not todo:
+        return
+    # batch_writer が 25件ずつの BatchWriteItem にまとめ、UnprocessedItems も再送する
+    with events_table.batch_writer() as bw:
+        for r in todo:
+            item = app.build_event_item(
+                guild_id=r["guild_id"],
+                event_id=r["event_id"],
+                title=r["title"],
+                created_by=r.get("created_by") or None,
+                created_by_name=r.get("created_by_name") or None,
+                recruit_channel_id=r["recruit_channel_id"],
+                notice_channel_id=r["notice_channel_id"],
+                start_at_dt=r["start_at_dt"],
+            )
+            bw.put_item(Item={k: v for k, v in item.items() if v is not None})
+    for r in todo:
+        existing[r["event_id"]] = {}
+
+
+def post_recruits(rows, existing, sender, dry_run):
+    events_table, _, _, _ = app._get_tables()
+    todo = [r for r in rows if not (existing.get(r["event_id"]) or {}).get("recruit_message_id")]
+    started = time.monotonic()
+    print(f"[recruit] to_post={len(todo)}", file=sys.stderr)
+    for n, r in enumerate(todo, start=1):
+        if dry_run:
+            continue
+        msg = app.build_recruit_message(r["title"], r["event_id"], members=[], start_at=r["start_at"], status="OPEN")
+        sent = sender.send(r["recruit_channel_id"], msg)
+        events_table.update_item(
+            Key={"guild_id": r["guild_id"], "event_id": r["event_id"]},
+            UpdateExpression="SET recruit_message_id = :mid",
+            ExpressionAttributeValues={":mid": sent.get("id")},
+        )
+        existing.setdefault(r["event_id"], {})["recruit_message_id"] = sent.get("id")
+        if n % 10 == 0 or n == len(todo):
+            _progress("recruit", n, len(todo), started)
+
+
+def create_schedules(rows, existing, workers, dry_run):
+    now = datetime.now(timezone.utc)
+    todo = []
+    skipped_past = 0
+    for r in rows:
+        if (existing.get(r["event_id"]) or {}).get("event_remind_schedule_name"):
+            continue
+        remind_at_dt = r["start_at_dt"] - timedelta(days=1)
+        if remind_at_dt <= now:
+            skipped_past += 1
+            continue
+        todo.append((r, remind_at_dt))
+    print(f"[schedule] to_create={len(todo)} skipped_past={skipped_past}", file=sys.stderr)
+    if dry_run or not todo:
+        return 0
+
+    started = time.monotonic()
+    lock = threading.Lock()
+    state = {"done": 0}
+
+    def one(item):
+        r, remind_at_dt = item
+        name = app._event_remind_schedule_name(r["guild_id"], r["event_id"])
+        job_input = {"job": "event_remind", "guild_id": r["guild_id"], "event_id": r["event_id"]}
+        try:
+            # 再実行時に Schedule だけ残っている場合もあるので upsert
+            app.create_job_schedule(name, remind_at_dt, job_input, upsert=True)
+        except Exception as e:
+            print(f"line {r['lineno']}: schedule failed: {e!r}", file=sys.stderr)
+            name = None
+        with lock:
+            state["done"] += 1
+            if state["done"] % 25 == 0 or state["done"] == len(todo):
+                _progress("schedule", state["done"], len(todo), started)
+        return r, name
+
+    # Scheduler API はスレッドから並列に叩き、Events への記録はメインスレッドで行う
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(one, todo))
+
+    events_table, _, _, _ = app._get_tables()
+    failed = 0
+    for r, name in results:
+        if not name:
+            failed += 1
+            continue
+        events_table.update_item(
+            Key={"guild_id": r["guild_id"], "event_id": r["event_id"]},
+            UpdateExpression="SET event_remind_schedule_name=:n",
+            ExpressionAttributeValues={":n": name},
+        )
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk event import")
+    parser.add_argument("csv_path")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--skip-invalid", action="store_true", help="不正行を除外して続行")
+    parser.add_argument("--min-interval", type=float, default=0.25, help="同一チャンネルへの最低投稿間隔（秒）")
+    parser.add_argument("--schedule-workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    rows, errors = load_rows(args.csv_path)
+    for lineno, msg in errors:
+        print(f"line {lineno}: {msg}", file=sys.stderr)
+    if errors and not args.skip_invalid:
+        print(f"{len(errors)} invalid row(s); nothing imported", file=sys.stderr)
+        return 1
+
+    # 再開用: 既存 Event の状態をまとめて取得
+    wants = {
+        r["event_id"]: ("events", {"guild_id": r["guild_id"], "event_id": r["event_id"]})
+        for r in rows
+    }
+    found = app.batch_get_items(wants) if wants else {}
+    existing = {eid: it for eid, it in found.items() if it}
+
+    write_events(rows, existing, args.dry_run)
+    post_recruits(rows, existing, PacedSender(args.min_interval), args.dry_run)
+    failed = create_schedules(rows, existing, args.schedule_workers, args.dry_run)
+
+    print(
+        f"IMPORT_DONE rows={len(rows)} invalid={len(errors)} schedule_failed={failed}"
+        + (" (dry_run)" if args.dry_run else ""),
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
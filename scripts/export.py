@@ -0,0 +1,315 @@
+"""
+参加・確認(Ack)レポート用エクスポート CLI
+
+4テーブル（Events / EventMembers / Notices / NoticeAcks）を並列セグメント Scan し、
+イベント単位に結合したレコードを NDJSON / CSV でストリーム出力する。
+
+- Scan は TotalSegments 並列。ReturnConsumedCapacity で消費 RCU を集計し、
+  --max-rcu-per-sec の予算を超えないようにトークンバケットで待つ
+- Scan 結果はいったん一時 SQLite ファイルに書き出してから結合する
+  （全件をメモリに載せない。メモリに載るのは常に1イベント分だけ）
+
+例:
+  python scripts/export.py --format ndjson --segments 8 --max-rcu-per-sec 200 -o report.ndjson
+  python scripts/export.py --format csv --guild-id 1234567890 -o report.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import app  # noqa: E402
+from dynamo import Attr  # noqa: E402
+
+CSV_FIELDS = [
+    "guild_id", "event_id", "title", "status", "event_start_at",
+    "user_id", "username", "joined_at", "notices_total", "notices_acked",
+]
+
+
+class CapacityLimiter:
+    """
+    消費 RCU の予算（/秒）を守るトークンバケット
+    Scan 1ページの消費量は読んでみるまで分からないので、後払いで差し引く
+    """
+
+    def __init__(self, rcu_per_sec: float | None):
+        self.rate = rcu_per_sec
+        self.tokens = rcu_per_sec or 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens > 0:
+                    return
+                deficit = -self.tokens
+            time.sleep(min(deficit / self.rate, 1.0))
+
+    def consume(self, units: float):
+        if not self.rate:
+            return
+        with self.lock:
+            self._refill()
+            self.tokens -= units
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.rcu = {}
+
+    def add(self, kind: str, items: int, rcu: float):
+        with self.lock:
+            self.items[kind] = self.items.get(kind, 0) + items
+            self.rcu[kind] = self.rcu.get(kind, 0.0) + rcu
+
+
+class Spill:
+    """Scan 結果の一時置き場（SQLite ファイル）"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            CREATE TABLE events  (guild_id TEXT, event_id TEXT, item TEXT);
+            CREATE TABLE members (guild_id TEXT, event_id TEXT, item TEXT);
+            CREATE TABLE notices (guild_id TEXT, event_id TEXT, notice_id TEXT, item TEXT);
+            CREATE TABLE acks    (guild_id TEXT, notice_id TEXT, user_id TEXT);
+            """
+        )
+
+    def insert(self, kind: str, items: list[dict]):
+        rows = []
+        for it in items:
+            g = it.get("guild_id")
+            if kind == "events":
+                rows.append((g, it.get("event_id"), _dumps(it)))
+            elif kind == "members":
+                rows.append((g, it.get("event_id"), _dumps(it)))
+            elif kind == "notices":
+                rows.append((g, it.get("event_id"), it.get("notice_id"), _dumps(it)))
+            else:
+                rows.append((g, it.get("notice_id"), it.get("user_id")))
+        if not rows:
+            return
+        placeholders = ",".join("?" * len(rows[0]))
+        with self.lock:
+            self.conn.executemany(f"INSERT INTO {kind} VALUES ({placeholders})", rows)
+
+    def build_indexes(self):
+        with self.lock:
+            self.conn.executescript(
+                """
+                CREATE INDEX ix_members ON members (guild_id, event_id);
+                CREATE INDEX ix_notices ON notices (guild_id, event_id);
+                CREATE INDEX ix_acks    ON acks    (guild_id, notice_id);
+                """
+            )
+            self.conn.commit()
+
+
+def _dumps(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False, default=app._json_default)
+
+
+def _scan_segment(table, kind, segment, total, limiter, stats, spill, scan_kwargs):
+    kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total, ReturnConsumedCapacity="TOTAL")
+    while True:
+        limiter.wait()
+        resp = table.scan(**kwargs)
+        items = resp.get("Items") or []
+        rcu = float((resp.get("ConsumedCapacity") or {}).get("CapacityUnits") or 0)
+        limiter.consume(rcu)
+        spill.insert(kind, items)
+        stats.add(kind, len(items), rcu)
+        lek = resp.get("LastEvaluatedKey")
+        if not lek:
+            return
+        kwargs["ExclusiveStartKey"] = lek
+
+
+def scan_tables(spill, segments, limiter, stats, guild_id=None):
+    tables = app._tables_by_kind()
+    scan_kwargs = {}
+    if guild_id:
+        scan_kwargs["FilterExpression"] = Attr("guild_id").eq(guild_id)
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        for kind in ("events", "members", "notices", "acks"):
+            started = time.monotonic()
+            futures = [
+                pool.submit(_scan_segment, tables[kind], kind, seg, segments, limiter, stats, spill, scan_kwargs)
+                for seg in range(segments)
+            ]
+            for f in futures:
+                f.result()
+            elapsed = time.monotonic() - started
+            n = stats.items.get(kind, 0)
+            print(
+                f"SCAN {kind}: items={n} rcu={stats.rcu.get(kind, 0.0):.1f} "
+                f"sec={elapsed:.2f} items/s={n / elapsed if elapsed else 0:.0f}",
+                file=sys.stderr,
+            )
+    spill.build_indexes()
+
+
+def iter_event_records(spill):
+    """
+    イベント単位で結合したレコードを1件ずつ返す（メモリに載るのは1イベント分）
+    """
+    conn = spill.conn
+    cur = conn.execute("SELECT guild_id, event_id, item FROM events ORDER BY guild_id, event_id")
+    for guild_id, event_id, ev_json in cur:
+        ev = json.loads(ev_json)
+        members = [
+            json.loads(r[0])
+            for r in conn.execute(
+                "SELECT item FROM members WHERE guild_id=? AND event_id=?", (guild_id, event_id)
+            )
+        ]
+        members.sort(key=lambda m: m.get("joined_at") or "")
+        member_ids = {m.get("user_id") for m in members if m.get("user_id")}
+
+        notices = []
+        acked_per_user = {uid: 0 for uid in member_ids}
+        for (n_json,) in conn.execute(
+            "SELECT item FROM notices WHERE guild_id=? AND event_id=?", (guild_id, event_id)
+        ):
+            n = json.loads(n_json)
+            acked = {
+                r[0]
+                for r in conn.execute(
+                    "SELECT user_id FROM acks WHERE guild_id=? AND notice_id=?", (guild_id, n.get("notice_id"))
+                )
+                if r[0]
+            }
+            for uid in acked & member_ids:
+                acked_per_user[uid] += 1
+            notices.append({
+                "notice_id": n.get("notice_id"),
+                "title": n.get("title"),
+                "status": n.get("status") or "OPEN",
+                "created_at": n.get("created_at"),
+                "closed_at": n.get("closed_at"),
+                "ack_count": len(acked),
+                "acked_user_ids": sorted(acked),
+                "unacked_user_ids": sorted(member_ids - acked),
+            })
+        notices.sort(key=lambda x: x.get("created_at") or "")
+
+        expected = len(member_ids) * len(notices)
+        acked_total = sum(acked_per_user.values())
+        yield {
+            "guild_id": guild_id,
+            "event_id": event_id,
+            "title": ev.get("title"),
+            "status": ev.get("status") or "OPEN",
+            "event_start_at": ev.get("event_start_at"),
+            "created_by": ev.get("created_by"),
+            "member_count": len(members),
+            "members": [
+                {
+                    "user_id": m.get("user_id"),
+                    "username": m.get("username"),
+                    "joined_at": m.get("joined_at"),
+                    "notices_acked": acked_per_user.get(m.get("user_id"), 0),
+                }
+                for m in members
+            ],
+            "notices": notices,
+            "ack_rate": (acked_total / expected) if expected else None,
+        }
+
+
+def write_ndjson(records, out):
+    n = 0
+    for rec in records:
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+
+def write_csv(records, out):
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    n = 0
+    for rec in records:
+        base = {k: rec.get(k) for k in ("guild_id", "event_id", "title", "status", "event_start_at")}
+        notices_total = len(rec["notices"])
+        for m in rec["members"] or [{}]:
+            writer.writerow({
+                **base,
+                "user_id": m.get("user_id"),
+                "username": m.get("username"),
+                "joined_at": m.get("joined_at"),
+                "notices_total": notices_total,
+                "notices_acked": m.get("notices_acked"),
+            })
+        n += 1
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export participation / ack report")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("-o", "--output", default="-", help="出力先（既定: stdout）")
+    parser.add_argument("--segments", type=int, default=4, help="並列 Scan の TotalSegments")
+    parser.add_argument("--max-rcu-per-sec", type=float, default=None, help="消費 RCU の予算（未指定なら無制限）")
+    parser.add_argument("--guild-id", default=None, help="指定ギルドだけ出力")
+    parser.add_argument("--tmp-dir", default=None, help="一時 SQLite の置き場所")
+    args = parser.parse_args(argv)
+
+    limiter = CapacityLimiter(args.max_rcu_per_sec)
+    stats = Stats()
+    started = time.monotonic()
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp:
+        spill = Spill(os.path.join(tmp, "export.sqlite3"))
+        scan_tables(spill, max(1, args.segments), limiter, stats, guild_id=args.guild_id)
+
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+        try:
+            records = iter_event_records(spill)
+            writer = write_csv if args.format == "csv" else write_ndjson
+            n_events = writer(records, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        spill.conn.close()
+
+    elapsed = time.monotonic() - started
+    total_items = sum(stats.items.values())
+    total_rcu = sum(stats.rcu.values())
+    print(
+        f"EXPORT_DONE events={n_events} items={total_items} rcu={total_rcu:.1f} "
+        f"sec={elapsed:.2f} items/s={total_items / elapsed if elapsed else 0:.0f} "
+        f"rcu/s={total_rcu / elapsed if elapsed else 0:.1f}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
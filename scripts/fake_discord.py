@@ -0,0 +1,133 @@
+"""
+ローカル検証用の偽 Discord REST サーバー（Bot が呼ぶ API だけ）
+
+    python scripts/fake_discord.py --port 8081
+    DISCORD_API_BASE=http://127.0.0.1:8081/api/v10 DISCORD_BOT_TOKEN=dummy python ...
+
+- 受けたリクエストは1行1 JSON で stdout に出す（method / path / body）
+- メッセージ投稿・編集、ロール作成/削除、メンバーへのロール付け外し、DM チャンネル作成、followup を受ける
+- GET /_state でロールとロールごとのメンバー、投稿済みメッセージ数を返す
+- --fail-rate で 503 をランダムに返す（サーキットブレーカー / 後回しジョブの確認用）
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = "/api/v10"
+
+
+class FakeDiscord:
+    def __init__(self, fail_rate: float = 0.0):
+        self.fail_rate = fail_rate
+        self.ids = itertools.count(100000000000000000)
+        self.roles = {}  # role_id → {"guild_id", "name", "members": set}
+        self.messages = {}  # message_id → {"channel_id", "body"}
+        self.lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return str(next(self.ids))
+
+    def handle(self, method: str, path: str, body: dict | None):
+        """(status, response_obj) を返す"""
+        if self.fail_rate and random.random() < self.fail_rate:
+            return 503, {"message": "fake outage"}
+        with self.lock:
+            if m := re.fullmatch(r"/channels/(\d+)/messages", path):
+                if method == "POST":
+                    mid = self.new_id()
+                    self.messages[mid] = {"channel_id": m.group(1), "body": body}
+                    return 200, {"id": mid, "channel_id": m.group(1), **(body or {})}
+            if m := re.fullmatch(r"/channels/(\d+)/messages/(\d+)", path):
+                if method == "PATCH":
+                    if m.group(2) not in self.messages:
+                        return 404, {"message": "Unknown Message", "code": 10008}
+                    self.messages[m.group(2)]["body"] = body
+                    return 200, {"id": m.group(2), "channel_id": m.group(1), **(body or {})}
+            if m := re.fullmatch(r"/guilds/(\d+)/roles", path):
+                if method == "POST":
+                    rid = self.new_id()
+                    self.roles[rid] = {"guild_id": m.group(1), "name": (body or {}).get("name"), "members": set()}
+                    return 200, {"id": rid, **(body or {})}
+            if m := re.fullmatch(r"/guilds/(\d+)/roles/(\d+)", path):
+                if method == "DELETE":
+                    if self.roles.pop(m.group(2), None) is None:
+                        return 404, {"message": "Unknown Role", "code": 10011}
+                    return 204, None
+            if m := re.fullmatch(r"/guilds/(\d+)/members/(\d+)/roles/(\d+)", path):
+                role = self.roles.get(m.group(3))
+                if role is None:
+                    return 404, {"message": "Unknown Role", "code": 10011}
+                if method == "PUT":
+                    role["members"].add(m.group(2))
+                    return 204, None
+                if method == "DELETE":
+                    role["members"].discard(m.group(2))
+                    return 204, None
+            if path == "/users/@me/channels" and method == "POST":
+                return 200, {"id": self.new_id(), "type": 1}
+            if re.fullmatch(r"/webhooks/(\d+)/[^/]+", path) and method == "POST":
+                return 200, {"id": self.new_id(), **(body or {})}
+        return 404, {"message": "404: Not Found", "code": 0}
+
+    def state(self) -> dict:
+        with self.lock:
+            return {
+                "roles": {rid: dict(r, members=sorted(r["members"])) for rid, r in self.roles.items()},
+                "messages": len(self.messages),
+            }
+
+
+def make_handler(fake: FakeDiscord):
+    class Handler(BaseHTTPRequestHandler):
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body = json.loads(raw) if raw else None
+            if self.command == "GET" and self.path == "/_state":
+                status, resp = 200, fake.state()
+            elif not self.path.startswith(API_PREFIX):
+                status, resp = 404, {"message": "404: Not Found", "code": 0}
+            elif self.command == "PUT" and "Content-Length" not in self.headers:
+                status, resp = 411, {"message": "Length Required"}
+            else:
+                status, resp = fake.handle(self.command, self.path[len(API_PREFIX):], body)
+            print(json.dumps({"method": self.command, "path": self.path, "status": status, "body": body}, ensure_ascii=False), flush=True)
+
+            data = json.dumps(resp, ensure_ascii=False).encode("utf-8") if resp is not None else b""
+            self.send_response(status)
+            if data:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Discord REST server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="503 を返す割合（0〜1）")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(FakeDiscord(args.fail_rate)))
+    print(f"fake discord listening on http://{args.host}:{args.port}{API_PREFIX}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
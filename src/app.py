@@ -1,26 +1,39 @@
 import json
 import os
+import io
+import gzip
+import re
+import random
 import base64
+import time
 import uuid
 import urllib.request
-from urllib.error import HTTPError
+from collections import OrderedDict
+from urllib.error import HTTPError, URLError
 from datetime import datetime, timezone, timedelta
+from decimal import Decimal
 from zoneinfo import ZoneInfo
 
 import boto3
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 from nacl.signing import VerifyKey
 from nacl.exceptions import BadSignatureError
 
+from jsonlog import log
+from dynamo import DynamoDB, Key, Attr, capacity as ddb_capacity
+from fair_dispatch import FairDispatcher
+from circuit_breaker import CircuitBreaker
+import tracing
+
 
 # ===== 起動確認用 =====
 CODE_VERSION = "2026-01-07-2250-worker-v1"
-print("BOOT CODE_VERSION =", CODE_VERSION)
+log.info("BOOT", code_version=CODE_VERSION)
 
 # クライアント/リソースはグローバル化（高速化＆安定）
 lambda_client = boto3.client("lambda")
-ddb = boto3.resource("dynamodb")
+# DynamoDB は resource ではなく低レベル client + 軽量 marshaller（dynamo.py）
+ddb = DynamoDB(boto3.client("dynamodb"))
 scheduler = boto3.client("scheduler")
 
 # =========
@@ -64,24 +77,97 @@ def _scheduler_at_expr(dt: datetime) -> str:
     """
     return f"at({dt.strftime('%Y-%m-%dT%H:%M:%S')})"
 
-def _notice_remind_schedule_name(guild_id: str, notice_id: str) -> str:
+def _notice_remind_schedule_name(guild_id: str, notice_id: str, step: int = 0) -> str:
     """
     Scheduler Name 制約:
       - 文字: [0-9a-zA-Z-_.]+ だけ
       - 長さ <= 64
     notice_id は "NTC#<uuid>" なので <uuid> 部分だけ使う
+    段階リマインドの2段目以降は "-r{step}"（実行後に自動削除される前段と名前を分ける）
     """
     nid = notice_id.split("#", 1)[1] if "#" in notice_id else notice_id
     nid = nid[:32]  # uuid(32)想定。保険で切る
+    if step:
+        return f"ntc-{guild_id}-{nid}-r{step}"
     return f"ntc-{guild_id}-{nid}-remind"
 
+def _event_remind_schedule_name(guild_id: str, event_id: str) -> str:
+    """
+    notice と同じ形式（uuid全体を使うので衝突しない）
+    旧形式 "evt-remind-{guild_id}-{event_id[-8:]}" は衝突しうるので新規には使わない
+    """
+    eid = event_id.split("#", 1)[1] if "#" in event_id else event_id
+    eid = eid[:32]
+    return f"evt-{guild_id}-{eid}-remind"
+
+# "evt-{guild_id}-{uuid}-remind" / "ntc-{guild_id}-{uuid}-remind" / "ntc-{guild_id}-{uuid}-r{step}"
+_SCHEDULE_NAME_RE = re.compile(r"^(evt|ntc)-(\d+)-([0-9a-f]{32})-(?:remind|r\d+)$")
+
+# 連絡リマインドの段階（remind_at からのオフセット）。例: "0,6h,24h" = remind_at / +6時間 / +24時間
+# 最初の段も remind_at + steps[0] に予約する（例: "30m,6h" = 30分後 / 6時間後）
+# 連絡ごとに作成モーダルの「リマインド段階」で上書きできる（空欄なら NOTICE_REMIND_STEPS）
+# 作成時に Notice の remind_steps（分）へ写すので、後から変えても既存の連絡には影響しない
+NOTICE_REMIND_STEPS_DEFAULT = "0"
+NOTICE_REMIND_STEPS_MAX = 10
+
+def _parse_remind_step(part: str) -> int:
+    part = part.strip().lower()
+    unit = {"m": 1, "h": 60, "d": 1440}.get(part[-1])
+    return int(part[:-1]) * unit if unit else int(part)
+
+def _parse_remind_steps(raw: str | None) -> list[int]:
+    steps = []
+    for part in (raw or NOTICE_REMIND_STEPS_DEFAULT).split(","):
+        if not part.strip():
+            continue
+        try:
+            steps.append(_parse_remind_step(part))
+        except ValueError:
+            continue
+    return sorted(set(steps)) or [0]
+
+def _parse_notice_remind_steps(raw: str) -> list[int] | None:
+    """モーダル入力の段階（例: "0,6h,24h"）。読めない段がある / 負の段 / 多すぎるなら None"""
+    try:
+        steps = sorted({_parse_remind_step(p) for p in raw.split(",") if p.strip()})
+    except ValueError:
+        return None
+    if not steps or steps[0] < 0 or len(steps) > NOTICE_REMIND_STEPS_MAX:
+        return None
+    return steps
+
 def _parse_body(event):
     body = event.get("body") or ""
     if event.get("isBase64Encoded"):
         body = base64.b64decode(body).decode("utf-8")
     return body
 
-def _verify_discord_request(headers: dict, raw_body: str):
+# 署名検証の前段フィルタ
+#   - VerifyKey は公開鍵hexごとにコンテナ内で1回だけ生成
+#   - x-signature-timestamp が許容幅（DISCORD_SIGNATURE_MAX_AGE_SEC）外なら暗号処理の前に拒否
+#   - 検証済み署名を直近 N 件（SIGNATURE_REPLAY_CACHE_SIZE）覚えておき、同じ署名の再送を拒否
+#     ※ キャッシュはコンテナ単位（別コンテナへのリプレイは時刻窓で防ぐ）
+SIGNATURE_MAX_AGE_SEC_DEFAULT = 300
+SIGNATURE_REPLAY_CACHE_SIZE_DEFAULT = 4096
+SIGNATURE_BYTES = 64  # Ed25519 の署名長
+_verify_keys = {}
+_seen_signatures = OrderedDict()
+
+def _get_verify_key(public_key_hex: str) -> VerifyKey:
+    vk = _verify_keys.get(public_key_hex)
+    if vk is None:
+        vk = VerifyKey(bytes.fromhex(public_key_hex))
+        _verify_keys.clear()  # 鍵は1つだけ想定（env が変わったら作り直す）
+        _verify_keys[public_key_hex] = vk
+    return vk
+
+def _remember_signature(signature: bytes):
+    limit = int(os.environ.get("SIGNATURE_REPLAY_CACHE_SIZE") or SIGNATURE_REPLAY_CACHE_SIZE_DEFAULT)
+    _seen_signatures[signature] = True
+    while len(_seen_signatures) > limit:
+        _seen_signatures.popitem(last=False)
+
+def _verify_discord_request(headers: dict, raw_body: str, now: float | None = None):
     signature = _get_header(headers, "x-signature-ed25519")
     timestamp = _get_header(headers, "x-signature-timestamp")
     if not signature or not timestamp:
@@ -91,14 +177,35 @@ def _verify_discord_request(headers: dict, raw_body: str):
     if not public_key_hex:
         return False, "DISCORD_PUBLIC_KEY is not set"
 
+    # ① 時刻窓（暗号処理の前に安く弾く）
+    max_age = int(os.environ.get("DISCORD_SIGNATURE_MAX_AGE_SEC") or SIGNATURE_MAX_AGE_SEC_DEFAULT)
+    try:
+        ts = int(timestamp)
+    except ValueError:
+        return False, "invalid signature timestamp"
+    if abs((time.time() if now is None else now) - ts) > max_age:
+        return False, "stale signature timestamp"
+
+    # ② リプレイ（hex は大文字小文字や空白の違いでも同じ署名になるので、デコード後のバイト列で見る）
+    try:
+        sig = bytes.fromhex(signature)
+    except ValueError:
+        return False, "invalid request signature"
+    if len(sig) != SIGNATURE_BYTES:
+        return False, "invalid request signature"
+    if sig in _seen_signatures:
+        return False, "replayed request"
+
+    # ③ Ed25519
     message = (timestamp + raw_body).encode("utf-8")
     try:
-        vk = VerifyKey(bytes.fromhex(public_key_hex))
-        vk.verify(message, bytes.fromhex(signature))
-        return True, None
+        _get_verify_key(public_key_hex).verify(message, sig)
     except (BadSignatureError, ValueError):
         return False, "invalid request signature"
 
+    _remember_signature(sig)
+    return True, None
+
 def _get_tables():
     events = ddb.Table(os.environ["DDB_EVENTS_TABLE"])
     members = ddb.Table(os.environ["DDB_EVENT_MEMBERS_TABLE"])
@@ -106,6 +213,82 @@ def _get_tables():
     acks = ddb.Table(os.environ["DDB_NOTICE_ACKS_TABLE"])
     return events, members, notices, acks
 
+# BatchGetItem 用: 論理名 → (テーブル名の環境変数, キー属性)
+_TABLE_ENV = {
+    "events": "DDB_EVENTS_TABLE",
+    "members": "DDB_EVENT_MEMBERS_TABLE",
+    "notices": "DDB_NOTICES_TABLE",
+    "acks": "DDB_NOTICE_ACKS_TABLE",
+    "dm_channels": "DDB_DM_CHANNELS_TABLE",
+    "stats": "DDB_STATS_TABLE",
+}
+_TABLE_KEYS = {
+    "events": ("guild_id", "event_id"),
+    "members": ("guild_id", "member_key"),
+    "notices": ("guild_id", "notice_id"),
+    "acks": ("guild_id", "ack_key"),
+    "dm_channels": ("user_id",),
+    "stats": ("guild_id", "stat_key"),
+}
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+
+def batch_get_items(wants: dict, consistent: bool = True) -> dict:
+    """
+    4テーブルにまたがる get_item を BatchGetItem 1回にまとめる
+    wants:  {"notice": ("notices", {"guild_id": ..., "notice_id": ...}), ...}
+    戻り値: {"notice": item or None, ...}
+    UnprocessedKeys は指数バックオフで再試行する
+    """
+    out = {name: None for name in wants}
+    # (テーブル名, キー値タプル) → 論理名リスト（同一キーは1回だけ取得）
+    index = {}
+    for name, (kind, key) in wants.items():
+        table_name = os.environ[_TABLE_ENV[kind]]
+        key_vals = tuple(key[k] for k in _TABLE_KEYS[kind])
+        index.setdefault((table_name, key_vals), (kind, key, []))[2].append(name)
+
+    pending = list(index.items())
+    while pending:
+        chunk, pending = pending[:BATCH_GET_MAX_KEYS], pending[BATCH_GET_MAX_KEYS:]
+        lookup = dict(chunk)
+        kinds = {}
+        request = {}
+        for (table_name, _), (kind, key, _) in chunk:
+            kinds[table_name] = kind
+            request.setdefault(table_name, {"Keys": [], "ConsistentRead": consistent})["Keys"].append(key)
+
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            resp = ddb.batch_get_item(RequestItems=request)
+            for table_name, items in (resp.get("Responses") or {}).items():
+                for it in items:
+                    key_vals = tuple(it.get(k) for k in _TABLE_KEYS[kinds[table_name]])
+                    entry = lookup.get((table_name, key_vals))
+                    if entry:
+                        for name in entry[2]:
+                            out[name] = it
+            request = resp.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise RuntimeError(f"batch_get_items: unprocessed keys remain: {list(request)}")
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+    return out
+
+def _query_all(table, **kwargs) -> list[dict]:
+    """
+    LastEvaluatedKey を辿って全ページ読む（1MB 超でも取りこぼさない）
+    """
+    items = []
+    while True:
+        resp = table.query(**kwargs)
+        items.extend(resp.get("Items") or [])
+        lek = resp.get("LastEvaluatedKey")
+        if not lek:
+            return items
+        kwargs["ExclusiveStartKey"] = lek
+
 def _split_custom_id(custom_id: str):
     if not custom_id or ":" not in custom_id:
         return custom_id, None
@@ -127,9 +310,11 @@ def defer_ephemeral():
     return {"type": 5, "data": {"flags": 64}}  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
 
 DISCORD_UA = "DiscordBot (shishigamu-event-bot, 0.1)"  # 好きに命名OK（DiscordBot を含める）
+# ローカル検証では偽の Discord REST サーバーに向ける（例: http://127.0.0.1:8081/api/v10）
+DISCORD_API_BASE = (os.environ.get("DISCORD_API_BASE") or "https://discord.com/api/v10").rstrip("/")
 
 def discord_followup(app_id, token, message):
-    url = f"https://discord.com/api/v10/webhooks/{app_id}/{token}"
+    url = f"{DISCORD_API_BASE}/webhooks/{app_id}/{token}"
 
     body_obj = message if isinstance(message, dict) else {"content": str(message)}
     payload = json.dumps(body_obj, ensure_ascii=False).encode("utf-8")
@@ -149,78 +334,324 @@ def discord_followup(app_id, token, message):
             return resp.read().decode("utf-8", errors="replace")
     except HTTPError as e:
         err_body = e.read().decode("utf-8", errors="replace")
-        print("DISCORD_HTTPERROR(FOLLOWUP)", e.code, e.reason)
-        print("DISCORD_HTTPERROR_BODY(FOLLOWUP)", err_body)
+        log.error("DISCORD_HTTPERROR", api="FOLLOWUP", code=e.code, reason=e.reason, body=err_body)
         raise
 
-def discord_send_message_bot(channel_id: str, message: dict):
+DISCORD_429_MAX_RETRIES = 3
+DISCORD_429_MAX_WAIT_SEC = 5.0
+# interaction の応答期限は3秒。その中で呼ぶ REST はこれ以上待たない
+DISCORD_INTERACTION_TIMEOUT_SEC_DEFAULT = 1.5
+
+class DiscordUnavailable(RuntimeError):
+    """サーキットブレーカーが open のため Discord を呼ばずに失敗した"""
+
+# Discord REST のサーキットブレーカー（コンテナ単位）
+#   DISCORD_CB_FAILURE_THRESHOLD : 連続失敗（タイムアウト / 接続失敗 / 5xx）で open（既定 5）
+#   DISCORD_CB_OPEN_SEC          : open のまま呼ばない秒数。経過後 half-open で試す（既定 30）
+#   DISCORD_CB_HALF_OPEN_PROBES  : half-open で同時に通す試行数（既定 1）
+_discord_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get("DISCORD_CB_FAILURE_THRESHOLD") or 5),
+    open_sec=float(os.environ.get("DISCORD_CB_OPEN_SEC") or 30),
+    half_open_probes=int(os.environ.get("DISCORD_CB_HALF_OPEN_PROBES") or 1),
+)
+
+def _interaction_timeout() -> float:
+    return float(os.environ.get("DISCORD_INTERACTION_TIMEOUT_SEC") or DISCORD_INTERACTION_TIMEOUT_SEC_DEFAULT)
+
+def _is_discord_transient(e: BaseException) -> bool:
+    """時間をおけば通りそうな失敗か（ブレーカー open / タイムアウト / 接続失敗 / 5xx / 429）"""
+    if isinstance(e, DiscordUnavailable):
+        return True
+    if isinstance(e, HTTPError):
+        return e.code >= 500 or e.code == 429
+    return isinstance(e, (URLError, TimeoutError, OSError))
+
+def discord_bot_request(method: str, path: str, body: dict | None = None, api: str = "BOT", timeout: float = 8):
+    """
+    Bot トークンで Discord REST を呼ぶ共通処理。(レスポンスJSON, レスポンスヘッダ) を返す
+    timeout は 429 の再試行・待ちを含めた呼び出し全体の上限（秒）。各試行はその残り時間で打ち切る
+    429 は retry_after（DISCORD_429_MAX_WAIT_SEC 以内、かつ待った後に試行できる時間が残るとき）だけ待って再試行する
+    ブレーカーが open なら呼ばずに DiscordUnavailable
+    """
     bot_token = os.environ.get("DISCORD_BOT_TOKEN")
     if not bot_token:
         raise RuntimeError("DISCORD_BOT_TOKEN is not set")
 
-    url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
-    data = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    if not _discord_breaker.allow():
+        log.warn("DISCORD_CIRCUIT_OPEN", api=api, retry_in=round(_discord_breaker.retry_in(), 1))
+        raise DiscordUnavailable(f"discord circuit open: {api}")
+    try:
+        with tracing.span("discord", api=api, method=method):
+            result = _discord_bot_request_once(bot_token, method, path, body, api, time.monotonic() + timeout)
+    except Exception as e:
+        # 4xx（429 含む）は Discord 自体は応答しているのでブレーカーには数えない
+        if _is_discord_transient(e) and not (isinstance(e, HTTPError) and e.code < 500):
+            _discord_breaker.record_failure()
+            log.warn("DISCORD_CALL_FAILED", api=api, error=repr(e), breaker=_discord_breaker.state)
+        else:
+            _discord_breaker.record_success()
+        raise
+    _discord_breaker.record_success()
+    return result
+
+# 残り時間がこれ未満なら新しい試行を始めない
+DISCORD_MIN_ATTEMPT_SEC = 0.2
+
+def _discord_bot_request_once(bot_token: str, method: str, path: str, body: dict | None, api: str, deadline: float):
+    """deadline（time.monotonic() の絶対時刻）までに終わらない試行・待ちはしない"""
+    url = f"{DISCORD_API_BASE}{path}"
+    data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+    headers = {
+        "Authorization": f"Bot {bot_token}",
+        "User-Agent": DISCORD_UA,
+    }
+    if data is not None:
+        headers["Content-Type"] = "application/json"
+
+    for attempt in range(DISCORD_429_MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining < DISCORD_MIN_ATTEMPT_SEC:
+            raise TimeoutError(f"discord deadline exceeded: {api}")
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=remaining) as resp:
+                raw = resp.read().decode("utf-8", errors="replace")
+                return (json.loads(raw) if raw else {}), dict(resp.headers)
+        except HTTPError as e:
+            err_body = e.read().decode("utf-8", errors="replace")
+            if e.code == 429 and attempt < DISCORD_429_MAX_RETRIES:
+                try:
+                    retry_after = float(json.loads(err_body).get("retry_after") or 1.0)
+                except ValueError:
+                    retry_after = float(e.headers.get("Retry-After") or 1.0)
+                # 待った後にもう1回試せるだけの時間が残るときだけ待つ
+                remaining = deadline - time.monotonic()
+                if retry_after <= min(DISCORD_429_MAX_WAIT_SEC, remaining - DISCORD_MIN_ATTEMPT_SEC):
+                    log.warn("DISCORD_RATE_LIMITED", api=api, retry_after=retry_after, attempt=attempt)
+                    time.sleep(retry_after)
+                    continue
+            log.error("DISCORD_HTTPERROR", api=api, code=e.code, reason=e.reason, body=err_body)
+            raise
 
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bot {bot_token}",
-            "User-Agent": DISCORD_UA,
-        },
-        method="POST",
+def discord_send_message_bot(channel_id: str, message: dict):
+    data, _ = discord_bot_request("POST", f"/channels/{channel_id}/messages", message, api="SEND_MESSAGE")
+    return data
+
+def discord_edit_message_bot(channel_id: str, message_id: str, message: dict, timeout: float = 8):
+    data, _ = discord_bot_request(
+        "PATCH", f"/channels/{channel_id}/messages/{message_id}", message, api="EDIT_MESSAGE", timeout=timeout
     )
+    return data
 
-    try:
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            return json.loads(resp.read().decode("utf-8", errors="replace"))
-    except HTTPError as e:
-        err_body = e.read().decode("utf-8", errors="replace")
-        print("DISCORD_HTTPERROR(SEND_MESSAGE)", e.code, e.reason)
-        print("DISCORD_HTTPERROR_BODY(SEND_MESSAGE)", err_body)
-        raise
+# =========
+# Job transport
+# =========
+# JOB_TRANSPORT=lambda : 同一Lambdaを Event invoke（従来どおり・1ジョブ1invoke）
+# JOB_TRANSPORT=sqs    : SQS互換キューへ送信し、SQSイベントソースでバッチ消費
+#                        （SQS_ENDPOINT_URL で ElasticMQ などローカル代替にも向けられる）
+SQS_SEND_BATCH_MAX = 10
+_sqs_client = None
+
+def _job_transport() -> str:
+    return (os.environ.get("JOB_TRANSPORT") or "lambda").lower()
+
+def _get_sqs():
+    global _sqs_client
+    if _sqs_client is None:
+        endpoint = os.environ.get("SQS_ENDPOINT_URL")
+        _sqs_client = boto3.client("sqs", endpoint_url=endpoint) if endpoint else boto3.client("sqs")
+    return _sqs_client
+
+def _send_jobs_lambda(jobs: list[dict], context):
+    # 自分自身のARNで確実にinvoke（関数名ミス回避）
+    fn_arn = context.invoked_function_arn if context else os.environ["TARGET_LAMBDA_ARN"]
+    for job in jobs:
+        log.info("INVOKE_WORKER", fn_arn=fn_arn, job=job.get("job") or job.get("kind"))
+        lambda_client.invoke(
+            FunctionName=fn_arn,
+            InvocationType="Event",  # 非同期
+            Payload=json.dumps(job, ensure_ascii=False).encode("utf-8"),
+        )
 
-def discord_edit_message_bot(channel_id: str, message_id: str, message: dict):
-    bot_token = os.environ.get("DISCORD_BOT_TOKEN")
-    if not bot_token:
-        raise RuntimeError("DISCORD_BOT_TOKEN is not set")
+def _send_jobs_sqs(jobs: list[dict], context):
+    queue_url = os.environ["JOB_QUEUE_URL"]
+    sqs = _get_sqs()
+    for i in range(0, len(jobs), SQS_SEND_BATCH_MAX):
+        chunk = jobs[i:i + SQS_SEND_BATCH_MAX]
+        resp = sqs.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {"Id": str(n), "MessageBody": json.dumps(job, ensure_ascii=False)}
+                for n, job in enumerate(chunk)
+            ],
+        )
+        failed = resp.get("Failed") or []
+        if failed:
+            log.error("ENQUEUE_FAILED", failed=failed, failed_count=len(failed))
+            raise RuntimeError(f"failed to enqueue {len(failed)} job(s)")
+        log.info("ENQUEUE_SQS", queue_url=queue_url, count=len(chunk))
+
+def _send_jobs_thread(jobs: list[dict], context):
+    # self-hosted（local_runner.py）用: 同一プロセスのスレッドで実行
+    import threading
+    for job in jobs:
+        threading.Thread(target=lambda_handler, args=(job, context), daemon=True).start()
+
+_JOB_TRANSPORTS = {
+    "lambda": _send_jobs_lambda,
+    "sqs": _send_jobs_sqs,
+    "thread": _send_jobs_thread,
+}
+
+def enqueue_jobs(jobs: list[dict], context=None):
+    if not jobs:
+        return
+    transport = _job_transport()
+    sender = _JOB_TRANSPORTS.get(transport)
+    if not sender:
+        raise RuntimeError(f"unknown JOB_TRANSPORT: {transport}")
+    # 実行中の trace をジョブに載せる（ワーカー側で同じ trace_id になる）
+    sender([tracing.inject(job) for job in jobs], context)
 
-    url = f"https://discord.com/api/v10/channels/{channel_id}/messages/{message_id}"
-    data = json.dumps(message, ensure_ascii=False).encode("utf-8")
+def invoke_worker_async(payload: dict, context):
+    enqueue_jobs([{"job": "event_create_worker", "payload": payload}], context)
 
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bot {bot_token}",
-            "User-Agent": DISCORD_UA,
-        },
-        method="PATCH",
+def _scheduler_target(job_input: dict) -> dict:
+    """
+    Scheduler の Target。JOB_TRANSPORT=sqs ならキュー（JOB_QUEUE_ARN）に投入し、
+    同じ時刻のジョブをワーカー側でまとめて消費できるようにする
+    """
+    arn = os.environ["TARGET_LAMBDA_ARN"]
+    if _job_transport() == "sqs" and os.environ.get("JOB_QUEUE_ARN"):
+        arn = os.environ["JOB_QUEUE_ARN"]
+    return {
+        "Arn": arn,
+        "RoleArn": os.environ["SCHEDULER_ROLE_ARN"],
+        "Input": json.dumps(job_input, ensure_ascii=False),
+    }
+# =========
+# Scheduler backend
+# =========
+# SCHEDULER_BACKEND=eventbridge（既定）: EventBridge Scheduler の at() 式で Lambda / キューを起動
+# SCHEDULER_BACKEND=local             : self-hosted 用。DDB_TIMERS_TABLE に永続化し、
+#                                       local_runner.py の階層タイミングホイールで発火する
+# どちらも同じジョブ payload（job: event_remind / kind: notice_remind）を発火する
+_local_wheel = None
+
+def _scheduler_backend() -> str:
+    return (os.environ.get("SCHEDULER_BACKEND") or "eventbridge").lower()
+
+def set_local_timer_wheel(wheel):
+    """local_runner から呼ぶ。登録後は create/delete がホイールにも即時反映される"""
+    global _local_wheel
+    _local_wheel = wheel
+
+def _get_timers_table():
+    return ddb.Table(os.environ["DDB_TIMERS_TABLE"])
+
+def create_job_schedule(name: str, at_dt: datetime, job_input: dict, upsert: bool = False) -> str:
+    """
+    at_dt に job_input を発火する Schedule を作る（upsert=True なら既存を置き換え）
+    Input には trace と予定時刻（scheduled_ms）も載せる
+    """
+    job_input = tracing.inject(job_input, scheduled_ms=int(at_dt.timestamp() * 1000))
+    if _scheduler_backend() == "local":
+        item = {
+            "timer_id": name,
+            "fire_at": at_dt.astimezone(timezone.utc).isoformat(),
+            "payload": json.dumps(job_input, ensure_ascii=False),
+        }
+        if upsert:
+            _get_timers_table().put_item(Item=item)
+        else:
+            try:
+                _get_timers_table().put_item(Item=item, ConditionExpression="attribute_not_exists(timer_id)")
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                    raise RuntimeError(f"schedule already exists: {name}") from e
+                raise
+        if _local_wheel is not None:
+            _local_wheel.add(name, at_dt.timestamp(), job_input)
+        return name
+
+    params = dict(
+        Name=name,
+        ScheduleExpression=_scheduler_at_expr(at_dt),
+        ScheduleExpressionTimezone="Asia/Tokyo",
+        FlexibleTimeWindow={"Mode": "OFF"},
+        Target=_scheduler_target(job_input),
+        ActionAfterCompletion="DELETE",  # 実行後に自動削除（Scheduler のクォータ節約）
     )
+    try:
+        scheduler.create_schedule(**params)
+    except ClientError as e:
+        if upsert and e.response["Error"]["Code"] in ("ConflictException",):
+            scheduler.update_schedule(**params)
+        else:
+            raise
+    return name
+
+def delete_schedule_quietly(name: str) -> bool:
+    """
+    Schedule を削除する（既に無ければ何もしない）。削除したら True
+    """
+    if _scheduler_backend() == "local":
+        if _local_wheel is not None:
+            _local_wheel.cancel(name)
+        resp = _get_timers_table().delete_item(Key={"timer_id": name}, ReturnValues="ALL_OLD")
+        return "Attributes" in resp
 
     try:
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            return json.loads(resp.read().decode("utf-8", errors="replace"))
-    except HTTPError as e:
-        err_body = e.read().decode("utf-8", errors="replace")
-        print("DISCORD_HTTPERROR(EDIT_MESSAGE)", e.code, e.reason)
-        print("DISCORD_HTTPERROR_BODY(EDIT_MESSAGE)", err_body)
+        scheduler.delete_schedule(Name=name)
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("ResourceNotFoundException",):
+            return False
         raise
 
-def invoke_worker_async(payload: dict, context):
-    # 自分自身のARNで確実にinvoke（関数名ミス回避）
-    fn_arn = context.invoked_function_arn
-    job = {"job": "event_create_worker", "payload": payload}
+def _iter_schedule_names(prefix: str):
+    if _scheduler_backend() == "local":
+        for it in _scan_all(_get_timers_table(), FilterExpression=Attr("timer_id").begins_with(prefix)):
+            yield it["timer_id"]
+        return
+    paginator = scheduler.get_paginator("list_schedules")
+    for page in paginator.paginate(NamePrefix=prefix):
+        for sch in page.get("Schedules") or []:
+            yield sch["Name"]
+
+def _get_schedule_input(name: str) -> dict | None:
+    if _scheduler_backend() == "local":
+        it = _get_timers_table().get_item(Key={"timer_id": name}).get("Item")
+        raw = it.get("payload") if it else None
+    else:
+        try:
+            raw = (scheduler.get_schedule(Name=name).get("Target") or {}).get("Input")
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("ResourceNotFoundException",):
+                return None
+            raise
+    try:
+        return json.loads(raw or "{}")
+    except ValueError:
+        return None
 
-    print("INVOKE_WORKER ->", fn_arn)
+def rebuild_local_timers(wheel) -> int:
+    """
+    再起動時: DDB_TIMERS_TABLE の未発火タイマーをホイールに積み直す（過去分は次の tick で発火）
+    """
+    n = 0
+    for it in _scan_all(_get_timers_table()):
+        try:
+            fire_at = datetime.fromisoformat(it["fire_at"]).timestamp()
+            payload = json.loads(it.get("payload") or "{}")
+        except (KeyError, ValueError) as e:
+            log.warn("TIMER_INVALID", timer_id=it.get("timer_id"), error=repr(e))
+            continue
+        wheel.add(it["timer_id"], fire_at, payload)
+        n += 1
+    log.info("TIMERS_REBUILT", count=n)
+    return n
 
-    lambda_client.invoke(
-        FunctionName=fn_arn,
-        InvocationType="Event",  # 非同期
-        Payload=json.dumps(job, ensure_ascii=False).encode("utf-8"),
-    )
 #使ってない
 def build_followup_event_message(title: str, event_id: str):
     return {
@@ -308,8 +739,29 @@ def build_recruit_message(
         ],
     }
 
-def refresh_recruit_message(guild_id: str, event_id: str):
-    events_table, members_table, _, _ = _get_tables()
+def render_recruit_message(guild_id: str, event_id: str, ev: dict) -> dict:
+    """
+    募集メッセージを DB の状態から組み立てる（直前の join / leave を含めるため参加者は強い整合性で読む）
+    """
+    _, members_table, _, _ = _get_tables()
+    resp = members_table.query(
+        KeyConditionExpression=Key("guild_id").eq(guild_id)
+        & Key("member_key").begins_with(f"{event_id}#USER#"),
+        ConsistentRead=True,
+    )
+    items = resp.get("Items") or []
+    items.sort(key=lambda x: x.get("joined_at") or "")
+    member_names = [it.get("username") or it.get("user_id") for it in items]
+
+    title = ev.get("title") or "(no title)"
+    status = ev.get("status") or "OPEN"
+    start_at = ev.get("event_start_at")
+    if start_at:
+        start_at = start_at.replace("T", " ")[:16]
+    return build_recruit_message(title, event_id, member_names, start_at=start_at, status=status)
+
+def refresh_recruit_message(guild_id: str, event_id: str, timeout: float = 8):
+    events_table, _, _, _ = _get_tables()
 
     ev = events_table.get_item(
         Key={"guild_id": guild_id, "event_id": event_id},
@@ -317,32 +769,102 @@ def refresh_recruit_message(guild_id: str, event_id: str):
     ).get("Item")
 
     if not ev:
-        print("EVENT_NOT_FOUND:", guild_id, event_id)
+        log.warn("EVENT_NOT_FOUND", guild_id=guild_id, event_id=event_id)
         return
 
     recruit_channel_id = ev.get("recruit_channel_id") or ev.get("channel_id")
     recruit_message_id = ev.get("recruit_message_id") or ev.get("announce_message_id")
-    title = ev.get("title") or "(no title)"
 
     if not recruit_channel_id or not recruit_message_id:
-        print("RECRUIT_IDS_MISSING:", recruit_channel_id, recruit_message_id)
+        log.warn("RECRUIT_IDS_MISSING", channel_id=recruit_channel_id, message_id=recruit_message_id)
         return
 
-    resp = members_table.query(
-        KeyConditionExpression=Key("guild_id").eq(guild_id)
-        & Key("member_key").begins_with(f"{event_id}#USER#")
-    )
-    items = resp.get("Items") or []
-    items.sort(key=lambda x: x.get("joined_at") or "")
-    member_names = [it.get("username") or it.get("user_id") for it in items]
+    new_msg = render_recruit_message(guild_id, event_id, ev)
+    discord_edit_message_bot(recruit_channel_id, recruit_message_id, new_msg, timeout=timeout)
 
-    status = ev.get("status") or "OPEN"
-    start_at = ev.get("event_start_at")
-    if start_at:
-        start_at = start_at.replace("T", " ")[:16]
+def refresh_notice_message(guild_id: str, notice_id: str, timeout: float = 8):
+    """
+    Notice メッセージ（確認数・ボタン）を DB の状態から描き直す
+    """
+    notice = get_notice_item(guild_id, notice_id)
+    if not notice:
+        log.warn("NOTICE_NOT_FOUND", guild_id=guild_id, notice_id=notice_id)
+        return
+    channel_id = notice.get("notice_channel_id") or notice.get("channel_id")
+    message_id = notice.get("notice_message_id") or notice.get("message_id")
+    if not channel_id or not message_id:
+        log.warn("NOTICE_KEYS_MISSING", notice_id=notice_id, keys=",".join(notice.keys()))
+        return
+    ack_count = count_notice_acks(guild_id, notice_id)
+    member_count = count_event_members(guild_id, notice.get("event_id"))
+    new_msg = build_notice_message(guild_id, notice, ack_count, member_count)
+    discord_edit_message_bot(channel_id, message_id, new_msg, timeout=timeout)
 
-    new_msg = build_recruit_message(title, event_id, member_names,start_at=start_at, status=status)
-    discord_edit_message_bot(recruit_channel_id, recruit_message_id, new_msg)
+INTERACTION_FOLLOWUP_RETRY_SEC = 1.0
+
+def update_message_response(msg: dict) -> dict:
+    """
+    ボタンが付いているメッセージそのものを書き換える応答（type 7: UPDATE_MESSAGE）
+    REST の PATCH を別に呼ばずに済む。msg は送信用の形でも type 4 の応答でもよい
+    （ephemeral かどうかは元のメッセージのままなので flags は外す）
+    """
+    data = dict(msg["data"] if "type" in msg else msg)
+    data.pop("flags", None)
+    return {"type": 7, "data": data}
+
+def update_message_with_followup(payload: dict, msg: dict, content: str, context=None) -> dict:
+    """
+    type 7 でメッセージを書き換え、押した人への確認（ephemeral）は followup で送る
+    followup は最初の応答の後でないと送れないので interaction_followup ジョブに回す（3 秒の期限内に応答を返す）
+    """
+    job = {
+        "job": "interaction_followup",
+        "guild_id": payload.get("guild_id"),
+        "app_id": payload.get("application_id"),
+        "token": payload.get("token"),
+        "content": content,
+    }
+    try:
+        enqueue_jobs([job], context)
+    except Exception as e:
+        log.exception("FOLLOWUP_ENQUEUE_ERROR", e)
+    return update_message_response(msg)
+
+def send_interaction_followup(app_id: str, token: str, content: str):
+    """押した人にだけ見える確認を followup で送る（トークンは 15 分有効）"""
+    try:
+        discord_followup(app_id, token, {"content": content, "flags": 64})
+    except HTTPError as e:
+        # 最初の応答（type 7）より先に着くと Unknown Webhook になるので1回だけ待って送り直す
+        if e.code != 404:
+            raise
+        time.sleep(INTERACTION_FOLLOWUP_RETRY_SEC)
+        discord_followup(app_id, token, {"content": content, "flags": 64})
+
+def _is_clicked_message(payload: dict, message_id: str | None) -> bool:
+    """押されたボタンが message_id のメッセージに付いているか（type 7 で書き換えてよいか）"""
+    return bool(message_id) and (payload.get("message") or {}).get("id") == message_id
+
+def rerender_or_defer(job: dict, render, context=None) -> bool:
+    """
+    interaction 内でのメッセージ再描画。render(timeout) を短いタイムアウトで呼び、
+    Discord が不調（ブレーカー open / タイムアウト / 5xx / 429）ならワーカージョブ job に回す
+    DB の書き込みは済んでいるので、ユーザーへの応答はどちらでも 3 秒以内に返す
+    描画できたら True、後回し/失敗なら False
+    """
+    try:
+        render(_interaction_timeout())
+        return True
+    except Exception as e:
+        if not _is_discord_transient(e):
+            log.exception("RERENDER_ERROR", e, job=job.get("job"))
+            return False
+        log.warn("RERENDER_DEFERRED", job=job.get("job"), error=repr(e))
+    try:
+        enqueue_jobs([job], context)
+    except Exception as e:
+        log.exception("RERENDER_DEFER_ERROR", e, job=job.get("job"))
+    return False
 
 def build_notice_message(guild_id: str, notice: dict, ack_count: int, member_count: int):
     title = notice.get("title") or "(no title)"
@@ -369,7 +891,8 @@ def build_notice_message(guild_id: str, notice: dict, ack_count: int, member_cou
                         "type": 2,
                         "style": 3,
                         "label": "確認しました",
-                        "custom_id": f"notice_ack:{notice['notice_id']}",
+                        # event_id も埋め込んで、ack時に Notice と EventMembers を一括取得する
+                        "custom_id": f"notice_ack:{notice['notice_id']}:{notice.get('event_id') or ''}",
                     }
                 ],
             }
@@ -381,12 +904,19 @@ def _discord_message_link(guild_id: str, channel_id: str, message_id: str):
     return f"https://discord.com/channels/{guild_id}/{channel_id}/{message_id}"
 
 # 連絡一覧をehemeralで表示したり表示/非表示ボタンを追加したり
-def build_notice_list_ephemeral(guild_id: str, event_id: str, notices: list[dict]):
+# 1ページ = 連絡4件（Discordのcomponentsは5行までなので、残り1行はページ送り）
+def build_notice_list_ephemeral(
+    guild_id: str,
+    event_id: str,
+    notices: list[dict],
+    prev_cursor: str | None = None,
+    next_cursor: str | None = None,
+    ):
     visible = [n for n in notices if not n.get("is_hidden")]
     hidden = [n for n in notices if n.get("is_hidden")]
 
     lines = [f"📜 **連絡一覧**（このイベントのみ）"]
-    if not notices:
+    if not notices and not prev_cursor:
         lines.append("（連絡はまだありません）")
 
     components = []
@@ -414,7 +944,7 @@ def build_notice_list_ephemeral(guild_id: str, event_id: str, notices: list[dict
                 "type": 2,
                 "style": 2,
                 "label": "再表示",
-                "custom_id": f"notice_show:{nid}",
+                "custom_id": f"notice_show:{nid}:{event_id}",
             })
         else:
             # OPENだけclose可能
@@ -423,35 +953,103 @@ def build_notice_list_ephemeral(guild_id: str, event_id: str, notices: list[dict
                     "type": 2,
                     "style": 2,
                     "label": "close",
-                    "custom_id": f"notice_close:{nid}",
+                    "custom_id": f"notice_close:{nid}:{event_id}",
                 })
             row["components"].append({
                 "type": 2,
                 "style": 2,
                 "label": "非表示",
-                "custom_id": f"notice_hide:{nid}",
+                "custom_id": f"notice_hide:{nid}:{event_id}",
             })
 
         return row
 
     if visible:
         lines.append("\n**表示中**")
-        for n in visible[:10]:
+        for n in visible:
             lines.append(f"- {n.get('title') or '(no title)'} ({n.get('status') or 'OPEN'})")
             components.append(add_notice_row(n))
 
     if hidden:
         lines.append("\n**非表示中**")
-        for n in hidden[:10]:
+        for n in hidden:
             lines.append(f"- {n.get('title') or '(no title)'} ({n.get('status') or 'OPEN'})")
             components.append(add_notice_row(n))
 
+    # ページ送り（cursor はページ境界の notice_id の uuid 部分）
+    if prev_cursor or next_cursor:
+        nav = {"type": 1, "components": []}
+        nav["components"].append({
+            "type": 2,
+            "style": 2,
+            "label": "◀ 新しい連絡",
+            "custom_id": f"notice_page:{event_id}:p{prev_cursor or ''}",
+            "disabled": not prev_cursor,
+        })
+        nav["components"].append({
+            "type": 2,
+            "style": 2,
+            "label": "古い連絡 ▶",
+            "custom_id": f"notice_page:{event_id}:n{next_cursor or ''}",
+            "disabled": not next_cursor,
+        })
+        components.append(nav)
+
     return {
         "type": 4,
         "data": {
             "flags": 64,
             "content": "\n".join(lines),
-            "components": components[:5]  # Discordはcomponents上限があるので最小は5行まで
+            "components": components
+        }
+    }
+
+# /event list: 今後の OPEN イベント一覧（ephemeral、時刻順）
+def build_event_list_ephemeral(
+    guild_id: str,
+    events: list[dict],
+    prev_cursor: str | None = None,
+    next_cursor: str | None = None,
+    ):
+    lines = ["📅 **今後のイベント**（募集中）"]
+    if not events and not prev_cursor:
+        lines.append("（募集中のイベントはありません）")
+
+    for ev in events:
+        title = ev.get("title") or "(no title)"
+        start_at = (ev.get("event_start_at") or "").replace("T", " ")[:16]
+        ch = ev.get("recruit_channel_id") or ev.get("channel_id")
+        mid = ev.get("recruit_message_id") or ev.get("announce_message_id")
+        if ch and mid:
+            title = f"[{title}]({_discord_message_link(guild_id, ch, mid)})"
+        lines.append(f"- `{start_at}` {title} 👥 {int(ev.get('member_count') or 0)}")
+
+    components = []
+    if prev_cursor or next_cursor:
+        components.append({"type": 1, "components": [
+            {
+                "type": 2,
+                "style": 2,
+                "label": "◀ 前へ",
+                "custom_id": f"event_list:p{prev_cursor or ''}",
+                "disabled": not prev_cursor,
+            },
+            {
+                "type": 2,
+                "style": 2,
+                "label": "次へ ▶",
+                "custom_id": f"event_list:n{next_cursor or ''}",
+                "disabled": not next_cursor,
+            },
+        ]})
+
+    return {
+        "type": 4,
+        "data": {
+            "flags": 64,
+            "content": "\n".join(lines),
+            "components": components,
+            "allowed_mentions": {"parse": []},
         }
     }
 
@@ -485,31 +1083,207 @@ def get_title_from_command(payload):
     return None
 
 #いったんスキャンする方で運用 いずれGSIで設計
-def query_notices_by_event(guild_id: str, event_id: str, include_hidden: bool = True):
+NOTICE_LIST_PAGE_SIZE = 4
+
+def _notice_cursor(notice_id: str) -> str:
+    return notice_id.split("#", 1)[1] if "#" in notice_id else notice_id
+
+def query_notice_page(guild_id: str, event_id: str, cursor: str | None = None, direction: str = "n"):
+    """
+    gsi_event を新しい順に1ページだけ読む（Limit + ExclusiveStartKey）
+    cursor:    ページ境界の notice_id（uuid部分）。None なら先頭ページ
+    direction: "n" = cursor より古い側 / "p" = cursor より新しい側
+    戻り値: (items, prev_cursor, next_cursor)
+    """
     _, _, notices_table, _ = _get_tables()
 
-    resp = notices_table.query(
-            IndexName="gsi_event",
-            KeyConditionExpression=
-                Key("guild_id").eq(guild_id)
-                & Key("event_sk").begins_with(f"{event_id}#"),
-        )
-    items = resp.get("Items") or []
+    kwargs = dict(
+        IndexName="gsi_event",
+        KeyConditionExpression=
+            Key("guild_id").eq(guild_id)
+            & Key("event_sk").begins_with(f"{event_id}#"),
+        Limit=NOTICE_LIST_PAGE_SIZE + 1,  # 1件多く読んで続きがあるか判定
+        ScanIndexForward=(direction == "p"),
+    )
+
+    if cursor:
+        # ExclusiveStartKey には GSI キー + テーブルキーが必要なので境界の notice を引く
+        boundary = get_notice_item(guild_id, f"NTC#{cursor}")
+        if boundary and boundary.get("event_sk"):
+            kwargs["ExclusiveStartKey"] = {
+                "guild_id": guild_id,
+                "notice_id": boundary["notice_id"],
+                "event_sk": boundary["event_sk"],
+            }
+        else:
+            cursor = None
+            direction = "n"
+            kwargs["ScanIndexForward"] = False
+
+    items = notices_table.query(**kwargs).get("Items") or []
+    has_more = len(items) > NOTICE_LIST_PAGE_SIZE
+    items = items[:NOTICE_LIST_PAGE_SIZE]
+
+    if direction == "p":
+        items.reverse()
+        has_newer, has_older = has_more, bool(cursor)
+    else:
+        has_newer, has_older = bool(cursor), has_more
+
+    prev_cursor = _notice_cursor(items[0]["notice_id"]) if items and has_newer else None
+    next_cursor = _notice_cursor(items[-1]["notice_id"]) if items and has_older else None
+    return items, prev_cursor, next_cursor
+
+EVENT_LIST_PAGE_SIZE = 10
+
+def _event_status_start(status: str, event_start_at: str) -> str:
+    """gsi_status_start の SK。OPEN だけを開催日時順に読めるようにする"""
+    return f"{status}#{event_start_at}"
+
+def query_event_list_page(guild_id: str, cursor: str | None = None, direction: str = "n"):
+    """
+    gsi_status_start を開催日時の早い順に1ページだけ読む（今より後の OPEN のみ）
+    cursor:    ページ境界の event_id（uuid部分）。None なら先頭ページ
+    direction: "n" = cursor より後 / "p" = cursor より前
+    戻り値: (items, prev_cursor, next_cursor)
+    """
+    events_table, _, _, _ = _get_tables()
+
+    now = datetime.now(JST).isoformat(timespec="seconds")
+    lo, hi = _event_status_start("OPEN", now), _event_status_start("OPEN", "~")
+    kwargs = dict(
+        IndexName="gsi_status_start",
+        KeyConditionExpression=
+            Key("guild_id").eq(guild_id)
+            & Key("status_start").between(lo, hi),
+        Limit=EVENT_LIST_PAGE_SIZE + 1,  # 1件多く読んで続きがあるか判定
+        ScanIndexForward=(direction != "p"),
+    )
+
+    if cursor:
+        # ExclusiveStartKey には GSI キー + テーブルキーが必要なので境界の event を引く
+        # 境界のイベントがその後に締め切られた / 開始した場合は範囲外になり、
+        # DynamoDB が ValidationException を返すので先頭ページに戻す
+        boundary = events_table.get_item(Key={"guild_id": guild_id, "event_id": f"EVT#{cursor}"}).get("Item")
+        if boundary and lo <= (boundary.get("status_start") or "") <= hi:
+            kwargs["ExclusiveStartKey"] = {
+                "guild_id": guild_id,
+                "event_id": boundary["event_id"],
+                "status_start": boundary["status_start"],
+            }
+        else:
+            cursor = None
+            direction = "n"
+            kwargs["ScanIndexForward"] = True
 
-    if not include_hidden:
-        items = [it for it in items if not it.get("is_hidden")]
+    items = events_table.query(**kwargs).get("Items") or []
+    has_more = len(items) > EVENT_LIST_PAGE_SIZE
+    items = items[:EVENT_LIST_PAGE_SIZE]
 
-    # 新しい順にしたいなら（event_skに created_at が入ってる前提）
-    items.sort(key=lambda x: x.get("created_at") or "", reverse=True)
-    return items
+    if direction == "p":
+        items.reverse()
+        has_earlier, has_later = has_more, bool(cursor)
+    else:
+        has_earlier, has_later = bool(cursor), has_more
+
+    prev_cursor = _id_suffix(items[0]["event_id"]) if items and has_earlier else None
+    next_cursor = _id_suffix(items[-1]["event_id"]) if items and has_later else None
+    return items, prev_cursor, next_cursor
 
-def get_open_notice(guild_id: str, event_id: str):
-    items = query_notices_by_event(guild_id, event_id, include_hidden=True)
-    for it in items:
-        if (it.get("status") or "OPEN") == "OPEN" :
+def get_open_notice(guild_id: str, event_id: str, ev: dict | None = None):
+    """
+    OPEN の連絡（あれば1つ）。全件は読まない
+    - Event の open_notice_id（作成時に記録）があれば GetItem 1回
+    - 無ければ gsi_event を新しい順に1件だけ読む。OPEN 中は新しい連絡を作れないので、
+      OPEN の連絡があるなら必ず最新の1件（open_notice_id を記録する前の連絡もこれで見つかる）
+    """
+    _, _, notices_table, _ = _get_tables()
+    notice_id = (ev or {}).get("open_notice_id")
+    if notice_id:
+        it = get_notice_item(guild_id, notice_id)
+        if it and (it.get("status") or "OPEN") == "OPEN":
             return it
+
+    items = notices_table.query(
+        IndexName="gsi_event",
+        KeyConditionExpression=
+            Key("guild_id").eq(guild_id)
+            & Key("event_sk").begins_with(f"{event_id}#"),
+        ScanIndexForward=False,
+        Limit=1,
+    ).get("Items") or []
+    if items and (items[0].get("status") or "OPEN") == "OPEN":
+        return items[0]
     return None
 
+def bump_member_count(guild_id: str, event_id: str, delta: int):
+    """
+    Events.member_count（/event list 表示用の参加人数）を増減する。0 未満にはしない
+    member_count を持たない既存の Event は 0 から数えず、EventMembers を数え直して埋める
+    """
+    events_table, _, _, _ = _get_tables()
+    if delta < 0:
+        condition = "member_count >= :n"
+    else:
+        condition = "attribute_exists(member_count)"
+    try:
+        events_table.update_item(
+            Key={"guild_id": guild_id, "event_id": event_id},
+            UpdateExpression="ADD member_count :d",
+            ConditionExpression=condition,
+            ExpressionAttributeValues={":d": delta, **({":n": -delta} if delta < 0 else {})},
+        )
+        return
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    _fill_member_count(guild_id, event_id)
+
+def _fill_member_count(guild_id: str, event_id: str):
+    """member_count が無い Event にだけ、EventMembers の件数を書く（参加/取消の書き込み後に呼ぶ）"""
+    events_table, _, _, _ = _get_tables()
+    try:
+        events_table.update_item(
+            Key={"guild_id": guild_id, "event_id": event_id},
+            UpdateExpression="SET member_count = :c",
+            ConditionExpression="attribute_exists(event_id) AND attribute_not_exists(member_count)",
+            ExpressionAttributeValues={":c": len(get_event_member_ids(guild_id, event_id))},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+def backfill_event_list_fields(dry_run: bool = False, limit: int | None = None) -> dict:
+    """
+    status_start / member_count を持たない既存の Event に埋める（/event list に出す・人数を正しく数える）
+    status_start は status / event_start_at から、member_count は EventMembers の件数から
+    """
+    events_table, _, _, _ = _get_tables()
+    filled = 0
+    for ev in _scan_all(
+        events_table,
+        FilterExpression=Attr("status_start").not_exists() | Attr("member_count").not_exists(),
+    ):
+        if limit is not None and filled >= limit:
+            break
+        guild_id, event_id = ev["guild_id"], ev["event_id"]
+        sets, values = [], {}
+        if not ev.get("status_start"):
+            sets.append("status_start = if_not_exists(status_start, :ss)")
+            values[":ss"] = _event_status_start(ev.get("status") or "OPEN", ev.get("event_start_at") or "")
+        if ev.get("member_count") is None:
+            sets.append("member_count = if_not_exists(member_count, :c)")
+            values[":c"] = len(get_event_member_ids(guild_id, event_id))
+        log.info("BACKFILL_EVENT_LIST_FIELDS", event_id=event_id, fields=sorted(values), dry_run=dry_run)
+        if not dry_run:
+            events_table.update_item(
+                Key={"guild_id": guild_id, "event_id": event_id},
+                UpdateExpression="SET " + ", ".join(sets),
+                ExpressionAttributeValues=values,
+            )
+        filled += 1
+    return {"ok": True, "events": filled, "dry_run": dry_run}
+
 def count_event_members(guild_id: str, event_id: str):
     _, members_table, _, _ = _get_tables()
     resp = members_table.query(
@@ -546,6 +1320,12 @@ def get_notice_channel_id_from_command(payload):
                 return str(ch)
     return None
 
+def _subcommand_name(data: dict) -> str | None:
+    for opt in data.get("options") or []:
+        if opt.get("type") == 1:  # SUB_COMMAND
+            return opt.get("name")
+    return None
+
 def get_create_options_from_command(payload):
     data = payload.get("data") or {}
     options = data.get("options") or []
@@ -563,11 +1343,12 @@ def get_create_options_from_command(payload):
             return title, notice_channel_id, start_at
     return None, None
 
-def count_notice_acks(guild_id: str, notice_id: str) -> int:
+def count_notice_acks(guild_id: str, notice_id: str, consistent: bool = False) -> int:
     _, _, _, acks_table = _get_tables()
     resp = acks_table.query(
         KeyConditionExpression=Key("guild_id").eq(guild_id)
-        & Key("ack_key").begins_with(f"{notice_id}#USER#")
+        & Key("ack_key").begins_with(f"{notice_id}#USER#"),
+        ConsistentRead=consistent,
     )
     return len(resp.get("Items") or [])
 
@@ -595,28 +1376,135 @@ def get_acked_user_ids(guild_id: str, notice_id: str) -> set[str]:
 
     prefix = f"{notice_id}#USER#"
 
-    res = acks_table.query(
+    items = _query_all(
+        acks_table,
         KeyConditionExpression=
             Key("guild_id").eq(guild_id) &
             Key("ack_key").begins_with(prefix)
     )
-    items = res.get("Items", []) or []
-    out = set()
     return {
         item["ack_key"][len(prefix):]
-        for item in res.get("Items", [])
+        for item in items
         if item.get("ack_key", "").startswith(prefix)
     }
 
-def get_unacked_user_ids(guild_id: str, event_id: str, notice_id: str) -> list[str]:
+# 連絡ごとの未確認者集合（Notice.unacked_ids, SS）
+#   作成時に参加者全員で初期化し、ack で DELETE、OPEN 中の join / leave で ADD / DELETE する
+#   OPEN 中の連絡は Event.open_notice_id で引く（GSI は結果整合なので使わない）。作成と同時の join / leave は
+#     作成側: Notice を書く → open_notice_id を立てる → 参加者を読み直して差分を反映
+#     参加側: EventMembers を書く → Event を強い整合性で読む → open_notice_id があれば反映
+#   の順にしているので、どちらか一方が必ず拾う
+#   空の集合は保存できないので「unacked_tracked はあるが unacked_ids が無い = 全員確認済み」
+#   unacked_tracked の無い連絡（導入前に作ったもの）は従来どおり EventMembers - NoticeAcks で求める
+def _tracked_unacked_ids(notice: dict | None) -> list[str] | None:
+    if not notice or not notice.get("unacked_tracked"):
+        return None
+    return sorted(notice.get("unacked_ids") or [])
+
+def mark_notice_acked(guild_id: str, notice_id: str, user_id: str) -> list[str] | None:
+    """
+    unacked_ids から user_id を外し、残りの未確認者を返す（集合を持たない旧連絡なら None）
+    """
+    _, _, notices_table, _ = _get_tables()
+    try:
+        resp = notices_table.update_item(
+            Key={"guild_id": guild_id, "notice_id": notice_id},
+            UpdateExpression="DELETE unacked_ids :u",
+            ConditionExpression="unacked_tracked = :t",
+            ExpressionAttributeValues={":u": {user_id}, ":t": True},
+            ReturnValues="UPDATED_NEW",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return None
+        raise
+    return sorted((resp.get("Attributes") or {}).get("unacked_ids") or [])
+
+def get_event_member_ids(guild_id: str, event_id: str) -> set[str]:
+    """参加者の user_id 全件（強い整合性・全ページ）"""
+    _, members_table, _, _ = _get_tables()
+    prefix = f"{event_id}#USER#"
+    items = _query_all(
+        members_table,
+        KeyConditionExpression=Key("guild_id").eq(guild_id) & Key("member_key").begins_with(prefix),
+        ConsistentRead=True,
+    )
+    return {it["member_key"][len(prefix):] for it in items}
+
+def _has_acked(guild_id: str, notice_id: str, user_id: str) -> bool:
+    _, _, _, acks_table = _get_tables()
+    return "Item" in acks_table.get_item(
+        Key={"guild_id": guild_id, "ack_key": f"{notice_id}#USER#{user_id}"},
+        ConsistentRead=True,
+    )
+
+def _update_unacked_ids(guild_id: str, notice_id: str, op: str, user_ids: set[str]):
+    """unacked_ids へ ADD / DELETE（OPEN かつ集合を持つ連絡だけ）"""
+    _, _, notices_table, _ = _get_tables()
+    try:
+        notices_table.update_item(
+            Key={"guild_id": guild_id, "notice_id": notice_id},
+            UpdateExpression=f"{op} unacked_ids :u",
+            ConditionExpression="#status = :open AND unacked_tracked = :t",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":u": set(user_ids), ":open": "OPEN", ":t": True},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+def reconcile_notice_unacked(guild_id: str, event_id: str, notice_id: str, seeded: set[str]) -> set[str]:
+    """
+    作成時の初期値 seeded と、open_notice_id を立てた後の参加者の差分を反映する。現在の参加者を返す
+    """
+    current = get_event_member_ids(guild_id, event_id)
+    joined = {uid for uid in current - seeded if not _has_acked(guild_id, notice_id, uid)}
+    left = seeded - current
+    if joined:
+        _update_unacked_ids(guild_id, notice_id, "ADD", joined)
+    if left:
+        _update_unacked_ids(guild_id, notice_id, "DELETE", left)
+    if joined or left:
+        log.info("UNACKED_RECONCILED", notice_id=notice_id, joined=len(joined), left=len(left))
+    return current
+
+def track_open_notice_member(guild_id: str, event_id: str, user_id: str, joined: bool):
+    """
+    join / leave（EventMembers への書き込み後）を OPEN 中の連絡の unacked_ids に反映する
+    失敗しても参加処理自体は止めない
+    """
+    events_table, _, _, _ = _get_tables()
+    try:
+        ev = events_table.get_item(
+            Key={"guild_id": guild_id, "event_id": event_id},
+            ConsistentRead=True,
+        ).get("Item") or {}
+        notice_id = ev.get("open_notice_id")
+        if not notice_id:
+            return
+        # 抜けて戻った人が既に確認済みなら未確認には戻さない
+        if joined and _has_acked(guild_id, notice_id, user_id):
+            return
+        _update_unacked_ids(guild_id, notice_id, "ADD" if joined else "DELETE", {user_id})
+    except Exception as e:
+        log.exception("UNACKED_TRACK_ERROR", e, event_id=event_id, joined=joined)
+
+def get_unacked_user_ids(guild_id: str, event_id: str, notice_id: str, notice: dict | None = None) -> list[str]:
+    """
+    未確認者の user_id（昇順）。notice を渡せばその unacked_ids を使い、DynamoDB を読まない
+    """
+    if notice is None:
+        notice = get_notice_item(guild_id, notice_id)
+    tracked = _tracked_unacked_ids(notice)
+    if tracked is not None:
+        return tracked
+
     join_users = get_join_user_ids(guild_id, event_id)
     acked_users = get_acked_user_ids(guild_id, notice_id)
 
-    print("JOIN_USERS =", join_users)
-    print("ACKED_USERS =", acked_users)
-    print("UNACKED =", join_users - acked_users)
-    
     unacked_users = join_users - acked_users
+    # ID集合そのものは LOG_FULL_IDS=1 のときだけ出る（既定は件数のみ）
+    log.debug("UNACKED", notice_id=notice_id, join_users=join_users, acked_users=acked_users, unacked=unacked_users)
     return sorted(unacked_users)
 
 # =========
@@ -639,10 +1527,13 @@ def handle_event_create_deferred(payload):
 
     title, notice_channel_id, start_at_raw = get_create_options_from_command(payload)  # ★これ1本でOK
 
-    print("CREATE title =", title)
-    print("CREATE channel_id(recruit) =", channel_id)
-    print("CREATE notice_channel_id =", notice_channel_id)
-    print("CREATE start_at =", start_at_raw)
+    log.info(
+        "CREATE",
+        title=title,
+        recruit_channel_id=channel_id,
+        notice_channel_id=notice_channel_id,
+        start_at=start_at_raw,
+    )
     if not title:
         discord_followup(app_id, token, {"content": "title が取得できなかった…（コマンド定義を確認してね）"})
         return
@@ -664,39 +1555,29 @@ def handle_event_create_deferred(payload):
         discord_followup(app_id, token, {"content": "start_at の形式が不正です"})
         return
 
-    # ② 保存用（ISO文字列）
-    event_start_at = start_at_dt.isoformat()
-
-    # ③ 前日リマインド
+    # ② 前日リマインド
     remind_at_dt = start_at_dt - timedelta(days=1)
-    
 
     # DynamoDB保存
     events_table.put_item(
-        Item={
-            "guild_id": guild_id,
-            "event_id": event_id,
-            "title": title,
-            "created_by": user_id,
-            "created_by_name": username,
-            "created_at": _now_iso(),
-            "status": "OPEN",
-            # 募集投稿先
-            "recruit_channel_id": channel_id,
-            # 連絡投稿先（選択したチャンネル）
-            "notice_channel_id": notice_channel_id,
-            # イベント日時
-            "event_start_at": event_start_at,
-            # 1日前リマインド予定？？？
-            "event_remind_at": remind_at_dt.isoformat(),
-        }
+        Item=build_event_item(
+            guild_id=guild_id,
+            event_id=event_id,
+            title=title,
+            created_by=user_id,
+            created_by_name=username,
+            recruit_channel_id=channel_id,
+            notice_channel_id=notice_channel_id,
+            start_at_dt=start_at_dt,
+        )
     )
 
     # 募集メッセージ投稿
     msg = build_recruit_message(title, event_id, members=[], start_at=start_at_raw, status="OPEN")
     sent = discord_send_message_bot(channel_id, msg)
     message_id = sent.get("id")
-    print("RECRUIT message_id:", message_id)
+    # click_to_post_ms: ボタン/コマンドのクリックから募集メッセージ投稿まで
+    log.info("RECRUIT_POSTED", event_id=event_id, message_id=message_id, click_to_post_ms=tracing.since_origin_ms())
 
     # recruit_message_id を保存
     events_table.update_item(
@@ -704,45 +1585,131 @@ def handle_event_create_deferred(payload):
         UpdateExpression="SET recruit_message_id = :mid",
         ExpressionAttributeValues={":mid": message_id},
     )
+    # 参加者ロール（EVENT_REMIND_MENTION=role のときだけ。失敗してもリマインドは1人ずつメンションで送れる）
+    if _event_remind_mention() == "role":
+        create_event_role(guild_id, event_id, title)
     # 1日前リマインドを Scheduler に登録
+    schedule_event_remind(guild_id, event_id, remind_at_dt)
+
+def build_event_item(
+    *,
+    guild_id: str,
+    event_id: str,
+    title: str,
+    created_by: str | None,
+    created_by_name: str | None,
+    recruit_channel_id: str,
+    notice_channel_id: str,
+    start_at_dt: datetime,
+    ) -> dict:
+    return {
+        "guild_id": guild_id,
+        "event_id": event_id,
+        "title": title,
+        "created_by": created_by,
+        "created_by_name": created_by_name,
+        "created_at": _now_iso(),
+        "status": "OPEN",
+        # /event list 用（gsi_status_start の SK）と参加人数カウンタ
+        "status_start": _event_status_start("OPEN", start_at_dt.isoformat()),
+        "member_count": 0,
+        # 募集投稿先
+        "recruit_channel_id": recruit_channel_id,
+        # 連絡投稿先（選択したチャンネル）
+        "notice_channel_id": notice_channel_id,
+        # イベント日時（ISO文字列）
+        "event_start_at": start_at_dt.isoformat(),
+        # 1日前リマインド予定
+        "event_remind_at": (start_at_dt - timedelta(days=1)).isoformat(),
+    }
+
+def schedule_event_remind(guild_id: str, event_id: str, remind_at_dt: datetime, upsert: bool = False) -> str | None:
+    """
+    イベントの前日リマインドを登録し、Event に schedule 名を記録する。失敗時は None
+    """
     # Scheduler が Lambda を invoke するためのロールARN（環境変数で渡す）
-    scheduler_role_arn = os.environ["SCHEDULER_ROLE_ARN"]
-    if not scheduler_role_arn:
-        print("SCHEDULER_ROLE_ARN is not set (skip schedule)")
-        return
-    schedule_name = f"evt-remind-{guild_id}-{event_id[-8:]}"
-    target_lambda_arn = os.environ.get("TARGET_LAMBDA_ARN") 
-    #↑ function ARNを入れるのが理想。未設定なら後述の注意参照。
+    if _scheduler_backend() == "eventbridge" and not os.environ.get("SCHEDULER_ROLE_ARN"):
+        log.warn("SCHEDULER_ROLE_ARN_MISSING")
+        return None
+    events_table, _, _, _ = _get_tables()
+    schedule_name = _event_remind_schedule_name(guild_id, event_id)
 
     job_input = {
         "job": "event_remind",
         "guild_id": guild_id,
         "event_id": event_id,
     }
-    print("TARGET_LAMBDA_ARN(env) =", os.environ.get("TARGET_LAMBDA_ARN"))
-    print("target_lambda_arn(var) =", target_lambda_arn)
     try:
-        scheduler.create_schedule(
-            Name=schedule_name,
-            ScheduleExpression=_scheduler_at_expr(remind_at_dt),
-            ScheduleExpressionTimezone="Asia/Tokyo",
-            FlexibleTimeWindow={"Mode":"OFF"},
-            Target={
-                "Arn":os.environ["TARGET_LAMBDA_ARN"],
-                "RoleArn": scheduler_role_arn,
-                "Input":json.dumps(job_input, ensure_ascii=False),
-            },
-        )
+        create_job_schedule(schedule_name, remind_at_dt, job_input, upsert=upsert)
         events_table.update_item(
             Key={"guild_id": guild_id, "event_id": event_id},
             UpdateExpression="SET event_remind_schedule_name=:n",
             ExpressionAttributeValues={":n": schedule_name},
         )
-        print("SCHEDULE_CREATED:", schedule_name, "at",remind_at_dt.isoformat())
+        log.info("SCHEDULE_CREATED", schedule_name=schedule_name, at=remind_at_dt.isoformat())
+        return schedule_name
     except Exception as e:
-        import traceback
-        print("SCHEDULE_CREATE_ERROR:", repr(e))
-        print(traceback.format_exc())
+        log.exception("SCHEDULE_CREATE_ERROR", e, schedule_name=schedule_name)
+        return None
+
+# リマインド送信の分割とチェックポイント
+#   REMIND_CHUNK_SIZE            : 1回の投稿（メンション）にまとめる人数（既定 50。2000文字制限に収まる数）
+#   REMIND_CHUNKS_PER_INVOCATION : 1回の実行で送るチャンク数。残りは継続ジョブへ（既定 20）
+# 対象アイテム（Event / Notice）の remind_progress にチャンクごとの進捗を書き、
+# 再実行・継続ジョブはそこから再開する（送信済みの人に再度メンションしない）
+REMIND_CHUNK_SIZE_DEFAULT = 50
+REMIND_CHUNKS_PER_INVOCATION_DEFAULT = 20
+
+def fan_out_reminder(table, key: dict, item: dict, run: str, user_ids, send_chunk, continuation_job: dict) -> dict:
+    """
+    user_ids を user_id 順にチャンクへ分けて send_chunk(chunk) で送る
+    run:  この送信の識別子（同じ run の進捗だけを引き継ぐ）
+    進捗 remind_progress = {"run", "cursor"(最後に送った user_id), "sent", "done"}
+    チャンク送信後・進捗記録前に落ちた場合だけ、そのチャンクが再送されうる（at-least-once）
+    戻り値: {"sent": この実行で送った人数, "total_sent": 累計, "done": 全員送ったか}
+    """
+    chunk_size = int(os.environ.get("REMIND_CHUNK_SIZE") or REMIND_CHUNK_SIZE_DEFAULT)
+    max_chunks = int(os.environ.get("REMIND_CHUNKS_PER_INVOCATION") or REMIND_CHUNKS_PER_INVOCATION_DEFAULT)
+
+    progress = item.get("remind_progress") or {}
+    if progress.get("run") != run:
+        progress = {}
+    if progress.get("done"):
+        log.info("REMIND_ALREADY_DELIVERED", run=run, sent=progress.get("sent"))
+        return {"sent": 0, "total_sent": int(progress.get("sent") or 0), "done": True}
+
+    cursor = progress.get("cursor")
+    total = int(progress.get("sent") or 0)
+    todo = sorted(set(user_ids))
+    if cursor:
+        todo = [uid for uid in todo if uid > cursor]
+
+    sent = 0
+    done = not todo
+    for i in range(max_chunks):
+        chunk = todo[i * chunk_size:(i + 1) * chunk_size]
+        if not chunk:
+            break
+        send_chunk(chunk)
+        sent += len(chunk)
+        total += len(chunk)
+        cursor = chunk[-1]
+        done = (i + 1) * chunk_size >= len(todo)
+        _save_remind_progress(table, key, {"run": run, "cursor": cursor, "sent": total, "done": done})
+    if not todo:
+        _save_remind_progress(table, key, {"run": run, "cursor": cursor, "sent": total, "done": True})
+
+    if not done:
+        log.info("REMIND_CONTINUE", run=run, sent=sent, remaining=len(todo) - sent)
+        enqueue_jobs([continuation_job])
+    return {"sent": sent, "total_sent": total, "done": done}
+
+def _save_remind_progress(table, key: dict, progress: dict):
+    table.update_item(
+        Key=key,
+        UpdateExpression="SET remind_progress = :p",
+        ExpressionAttributeValues={":p": progress},
+    )
 
 def handle_event_remind(payload: dict):
     events_table,members_table, _, _ = _get_tables()
@@ -754,32 +1721,117 @@ def handle_event_remind(payload: dict):
         ConsistentRead=True
     ).get("Item")
     if not ev:
-        print("REMIND_EVENT_NOT_FOUND:", guild_id, event_id)
+        log.warn("REMIND_EVENT_NOT_FOUND", guild_id=guild_id, event_id=event_id)
         return
     title = ev.get("title") or "(no title)"
     channel_id = ev.get("notice_channel_id") #リマインドはnoticeを設定したチャンネルに送られる
     if not channel_id:
-        print("REMIND_CHANNEL_MISSING")
+        log.warn("REMIND_CHANNEL_MISSING", event_id=event_id)
         return
 
-    # join者一覧
-    resp = members_table.query(
+    role_remind = _event_remind_mention() == "role" and ev.get("role_id")
+    if role_remind and int(ev.get("member_count") or 0) > 0:
+        if add_to_digest(
+            channel_id,
+            payload.get("scheduled_ms"),
+            {"kind": "event", "id": event_id, "title": title, "role_id": ev["role_id"]},
+        ):
+            return
+    if role_remind:
+        return _send_event_role_remind(events_table, ev, channel_id, title)
+
+    # join者一覧（大人数でも全ページ読む）
+    items = _query_all(
+        members_table,
         KeyConditionExpression=Key("guild_id").eq(guild_id)
         & Key("member_key").begins_with(f"{event_id}#USER#")
     )
-    items = resp.get("Items") or []
     user_ids = [it.get("user_id") for it in items if it.get("user_id")]
     if not user_ids:
-        print("REMIND_NO_MEMBERS")
+        log.info("REMIND_NO_MEMBERS", event_id=event_id)
         return
-    
-    mentions = " ".join([f"<@{uid}>" for uid in user_ids])
-    msg = {"content": f"🔔 明日です！ **{title}**\n{mentions}"}
-    discord_send_message_bot(channel_id, msg)
-    print("REMIND_SENT:", event_id, "count=", len(user_ids))
 
-def upsert_notice_remind_schedule(*, guild_id: str, notice_id: str, event_id: str, notice_channel_id: str, remind_at_dt: datetime):
-    name = _notice_remind_schedule_name(guild_id, notice_id)
+    # 既に送り始めた回（継続ジョブ・再実行）はまとめずに fan_out_reminder の進捗に任せる
+    run = f"event#{ev.get('event_remind_at') or ''}"
+    if (ev.get("remind_progress") or {}).get("run") != run and add_to_digest(
+        channel_id,
+        payload.get("scheduled_ms"),
+        {"kind": "event", "id": event_id, "title": title, "user_ids": sorted(set(user_ids))},
+    ):
+        return
+
+    def send_chunk(chunk):
+        mentions = " ".join([f"<@{uid}>" for uid in chunk])
+        discord_send_message_bot(channel_id, {"content": f"🔔 明日です！ **{title}**\n{mentions}"})
+
+    result = fan_out_reminder(
+        events_table,
+        {"guild_id": guild_id, "event_id": event_id},
+        ev,
+        run,
+        user_ids,
+        send_chunk,
+        {"job": "event_remind", "guild_id": guild_id, "event_id": event_id},
+    )
+    log.info(
+        "REMIND_SENT",
+        event_id=event_id,
+        count=result["sent"],
+        total=result["total_sent"],
+        done=result["done"],
+        scheduled_to_send_ms=tracing.since_origin_ms(),
+    )
+
+def _send_event_role_remind(events_table, ev: dict, channel_id: str, title: str):
+    """
+    参加者ロールへの1メンションで前日リマインドを送る（人数によらず1投稿）
+    """
+    guild_id = ev["guild_id"]
+    event_id = ev["event_id"]
+    role_id = ev["role_id"]
+    count = int(ev.get("member_count") or 0)
+    if count <= 0:
+        log.info("REMIND_NO_MEMBERS", event_id=event_id)
+        return
+
+    run = f"event#{ev.get('event_remind_at') or ''}"
+    progress = ev.get("remind_progress") or {}
+    if progress.get("run") == run and progress.get("done"):
+        log.info("REMIND_ALREADY_DELIVERED", run=run, sent=progress.get("sent"))
+        return
+
+    discord_send_message_bot(
+        channel_id,
+        {
+            "content": f"🔔 明日です！ **{title}**\n<@&{role_id}>",
+            "allowed_mentions": {"roles": [role_id]},
+        },
+    )
+    _save_remind_progress(
+        events_table,
+        {"guild_id": guild_id, "event_id": event_id},
+        {"run": run, "sent": count, "done": True},
+    )
+    log.info(
+        "REMIND_SENT",
+        event_id=event_id,
+        mention="role",
+        count=count,
+        total=count,
+        done=True,
+        scheduled_to_send_ms=tracing.since_origin_ms(),
+    )
+
+def upsert_notice_remind_schedule(
+    *,
+    guild_id: str,
+    notice_id: str,
+    event_id: str,
+    notice_channel_id: str,
+    remind_at_dt: datetime,
+    step: int = 0,
+    ):
+    name = _notice_remind_schedule_name(guild_id, notice_id, step)
 
     payload = {
         "kind": "notice_remind",
@@ -787,38 +1839,223 @@ def upsert_notice_remind_schedule(*, guild_id: str, notice_id: str, event_id: st
         "event_id": event_id,
         "notice_id": notice_id,
         "notice_channel_id": notice_channel_id,
+        "step": step,
     }
 
-    params = dict(
-        Name=name,
-        ScheduleExpression=_scheduler_at_expr(remind_at_dt),
-        ScheduleExpressionTimezone="Asia/Tokyo",
-        FlexibleTimeWindow={"Mode": "OFF"},
-        Target={
-            "Arn": os.environ["TARGET_LAMBDA_ARN"],
-            "RoleArn": os.environ["SCHEDULER_ROLE_ARN"],
-            "Input": json.dumps(payload, ensure_ascii=False),
-        },
+    return create_job_schedule(name, remind_at_dt, payload, upsert=True)
+
+def delete_notice_remind_schedule(guild_id: str, notice_id: str, schedule_name: str | None = None):
+    """
+    未発火のリマインドを消す。段階リマインドでは Notice の remind_schedule_name が現在の段の Schedule
+    """
+    delete_schedule_quietly(schedule_name or _notice_remind_schedule_name(guild_id, notice_id))
+
+def schedule_next_remind_step(notice: dict, step: int) -> str | None:
+    """
+    段階リマインドの次の段を予約し、Notice の remind_step / remind_schedule_name を進める
+    最後の段なら何もしない（None）
+    Schedule 名は段ごとに決まっているので、同じ段が再実行されても upsert で1つにまとまる
+    """
+    steps = [int(x) for x in (notice.get("remind_steps") or [0])]
+    nxt = step + 1
+    if nxt >= len(steps) or not notice.get("remind_at"):
+        return None
+
+    at_dt = datetime.fromisoformat(notice["remind_at"]) + timedelta(minutes=steps[nxt])
+    # 発火が遅れて次の段の時刻を過ぎていたら少し後に
+    at_dt = max(at_dt, datetime.now(JST) + timedelta(minutes=1))
+    name = upsert_notice_remind_schedule(
+        guild_id=notice["guild_id"],
+        notice_id=notice["notice_id"],
+        event_id=notice["event_id"],
+        notice_channel_id=notice["notice_channel_id"],
+        remind_at_dt=at_dt,
+        step=nxt,
     )
+    _, _, notices_table, _ = _get_tables()
+    notices_table.update_item(
+        Key={"guild_id": notice["guild_id"], "notice_id": notice["notice_id"]},
+        UpdateExpression="SET remind_step=:n, remind_schedule_name=:sn",
+        ExpressionAttributeValues={":n": nxt, ":sn": name},
+    )
+    log.info("NOTICE_REMIND_NEXT_STEP", notice_id=notice["notice_id"], step=nxt, at=at_dt.isoformat())
+    return name
 
-    try:
-        scheduler.create_schedule(**params)
-    except ClientError as e:
-        if e.response["Error"]["Code"] in ("ConflictException",):
-            scheduler.update_schedule(**params)
+def delete_event_remind_schedule(ev: dict):
+    name = ev.get("event_remind_schedule_name") or _event_remind_schedule_name(ev["guild_id"], ev["event_id"])
+    if delete_schedule_quietly(name):
+        log.info("SCHEDULE_DELETED", schedule_name=name, event_id=ev["event_id"])
+
+def _schedule_owner(name: str):
+    """
+    Schedule 名 → ("event"|"notice", guild_id, event_id|notice_id)
+    名前から分からない旧形式は Target の Input から読む
+    """
+    m = _SCHEDULE_NAME_RE.match(name)
+    if m:
+        prefix, guild_id, uid = m.groups()
+        if prefix == "evt":
+            return "event", guild_id, f"EVT#{uid}"
+        return "notice", guild_id, f"NTC#{uid}"
+
+    job = _get_schedule_input(name)
+    if not job:
+        return None
+    if job.get("kind") == "notice_remind" and job.get("guild_id") and job.get("notice_id"):
+        return "notice", job["guild_id"], job["notice_id"]
+    if job.get("job") == "event_remind" and job.get("guild_id") and job.get("event_id"):
+        return "event", job["guild_id"], job["event_id"]
+    return None
+
+def reconcile_schedules(dry_run: bool = False) -> dict:
+    """
+    list_schedules をページングし、対象のイベント/連絡が
+    存在しない or CLOSED になっている Schedule を削除する
+    （ActionAfterCompletion 導入前に作られたものや、削除漏れの掃除用）
+    """
+    checked = 0
+    deleted = 0
+
+    def pages(prefix, size=BATCH_GET_MAX_KEYS):
+        names = []
+        for name in _iter_schedule_names(prefix):
+            names.append(name)
+            if len(names) >= size:
+                yield names
+                names = []
+        if names:
+            yield names
+
+    for prefix in ("evt-", "ntc-"):
+        for names in pages(prefix):
+            owners = {}
+            for name in names:
+                owner = _schedule_owner(name)
+                if owner:
+                    owners[name] = owner
+
+            wants = {}
+            for name, (kind, guild_id, item_id) in owners.items():
+                if kind == "event":
+                    wants[name] = ("events", {"guild_id": guild_id, "event_id": item_id})
+                else:
+                    wants[name] = ("notices", {"guild_id": guild_id, "notice_id": item_id})
+            items = batch_get_items(wants, consistent=False) if wants else {}
+
+            for name in owners:
+                checked += 1
+                item = items.get(name)
+                if item and (item.get("status") or "OPEN") == "OPEN":
+                    continue
+                log.info("SCHEDULE_ORPHAN", schedule_name=name, reason="missing" if not item else "closed", dry_run=dry_run)
+                if not dry_run and delete_schedule_quietly(name):
+                    deleted += 1
+
+    result = {"ok": True, "checked": checked, "deleted": deleted, "dry_run": dry_run}
+    log.info("SCHEDULE_RECONCILE_DONE", **result)
+    return result
+
+# =========
+# DM reminders
+# =========
+# NOTICE_REMIND_DELIVERY=dm で未確認者へ個別 DM を送る（既定 channel = 連絡チャンネルでメンション）
+# DM を送るには先に DM チャンネルを作る API（POST /users/@me/channels）が1回要るので、
+# 取得した channel_id は DDB_DM_CHANNELS_TABLE（PK: user_id）とコンテナ内キャッシュに保存し、
+# 2回目以降は送信1回だけで済ませる
+_dm_channel_cache = {}
+
+def _remind_delivery() -> str:
+    return (os.environ.get("NOTICE_REMIND_DELIVERY") or "channel").lower()
+
+def _open_dm_channel(user_id: str) -> str:
+    data, _ = discord_bot_request("POST", "/users/@me/channels", {"recipient_id": user_id}, api="CREATE_DM")
+    return data["id"]
+
+def get_dm_channel_ids(user_ids: list[str]) -> dict:
+    """
+    user_id → DM channel_id（メモリ → テーブル → API の順に引く）
+    """
+    out = {}
+    misses = []
+    for uid in user_ids:
+        ch = _dm_channel_cache.get(uid)
+        if ch:
+            out[uid] = ch
         else:
-            raise
+            misses.append(uid)
 
-    return name
+    if misses:
+        found = batch_get_items(
+            {uid: ("dm_channels", {"user_id": uid}) for uid in misses},
+            consistent=False,
+        )
+        still = []
+        for uid in misses:
+            it = found.get(uid)
+            if it and it.get("channel_id"):
+                out[uid] = _dm_channel_cache[uid] = it["channel_id"]
+            else:
+                still.append(uid)
+
+        created = {}
+        for uid in still:
+            # 1人分の失敗（4xx / 5xx / タイムアウト / ブレーカー open）で残りの人を止めない
+            # 開けなかった人は戻り値に含めず、呼び出し側で送れなかった人として扱う
+            try:
+                created[uid] = _open_dm_channel(uid)
+            except (OSError, DiscordUnavailable) as e:
+                log.warn("DM_CHANNEL_CREATE_FAILED", user_id=uid, code=getattr(e, "code", None), error=repr(e))
+        if created:
+            table = ddb.Table(os.environ["DDB_DM_CHANNELS_TABLE"])
+            with table.batch_writer() as bw:
+                for uid, ch in created.items():
+                    bw.put_item(Item={"user_id": uid, "channel_id": ch, "updated_at": _now_iso()})
+            for uid, ch in created.items():
+                out[uid] = _dm_channel_cache[uid] = ch
+
+        log.info(
+            "DM_CHANNELS",
+            requested=len(user_ids),
+            memory_hits=len(user_ids) - len(misses),
+            table_hits=len(misses) - len(still),
+            created=len(created),
+        )
+    return out
 
-def delete_notice_remind_schedule(guild_id: str, notice_id: str):
-    name = _notice_remind_schedule_name(guild_id, notice_id)
-    try:
-        scheduler.delete_schedule(Name=name)
-    except ClientError as e:
-        if e.response["Error"]["Code"] in ("ResourceNotFoundException",):
-            return
-        raise
+def send_dm_reminders(user_ids: list[str], message: dict) -> list[str]:
+    """
+    各ユーザーへ DM を送る。送れなかった user_id（DM拒否など）を返す
+    """
+    channels = get_dm_channel_ids(user_ids)
+    failed = [uid for uid in user_ids if uid not in channels]
+    sent = 0
+    for uid, ch in channels.items():
+        try:
+            discord_send_message_bot(ch, message)
+            sent += 1
+        except HTTPError as e:
+            if e.code == 404:
+                # キャッシュしていたチャンネルが消えている → 作り直して1回だけ再送
+                _dm_channel_cache.pop(uid, None)
+                try:
+                    ch = _open_dm_channel(uid)
+                    ddb.Table(os.environ["DDB_DM_CHANNELS_TABLE"]).put_item(
+                        Item={"user_id": uid, "channel_id": ch, "updated_at": _now_iso()}
+                    )
+                    _dm_channel_cache[uid] = ch
+                    discord_send_message_bot(ch, message)
+                    sent += 1
+                    continue
+                except (OSError, DiscordUnavailable):
+                    pass
+            # 403 (50007: DM を受け取らない設定) など
+            failed.append(uid)
+        except (OSError, DiscordUnavailable) as e:
+            # タイムアウト / 接続失敗 / ブレーカー open も1人分の失敗として続ける
+            log.warn("DM_SEND_FAILED", user_id=uid, error=repr(e))
+            failed.append(uid)
+    log.info("DM_REMIND_SENT", sent=sent, failed=len(failed))
+    return failed
 
 def handle_notice_remind(event: dict):
     """
@@ -837,7 +2074,7 @@ def handle_notice_remind(event: dict):
     notice_channel_id = event.get("notice_channel_id")
 
     if not guild_id or not event_id or not notice_id or not notice_channel_id:
-        print("[notice_remind] missing fields:", event)
+        log.warn("NOTICE_REMIND_MISSING_FIELDS", payload=event)
         return {"ok": False, "reason": "missing fields"}
 
     # 念のため Notice が OPEN か確認（close 済みなら何もしない）
@@ -848,18 +2085,64 @@ def handle_notice_remind(event: dict):
     ).get("Item")
 
     if not notice_item:
-        print("[notice_remind] notice not found:", guild_id, notice_id)
+        log.warn("NOTICE_REMIND_NOT_FOUND", guild_id=guild_id, notice_id=notice_id)
         return {"ok": True, "reason": "notice not found"}
 
     if notice_item.get("status") != "OPEN":
-        print("[notice_remind] notice not OPEN -> skip:", notice_item.get("status"))
+        log.info("NOTICE_REMIND_SKIP", reason="not open", notice_id=notice_id, status=notice_item.get("status"))
         return {"ok": True, "reason": "notice not open"}
 
-    unacked = get_unacked_user_ids(guild_id, event_id, notice_id)
+    # 段階リマインド: 既に先の段へ進んでいれば（重複発火・再実行）何もしない
+    step = int(event.get("step") or 0)
+    if int(notice_item.get("remind_step") or 0) != step:
+        log.info("NOTICE_REMIND_SKIP", reason="stale step", notice_id=notice_id, step=step)
+        return {"ok": True, "reason": "stale step"}
+
+    # 全員確認済みなら以降の段も不要（次の Schedule は作らない）
+    unacked = get_unacked_user_ids(guild_id, event_id, notice_id, notice_item)
     if not unacked:
-        print("[notice_remind] no unacked -> skip")
+        log.info("NOTICE_REMIND_SKIP", reason="no unacked", notice_id=notice_id)
         return {"ok": True, "reason": "no unacked"}
 
+    # まとめ送信（同じチャンネル・同じ時間帯の他のリマインドと1投稿に）
+    # 既に送り始めた回（継続ジョブ・再実行）はまとめずに fan_out_reminder の進捗に任せる
+    run = f"step{step}#{notice_item.get('remind_at') or ''}"
+    if (
+        _remind_delivery() != "dm"
+        and (notice_item.get("remind_progress") or {}).get("run") != run
+        and add_to_digest(
+            notice_channel_id,
+            event.get("scheduled_ms"),
+            {
+                "kind": "notice",
+                "id": notice_id,
+                "title": notice_item.get("title") or "連絡",
+                "link": _discord_message_link(guild_id, notice_channel_id, notice_item.get("notice_message_id")),
+                "user_ids": sorted(set(unacked)),
+            },
+        )
+    ):
+        schedule_next_remind_step(notice_item, step)
+        return {"ok": True, "unacked_count": len(unacked), "digest": True}
+
+    # 未確認者はチャンクごとに送って進捗を Notice に記録（途中で落ちても続きから）
+    result = fan_out_reminder(
+        notices_table,
+        {"guild_id": guild_id, "notice_id": notice_id},
+        notice_item,
+        run,
+        unacked,
+        lambda chunk: _send_notice_remind(guild_id, notice_channel_id, notice_item, chunk),
+        dict(event),
+    )
+    # 次の段は全員に送り終えてから
+    if result["done"]:
+        schedule_next_remind_step(notice_item, step)
+    return {"ok": True, "unacked_count": len(unacked), **result}
+
+def _send_notice_remind(guild_id: str, notice_channel_id: str, notice_item: dict, unacked: list[str]) -> dict:
+    notice_id = notice_item["notice_id"]
+
     mentions = " ".join([f"<@{uid}>" for uid in unacked])
     # 連絡メッセージへのリンク生成
     notice_link = _discord_message_link(
@@ -881,38 +2164,1188 @@ def handle_notice_remind(event: dict):
         )
     }
 
+    if _remind_delivery() == "dm":
+        dm_msg = {
+            "content": (
+                f"📣 **連絡確認リマインド**\n\n"
+                f"**「{title}」** が未確認です。\n"
+                f"こちらから確認してください👇\n"
+                f"{notice_link}"
+            )
+        }
+        fallback = send_dm_reminders(unacked, dm_msg)
+        if not fallback:
+            return {"ok": True, "unacked_count": len(unacked), "delivery": "dm"}
+        # DM できなかった人だけチャンネルでメンション
+        mentions = " ".join([f"<@{uid}>" for uid in fallback])
+        msg["content"] = msg["content"].rsplit("未確認の方：\n", 1)[0] + f"未確認の方：\n{mentions}"
+
     sent = discord_send_message_bot(notice_channel_id, msg)
-    print("[notice_remind] sent:", sent.get("id"))
+    log.info(
+        "NOTICE_REMIND_SENT",
+        notice_id=notice_id,
+        message_id=sent.get("id"),
+        count=len(unacked),
+        scheduled_to_send_ms=tracing.since_origin_ms(),
+    )
 
     return {"ok": True, "unacked_count": len(unacked)}
 
 
+# =========
+# Event roles（参加者ロールで前日リマインドを1メンションにする）
+# =========
+# EVENT_REMIND_MENTION=role でイベントごとに Discord ロールを作り、join / leave で付け外しする
+# 前日リマインドは <@&role_id> 1つだけの投稿になる（既定 users = 従来どおり1人ずつ <@uid>）
+# - ロールは /event create のワーカーで作成し Event の role_id に保存（Bot に Manage Roles 権限が必要）
+# - join / leave とも Event に role_id があれば、付け外しは常に event_role_sync ジョブで行う
+#   （本人に見える変化ではないので interaction の応答を待たせない）
+#   ジョブは EventMembers を読み直して「いれば付ける / いなければ外す」ので、
+#   join → leave の順序が入れ替わって届いても最終状態に収束する
+# - ロールはアーカイブ時に削除する（復元したイベントは role_id を外し、1人ずつメンションに戻る）
+# - role_id の無いイベント（設定前や bulk_import で作ったもの）は従来どおり
+EVENT_ROLE_NAME_MAX = 100
+
+def _event_remind_mention() -> str:
+    return (os.environ.get("EVENT_REMIND_MENTION") or "users").lower()
+
+def create_event_role(guild_id: str, event_id: str, title: str) -> str | None:
+    """
+    イベントの参加者ロールを作って Event に role_id を保存する。失敗時は None
+    """
+    events_table, _, _, _ = _get_tables()
+    try:
+        data, _ = discord_bot_request(
+            "POST",
+            f"/guilds/{guild_id}/roles",
+            {"name": f"📅 {title}"[:EVENT_ROLE_NAME_MAX], "permissions": "0", "mentionable": True},
+            api="CREATE_ROLE",
+        )
+    except Exception as e:
+        log.exception("EVENT_ROLE_CREATE_ERROR", e, event_id=event_id)
+        return None
+    role_id = data.get("id")
+    events_table.update_item(
+        Key={"guild_id": guild_id, "event_id": event_id},
+        UpdateExpression="SET role_id = :r",
+        ExpressionAttributeValues={":r": role_id},
+    )
+    log.info("EVENT_ROLE_CREATED", event_id=event_id, role_id=role_id)
+    return role_id
+
+def sync_event_role_member(guild_id: str, event_id: str, user_id: str, role_id: str | None = None, timeout: float = 8):
+    """
+    EventMembers の状態に合わせてロールを付け外しする（いれば付ける / いなければ外す）
+    """
+    events_table, members_table, _, _ = _get_tables()
+    if role_id is None:
+        ev = events_table.get_item(Key={"guild_id": guild_id, "event_id": event_id}).get("Item") or {}
+        role_id = ev.get("role_id")
+        if not role_id:
+            return
+    member = members_table.get_item(
+        Key={"guild_id": guild_id, "member_key": f"{event_id}#USER#{user_id}"},
+        ConsistentRead=True,
+    ).get("Item")
+    method = "PUT" if member else "DELETE"
+    try:
+        discord_bot_request(
+            method, f"/guilds/{guild_id}/members/{user_id}/roles/{role_id}", api="MEMBER_ROLE", timeout=timeout
+        )
+    except HTTPError as e:
+        # サーバーを抜けたユーザー / 削除済みロールは付け外しする対象が無い
+        if e.code != 404:
+            raise
+        log.warn("EVENT_ROLE_TARGET_MISSING", event_id=event_id, role_id=role_id, method=method)
+
+def enqueue_event_role_sync(guild_id: str, event_id: str, user_id: str, context=None):
+    """
+    join / leave の書き込み後に event_role_sync を積む。積めなくても interaction の応答は返す
+    （参加/取消は確定済み。ロールは同じ人の次の join / leave の同期で揃う）
+    """
+    try:
+        enqueue_jobs([{"job": "event_role_sync", "guild_id": guild_id, "event_id": event_id, "user_id": user_id}], context)
+    except Exception as e:
+        log.exception("EVENT_ROLE_SYNC_ENQUEUE_ERROR", e, event_id=event_id, user_id=user_id)
+
+def delete_event_role(ev: dict):
+    role_id = ev.get("role_id")
+    if not role_id:
+        return
+    try:
+        discord_bot_request("DELETE", f"/guilds/{ev['guild_id']}/roles/{role_id}", api="DELETE_ROLE")
+    except HTTPError as e:
+        if e.code != 404:
+            raise
+    log.info("EVENT_ROLE_DELETED", event_id=ev.get("event_id"), role_id=role_id)
+
+
+# =========
+# Reminder digest（同じチャンネル・同じ時間帯のリマインドを1投稿にまとめる）
+# =========
+# REMIND_DIGEST_WINDOW_SEC（例: 60）と DDB_DIGEST_TABLE（PK: channel_id, SK: window_start(N), TTL: expires_at）
+# を両方指定したときだけ有効。
+# - リマインドの予定時刻（ジョブの scheduled_ms）を窓幅で切り捨てた window_start ごとに1アイテム
+#   各リマインドは「e_{kind}_{id}」属性として1件ずつ書き足す（条件: まだ flush されていない）
+# - 窓の最初の1件が digest_flush ジョブを window_start + 窓幅 + REMIND_DIGEST_GRACE_SEC に予約
+# - flush は flushed_at を条件付きで立ててから全件を読み、イベント/連絡ごとの節に分けて投稿する
+#   複数のリマインドの対象になっている人は最初の節でだけメンションする
+#   flushed_at を立てた後は中身が変わらないので、投稿を1件送るごとに posted を進め、
+#   途中で失敗した再実行は送っていない投稿から続ける（窓は開け直さない）。全部送ったら flush_done
+#   実行中は flushing_until（リース）を立てて、同じ窓の flush が並行して送らないようにする
+# - flush 済みの窓に遅れて届いたもの、対象人数が REMIND_DIGEST_MAX_USERS を超えるもの、
+#   DM 配信（NOTICE_REMIND_DELIVERY=dm）の連絡リマインドは、まとめずに従来どおり送る
+REMIND_DIGEST_GRACE_SEC_DEFAULT = 15
+REMIND_DIGEST_MAX_USERS_DEFAULT = 200
+REMIND_DIGEST_TTL_SEC = 86400
+REMIND_DIGEST_FLUSH_LEASE_SEC = 120
+DISCORD_MESSAGE_MAX_CHARS = 2000
+DIGEST_MENTIONS_PER_LINE = 50
+
+def _digest_window_sec() -> int:
+    if not os.environ.get("DDB_DIGEST_TABLE"):
+        return 0
+    return int(os.environ.get("REMIND_DIGEST_WINDOW_SEC") or 0)
+
+def _get_digest_table():
+    return ddb.Table(os.environ["DDB_DIGEST_TABLE"])
+
+def _digest_schedule_name(channel_id: str, window_start: int) -> str:
+    return f"dgst-{channel_id}-{window_start}"
+
+def add_to_digest(channel_id: str, due_ms: int | None, entry: dict) -> bool:
+    """
+    entry（kind / id / title / user_ids or role_id ...）を channel_id の窓に追加する
+    まとめ送信に回したら True。False なら呼び出し側がそのまま送る
+    """
+    window = _digest_window_sec()
+    if window <= 0:
+        return False
+    max_users = int(os.environ.get("REMIND_DIGEST_MAX_USERS") or REMIND_DIGEST_MAX_USERS_DEFAULT)
+    if len(entry.get("user_ids") or []) > max_users:
+        return False
+
+    due_sec = int(due_ms) // 1000 if due_ms else int(time.time())
+    window_start = due_sec // window * window
+    grace = int(os.environ.get("REMIND_DIGEST_GRACE_SEC") or REMIND_DIGEST_GRACE_SEC_DEFAULT)
+    flush_at = window_start + window + grace
+
+    try:
+        resp = _get_digest_table().update_item(
+            Key={"channel_id": channel_id, "window_start": window_start},
+            UpdateExpression="SET #e = :e, flush_at = if_not_exists(flush_at, :f), expires_at = :x",
+            ConditionExpression="attribute_not_exists(flushed_at)",
+            ExpressionAttributeNames={"#e": f"e_{entry['kind']}_{_id_suffix(entry['id'])}"},
+            ExpressionAttributeValues={
+                ":e": entry,
+                ":f": flush_at,
+                ":x": flush_at + REMIND_DIGEST_TTL_SEC,
+            },
+            ReturnValues="UPDATED_OLD",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            log.info("DIGEST_WINDOW_CLOSED", channel_id=channel_id, window_start=window_start, kind=entry["kind"])
+            return False
+        raise
+
+    first = "flush_at" not in (resp.get("Attributes") or {})
+    log.info("DIGEST_QUEUED", channel_id=channel_id, window_start=window_start, kind=entry["kind"], id=entry["id"], first=first)
+    if first:
+        name = _digest_schedule_name(channel_id, window_start)
+        job_input = {"job": "digest_flush", "channel_id": channel_id, "window_start": window_start}
+        try:
+            create_job_schedule(name, datetime.fromtimestamp(flush_at, timezone.utc), job_input, upsert=True)
+        except Exception as e:
+            # 予約できなければ今ある分をすぐ送る（以降の分は flush 済みとしてそのまま送られる）
+            log.exception("DIGEST_SCHEDULE_ERROR", e, schedule_name=name)
+            flush_digest(channel_id, window_start)
+    return True
+
+def _digest_sections(entries: list[dict]) -> tuple[list[str], list[str], int]:
+    """
+    節ごとの行・メンションするロール・メンションした人数を返す
+    同じ人は最初に出てくる節でだけメンションし、以降の節は「ほか上記の N 人」にする
+    """
+    lines = []
+    role_ids = []
+    mentioned = set()
+    for e in entries:
+        lines.append("")
+        if e["kind"] == "event":
+            lines.append(f"🔔 明日です！ **{e.get('title') or '(no title)'}**")
+        else:
+            lines.append(f"📣 **「{e.get('title') or '連絡'}」** が未確認です 👉 {e.get('link') or ''}")
+        if e.get("role_id"):
+            role_ids.append(e["role_id"])
+            lines.append(f"<@&{e['role_id']}>")
+            continue
+        targets = sorted(set(e.get("user_ids") or []))
+        fresh = [uid for uid in targets if uid not in mentioned]
+        mentioned.update(fresh)
+        for i in range(0, len(fresh), DIGEST_MENTIONS_PER_LINE):
+            lines.append(" ".join(f"<@{uid}>" for uid in fresh[i:i + DIGEST_MENTIONS_PER_LINE]))
+        if len(fresh) < len(targets):
+            lines.append(f"（ほか上記の {len(targets) - len(fresh)} 人）")
+    return lines, role_ids, len(mentioned)
+
+def _pack_lines(lines: list[str], limit: int = DISCORD_MESSAGE_MAX_CHARS) -> list[str]:
+    posts = []
+    buf = ""
+    for line in lines:
+        if buf and len(buf) + 1 + len(line) > limit:
+            posts.append(buf)
+            buf = line
+        else:
+            buf = f"{buf}\n{line}" if buf else line
+    if buf.strip():
+        posts.append(buf)
+    return posts
+
+def flush_digest(channel_id: str, window_start: int) -> dict:
+    """
+    窓を締めて（flushed_at）まとめて投稿する。送信に失敗したら例外（再実行は posted の続きから送る）
+    """
+    table = _get_digest_table()
+    key = {"channel_id": channel_id, "window_start": int(window_start)}
+    now = int(time.time())
+    try:
+        item = table.update_item(
+            Key=key,
+            UpdateExpression="SET flushed_at = if_not_exists(flushed_at, :t), flushing_until = :l",
+            ConditionExpression=(
+                "attribute_exists(flush_at) AND attribute_not_exists(flush_done) "
+                "AND (attribute_not_exists(flushing_until) OR flushing_until < :now)"
+            ),
+            ExpressionAttributeValues={":t": _now_iso(), ":l": now + REMIND_DIGEST_FLUSH_LEASE_SEC, ":now": now},
+            ReturnValues="ALL_NEW",
+        ).get("Attributes") or {}
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            log.info("DIGEST_ALREADY_FLUSHED", channel_id=channel_id, window_start=window_start)
+            return {"ok": True, "reason": "already flushed"}
+        raise
+
+    # 節の順: イベント → 連絡、それぞれタイトル順
+    entries = sorted(
+        (v for k, v in item.items() if k.startswith("e_")),
+        key=lambda e: (e["kind"] != "event", e.get("title") or "", e["id"]),
+    )
+    if not entries:
+        table.update_item(Key=key, UpdateExpression="SET flush_done = :t REMOVE flushing_until", ExpressionAttributeValues={":t": True})
+        return {"ok": True, "entries": 0}
+
+    lines, role_ids, mentioned = _digest_sections(entries)
+    header = f"🔔 **リマインド**（{len(entries)}件）" if len(entries) > 1 else ""
+    posts = _pack_lines(([header] if header else []) + lines)
+    allowed = {"parse": ["users"]}
+    if role_ids:
+        allowed["roles"] = role_ids
+    posted = int(item.get("posted") or 0)
+    if posted:
+        log.info("DIGEST_FLUSH_RESUME", channel_id=channel_id, window_start=window_start, posted=posted, posts=len(posts))
+    try:
+        for i in range(posted, len(posts)):
+            discord_send_message_bot(channel_id, {"content": posts[i].strip("\n"), "allowed_mentions": allowed})
+            table.update_item(Key=key, UpdateExpression="SET posted = :n", ExpressionAttributeValues={":n": i + 1})
+    except Exception:
+        # 送った分は posted に残したまま、リースだけ外して再実行に任せる
+        table.update_item(Key=key, UpdateExpression="REMOVE flushing_until")
+        raise
+    table.update_item(Key=key, UpdateExpression="SET flush_done = :t REMOVE flushing_until", ExpressionAttributeValues={":t": True})
+
+    log.info(
+        "DIGEST_FLUSHED",
+        channel_id=channel_id,
+        window_start=window_start,
+        entries=len(entries),
+        posts=len(posts),
+        users=sum(len(e.get("user_ids") or []) for e in entries),
+        mentioned=mentioned,
+        scheduled_to_send_ms=tracing.since_origin_ms(),
+    )
+    return {"ok": True, "entries": len(entries), "posts": len(posts)}
+
+
+# =========
+# Stats（ギルド/ユーザー単位の参加・確認の集計カウンタ）
+# =========
+# DDB_STATS_TABLE（PK: guild_id, SK: stat_key）を指定したときだけ有効
+#   stat_key = "GUILD"          : ギルド全体
+#   stat_key = "USER#{user_id}" : ユーザーごと
+# カウンタ（すべて ADD で増分更新）:
+#   joins / leaves          : 参加 / 取消の延べ回数
+#   acks                    : 確認ボタンの延べ回数
+#   notices_closed          : close された連絡数（GUILD のみ）
+#   expected_acks           : close 時点の参加者数の合計（USER は close された連絡のうち参加していた数）
+#   closed_acks             : そのうち close までに確認した数 → 確認率 = closed_acks / expected_acks
+# GUILD の never_acked（SS）: expected_acks > 0 かつ closed_acks = 0 のユーザー（/event stats が GetItem だけで読めるように
+#   連絡 close の集計で USER を更新するたびに ADD / DELETE する）
+STATS_NEVER_ACK_MAX = 20
+
+def _get_stats_table():
+    name = os.environ.get("DDB_STATS_TABLE")
+    return ddb.Table(name) if name else None
+
+def _add_counters(table, guild_id: str, stat_key: str, deltas: dict) -> dict:
+    """ADD で増分更新し、更新後のカウンタを返す"""
+    names = {f"#c{i}": k for i, k in enumerate(deltas)}
+    values = {f":c{i}": v for i, v in enumerate(deltas.values())}
+    return table.update_item(
+        Key={"guild_id": guild_id, "stat_key": stat_key},
+        UpdateExpression="ADD " + ", ".join(f"#c{i} :c{i}" for i in range(len(deltas))),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnValues="UPDATED_NEW",
+    ).get("Attributes") or {}
+
+def bump_stats(guild_id: str, user_id: str | None = None, **deltas):
+    """
+    GUILD（と user_id があれば USER#）のカウンタを増減する
+    集計は補助情報なので、失敗してもボタン操作自体は失敗させない
+    """
+    table = _get_stats_table()
+    if table is None or not guild_id:
+        return
+    try:
+        _add_counters(table, guild_id, "GUILD", deltas)
+        if user_id:
+            _add_counters(table, guild_id, f"USER#{user_id}", deltas)
+    except Exception as e:
+        log.exception("STATS_UPDATE_ERROR", e, guild_id=guild_id, counters=",".join(deltas))
+
+def _save_stats_progress(notice_key: dict, progress: dict):
+    _, _, notices_table, _ = _get_tables()
+    notices_table.update_item(
+        Key=notice_key,
+        UpdateExpression="SET stats_progress = :p",
+        ExpressionAttributeValues={":p": progress},
+    )
+
+def record_notice_close_stats(guild_id: str, notice_id: str) -> dict:
+    """
+    連絡 close 時の確認率の集計（参加者ごとに1回ずつ更新するのでワーカーで実行）
+    進捗を Notice の stats_progress（GUILD 済みか / 最後に数えた user_id）に1件ごとに記録し、
+    途中で落ちた再実行はその続きから数える。全員終わったら stats_counted を立てる
+    （進捗の記録前に落ちた場合だけ、その1件が二重に数えられうる）
+    """
+    table = _get_stats_table()
+    if table is None:
+        return {"ok": True, "skipped": "no_stats_table"}
+    notice = get_notice_item(guild_id, notice_id)
+    if not notice:
+        return {"ok": True, "skipped": "not_found"}
+    if notice.get("stats_counted"):
+        return {"ok": True, "skipped": "already_counted"}
+
+    notice_key = {"guild_id": guild_id, "notice_id": notice_id}
+    members = get_event_member_ids(guild_id, notice.get("event_id"))
+    acked = get_acked_user_ids(guild_id, notice_id) & members
+    progress = dict(notice.get("stats_progress") or {})
+
+    if not progress.get("guild"):
+        _add_counters(table, guild_id, "GUILD", {
+            "notices_closed": 1,
+            "expected_acks": len(members),
+            "closed_acks": len(acked),
+        })
+        progress["guild"] = True
+        _save_stats_progress(notice_key, progress)
+
+    cursor = progress.get("cursor")
+    for uid in sorted(members):
+        if cursor and uid <= cursor:
+            continue
+        counters = _add_counters(table, guild_id, f"USER#{uid}", {
+            "expected_acks": 1,
+            "closed_acks": 1 if uid in acked else 0,
+        })
+        # 一度も確認していない人の集合（GUILD.never_acked）を USER の更新後の値で保つ
+        never = int(counters.get("closed_acks") or 0) == 0
+        table.update_item(
+            Key={"guild_id": guild_id, "stat_key": "GUILD"},
+            UpdateExpression=("ADD" if never else "DELETE") + " never_acked :u",
+            ExpressionAttributeValues={":u": {uid}},
+        )
+        progress["cursor"] = uid
+        _save_stats_progress(notice_key, progress)
+
+    notices_table = _get_tables()[2]
+    notices_table.update_item(
+        Key=notice_key,
+        UpdateExpression="SET stats_counted = :t",
+        ExpressionAttributeValues={":t": True},
+    )
+    log.info("STATS_NOTICE_CLOSED", notice_id=notice_id, members=len(members), acked=len(acked))
+    return {"ok": True, "members": len(members), "acked": len(acked)}
+
+def _ack_rate(item: dict) -> str:
+    expected = int(item.get("expected_acks") or 0)
+    if not expected:
+        return "-"
+    return f"{int(item.get('closed_acks') or 0) * 100 / expected:.0f}%（{int(item.get('closed_acks') or 0)}/{expected}）"
+
+def build_stats_ephemeral(guild_id: str, user_id: str) -> dict:
+    table = _get_stats_table()
+    if table is None:
+        return {"type": 4, "data": {"flags": 64, "content": "⚠️ 集計は無効です（DDB_STATS_TABLE 未設定）"}}
+
+    found = batch_get_items({
+        "guild": ("stats", {"guild_id": guild_id, "stat_key": "GUILD"}),
+        "me": ("stats", {"guild_id": guild_id, "stat_key": f"USER#{user_id}"}),
+    })
+    g = found.get("guild") or {}
+    me = found.get("me") or {}
+
+    # close 済みの連絡に一度も確認していない参加者（GUILD.never_acked。表示する分だけ USER を読む）
+    never_ids = sorted(g.get("never_acked") or [])
+    shown = batch_get_items(
+        {uid: ("stats", {"guild_id": guild_id, "stat_key": f"USER#{uid}"}) for uid in never_ids[:STATS_NEVER_ACK_MAX]}
+    ) if never_ids else {}
+    never = sorted(
+        (it for it in shown.values() if it),
+        key=lambda it: -int(it.get("expected_acks") or 0),
+    )
+
+    lines = [
+        "📊 **参加・確認の集計**",
+        "",
+        "**このサーバー**",
+        f"- 参加: {int(g.get('joins') or 0)}（取消 {int(g.get('leaves') or 0)}）",
+        f"- 確認: {int(g.get('acks') or 0)}",
+        f"- close した連絡: {int(g.get('notices_closed') or 0)}",
+        f"- 確認率: {_ack_rate(g)}",
+        "",
+        "**あなた**",
+        f"- 参加: {int(me.get('joins') or 0)}（取消 {int(me.get('leaves') or 0)}）",
+        f"- 確認率: {_ack_rate(me)}",
+    ]
+    if never_ids:
+        lines += ["", f"**未確認が続いているメンバー**（{len(never_ids)}人）"]
+        for it in never:
+            uid = it["stat_key"].split("#", 1)[1]
+            lines.append(f"- <@{uid}>（未確認 {int(it.get('expected_acks') or 0)} 件）")
+        if len(never_ids) > len(never):
+            lines.append(f"- …ほか {len(never_ids) - len(never)} 人")
+
+    return {
+        "type": 4,
+        "data": {
+            "flags": 64,
+            "content": "\n".join(lines),
+            "allowed_mentions": {"parse": []},
+        },
+    }
+
+# =========
+# Archive（古いイベント/連絡をホットテーブルから退避）
+# =========
+# 対象:
+#   - イベント: 締切済み（status = CLOSED）で event_start_at / closed_at がどちらも ARCHIVE_AFTER_DAYS より前
+#     （closed_at の無い以前の CLOSED イベントは event_start_at、それも無ければ created_at で判定）
+#     （日時はタイムゾーン無しを JST とみなし UTC に揃えて比べる）
+#     → Event + EventMembers + Notices + NoticeAcks をまとめて1ファイルへ
+#   - 連絡: イベントは現役だが、closed_at が ARCHIVE_AFTER_DAYS より前の CLOSED 連絡
+#     → Notice + NoticeAcks を1ファイルへ
+# 保存先: ARCHIVE_BUCKET（S3）or ARCHIVE_DIR（ローカル）に NDJSON.gz
+#   1行 = {"table": "events|members|notices|acks", "item": {...}}
+ARCHIVE_AFTER_DAYS_DEFAULT = 30
+_s3_client = None
+
+def _get_s3():
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client("s3")
+    return _s3_client
+
+def _id_suffix(prefixed_id: str) -> str:
+    # "EVT#<uuid>" / "NTC#<uuid>" → "<uuid>"
+    return prefixed_id.split("#", 1)[1] if "#" in prefixed_id else prefixed_id
+
+def _archive_key(guild_id: str, event_id: str, notice_id: str | None = None) -> str:
+    prefix = os.environ.get("ARCHIVE_PREFIX", "archive/")
+    base = f"{prefix}{guild_id}/{_id_suffix(event_id)}"
+    if notice_id:
+        return f"{base}/{_id_suffix(notice_id)}.ndjson.gz"
+    return f"{base}.ndjson.gz"
+
+def _archive_put(key: str, data: bytes):
+    local_dir = os.environ.get("ARCHIVE_DIR")
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return
+    _get_s3().put_object(
+        Bucket=os.environ["ARCHIVE_BUCKET"],
+        Key=key,
+        Body=data,
+        ContentType="application/x-ndjson",
+        ContentEncoding="gzip",
+    )
+
+def _archive_get(key: str) -> bytes | None:
+    local_dir = os.environ.get("ARCHIVE_DIR")
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    try:
+        return _get_s3().get_object(Bucket=os.environ["ARCHIVE_BUCKET"], Key=key)["Body"].read()
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+
+def _archive_list(prefix: str) -> list[str]:
+    local_dir = os.environ.get("ARCHIVE_DIR")
+    if local_dir:
+        root = os.path.join(local_dir, prefix)
+        if not os.path.isdir(root):
+            return []
+        return [prefix + name for name in sorted(os.listdir(root)) if name.endswith(".ndjson.gz")]
+    keys = []
+    paginator = _get_s3().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=os.environ["ARCHIVE_BUCKET"], Prefix=prefix):
+        keys.extend(obj["Key"] for obj in page.get("Contents") or [])
+    return keys
+
+def _archive_delete(key: str):
+    local_dir = os.environ.get("ARCHIVE_DIR")
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    _get_s3().delete_object(Bucket=os.environ["ARCHIVE_BUCKET"], Key=key)
+
+def _json_default(o):
+    # 小数は Decimal で返るので NDJSON 用に戻す
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    if isinstance(o, set):
+        return sorted(o)
+    raise TypeError(f"not JSON serializable: {type(o)}")
+
+def _encode_archive(records: list[tuple[str, dict]]) -> bytes:
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
+        for kind, item in records:
+            line = json.dumps({"table": kind, "item": item}, ensure_ascii=False, default=_json_default)
+            gz.write((line + "\n").encode("utf-8"))
+    return buf.getvalue()
+
+def _decode_archive(data: bytes) -> list[tuple[str, dict]]:
+    records = []
+    for line in gzip.decompress(data).decode("utf-8").splitlines():
+        if line.strip():
+            rec = json.loads(line, parse_float=Decimal)
+            records.append((rec["table"], rec["item"]))
+    return records
+
+def _tables_by_kind() -> dict:
+    events_table, members_table, notices_table, acks_table = _get_tables()
+    return {"events": events_table, "members": members_table, "notices": notices_table, "acks": acks_table}
+
+def _delete_records(records: list[tuple[str, dict]]):
+    tables = _tables_by_kind()
+    for kind in ("acks", "members", "notices", "events"):  # 子から消す
+        rows = [item for k, item in records if k == kind]
+        if not rows:
+            continue
+        with tables[kind].batch_writer() as bw:
+            for item in rows:
+                bw.delete_item(Key={k: item[k] for k in _TABLE_KEYS[kind]})
+
+def _put_records(records: list[tuple[str, dict]]):
+    tables = _tables_by_kind()
+    for kind in ("events", "notices", "members", "acks"):  # 親から戻す
+        rows = [item for k, item in records if k == kind]
+        if not rows:
+            continue
+        with tables[kind].batch_writer() as bw:
+            for item in rows:
+                bw.put_item(Item=item)
+
+def _collect_notice_graph(guild_id: str, notice: dict) -> list[tuple[str, dict]]:
+    _, _, _, acks_table = _get_tables()
+    acks = _query_all(
+        acks_table,
+        KeyConditionExpression=Key("guild_id").eq(guild_id)
+        & Key("ack_key").begins_with(f"{notice['notice_id']}#USER#"),
+    )
+    return [("notices", notice)] + [("acks", a) for a in acks]
+
+def _collect_event_graph(guild_id: str, ev: dict) -> list[tuple[str, dict]]:
+    _, members_table, notices_table, _ = _get_tables()
+    event_id = ev["event_id"]
+    records = [("events", ev)]
+
+    members = _query_all(
+        members_table,
+        KeyConditionExpression=Key("guild_id").eq(guild_id)
+        & Key("member_key").begins_with(f"{event_id}#USER#"),
+    )
+    records += [("members", m) for m in members]
+
+    notices = _query_all(
+        notices_table,
+        IndexName="gsi_event",
+        KeyConditionExpression=Key("guild_id").eq(guild_id)
+        & Key("event_sk").begins_with(f"{event_id}#"),
+    )
+    for n in notices:
+        records += _collect_notice_graph(guild_id, n)
+    return records
+
+def _archive_records(key: str, records: list[tuple[str, dict]]):
+    # 先にコールドストアへ書いてから消す（途中で落ちてもデータは残る）
+    _archive_put(key, _encode_archive(records))
+    for kind, item in records:
+        if kind == "notices" and item.get("remind_schedule_name"):
+            delete_notice_remind_schedule(item["guild_id"], item["notice_id"], item["remind_schedule_name"])
+        elif kind == "events":
+            if item.get("event_remind_schedule_name"):
+                delete_event_remind_schedule(item)
+            try:
+                delete_event_role(item)
+            except Exception as e:
+                log.exception("EVENT_ROLE_DELETE_ERROR", e, event_id=item.get("event_id"))
+    _delete_records(records)
+
+def _archive_cutoff_iso(days: int | None = None) -> str:
+    if days is None:
+        days = int(os.environ.get("ARCHIVE_AFTER_DAYS") or ARCHIVE_AFTER_DAYS_DEFAULT)
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+def _parse_iso_utc(iso: str) -> datetime | None:
+    """
+    ISO 文字列を aware UTC にする（タイムゾーン無しは JST として扱う）。読めなければ None
+    """
+    try:
+        dt = datetime.fromisoformat(iso)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=JST)
+    return dt.astimezone(timezone.utc)
+
+def _older_than(iso: str | None, cutoff_iso: str) -> bool:
+    dt = _parse_iso_utc(iso) if iso else None
+    cutoff = _parse_iso_utc(cutoff_iso)
+    if dt is None or cutoff is None:
+        return False
+    return dt < cutoff
+
+def _is_event_archivable(ev: dict, cutoff_iso: str) -> bool:
+    # 締切済み（CLOSED）のイベントだけ。OPEN のままのイベントは古くても残す
+    if (ev.get("status") or "OPEN") != "CLOSED":
+        return False
+    start_at = ev.get("event_start_at")
+    if start_at and not _older_than(start_at, cutoff_iso):
+        return False
+    # closed_at は締切時に記録するようになる前の CLOSED イベントには無いので、開催日時 / 作成日時で代用する
+    closed_at = ev.get("closed_at") or start_at or ev.get("created_at")
+    return _older_than(closed_at, cutoff_iso)
+
+def _scan_all(table, **kwargs):
+    while True:
+        resp = table.scan(**kwargs)
+        yield from resp.get("Items") or []
+        lek = resp.get("LastEvaluatedKey")
+        if not lek:
+            return
+        kwargs["ExclusiveStartKey"] = lek
+
+def archive_sweep(days: int | None = None, dry_run: bool = False, limit: int | None = None) -> dict:
+    """
+    保持期間を過ぎたイベント（と CLOSED 連絡）をコールドストアへ移す
+    定期実行（Scheduler の rate(1 day) 等）で {"job": "archive_sweep"} を投げる想定
+    """
+    events_table, _, notices_table, _ = _get_tables()
+    cutoff = _archive_cutoff_iso(days)
+    archived_events = 0
+    archived_notices = 0
+    archived_event_ids = set()
+
+    for ev in _scan_all(events_table):
+        if limit is not None and archived_events >= limit:
+            break
+        if not _is_event_archivable(ev, cutoff):
+            continue
+        guild_id = ev["guild_id"]
+        records = _collect_event_graph(guild_id, ev)
+        key = _archive_key(guild_id, ev["event_id"])
+        log.info("ARCHIVE_EVENT", key=key, items=len(records), dry_run=dry_run)
+        if not dry_run:
+            _archive_records(key, records)
+        archived_events += 1
+        archived_event_ids.add((guild_id, ev["event_id"]))
+
+    closed_notices = _scan_all(
+        notices_table,
+        FilterExpression=Attr("status").eq("CLOSED") & Attr("closed_at").lt(cutoff),
+    )
+    for n in closed_notices:
+        if limit is not None and archived_notices >= limit:
+            break
+        guild_id = n["guild_id"]
+        if (guild_id, n.get("event_id")) in archived_event_ids:
+            continue
+        records = _collect_notice_graph(guild_id, n)
+        key = _archive_key(guild_id, n.get("event_id") or "", n["notice_id"])
+        log.info("ARCHIVE_NOTICE", key=key, items=len(records), dry_run=dry_run)
+        if not dry_run:
+            _archive_records(key, records)
+        archived_notices += 1
+
+    result = {"ok": True, "cutoff": cutoff, "events": archived_events, "notices": archived_notices, "dry_run": dry_run}
+    log.info("ARCHIVE_SWEEP_DONE", **result)
+    return result
+
+def restore_archived_event(guild_id: str, event_id: str) -> dict:
+    """
+    アーカイブしたイベント（+ 個別にアーカイブした連絡）をホットテーブルに戻す
+    """
+    keys = []
+    event_key = _archive_key(guild_id, event_id)
+    if _archive_get(event_key) is not None:
+        keys.append(event_key)
+    keys += _archive_list(event_key[: -len(".ndjson.gz")] + "/")
+
+    restored = 0
+    for key in keys:
+        data = _archive_get(key)
+        if data is None:
+            continue
+        records = _decode_archive(data)
+        for kind, item in records:
+            # ロールはアーカイブ時に削除済み
+            if kind == "events":
+                item.pop("role_id", None)
+            # NDJSON では集合がリストになるので SS に戻す
+            elif kind == "notices" and isinstance(item.get("unacked_ids"), list):
+                if item["unacked_ids"]:
+                    item["unacked_ids"] = set(item["unacked_ids"])
+                else:
+                    item.pop("unacked_ids")
+        _put_records(records)
+        _archive_delete(key)
+        restored += len(records)
+        log.info("ARCHIVE_RESTORED", key=key, items=len(records))
+
+    return {"ok": bool(keys), "files": len(keys), "items": restored}
+
+
 # =========
 # Lambda entry
 # =========
 
-def lambda_handler(event, context):
-    kind = (event or {}).get("kind")
+def dispatch_job(job: dict):
+    """
+    バックグラウンドジョブ1件を実行する（失敗時は例外を投げる）
+    Lambda 非同期 invoke / Scheduler / SQS バッチのどれから来ても同じ形
+    job["trace"] があればその trace_id で実行する（Scheduler 発火なら予定時刻からの遅れも出す）
+    """
+    name = job.get("job") or job.get("kind")
+    with tracing.activate(tracing.from_job(job)):
+        if job.get("scheduled_ms"):
+            log.info("SCHEDULE_FIRED", job=name, lag_ms=int(time.time() * 1000) - int(job["scheduled_ms"]))
+        with tracing.span("job", job=name):
+            return _run_job(job)
+
+def _run_job(job: dict):
+    if job.get("kind") == "notice_remind":
+        return handle_notice_remind(job)
+
+    name = job.get("job")
+    payload = job.get("payload") or job
+    if name == "event_create_worker":
+        return handle_event_create_deferred(payload)
+    if name == "event_remind":
+        return handle_event_remind(payload)
+    if name == "archive_sweep":
+        return archive_sweep(
+            days=payload.get("days"),
+            dry_run=bool(payload.get("dry_run")),
+            limit=payload.get("limit"),
+        )
+    if name == "archive_restore":
+        return restore_archived_event(payload["guild_id"], payload["event_id"])
+    if name == "schedule_reconcile":
+        return reconcile_schedules(dry_run=bool(payload.get("dry_run")))
+    if name == "recruit_refresh":
+        return refresh_recruit_message(payload["guild_id"], payload["event_id"])
+    if name == "notice_refresh":
+        return refresh_notice_message(payload["guild_id"], payload["notice_id"])
+    if name == "stats_notice_closed":
+        return record_notice_close_stats(payload["guild_id"], payload["notice_id"])
+    if name == "event_role_sync":
+        return sync_event_role_member(payload["guild_id"], payload["event_id"], payload["user_id"])
+    if name == "digest_flush":
+        return flush_digest(payload["channel_id"], payload["window_start"])
+    if name == "interaction_followup":
+        return send_interaction_followup(payload["app_id"], payload["token"], payload["content"])
+    raise ValueError(f"unknown job: {name}")
+
+_WORKER_JOBS = (
+    "event_create_worker",
+    "event_remind",
+    "archive_sweep",
+    "archive_restore",
+    "schedule_reconcile",
+    "recruit_refresh",
+    "notice_refresh",
+    "stats_notice_closed",
+    "event_role_sync",
+    "digest_flush",
+    "interaction_followup",
+)
+
+# 失敗しても Notice / Event / 窓の進捗から続きを再開できるジョブ（再実行で二重送信しない）
+# notice_remind は Scheduler 発火のまま dispatch_job に通すので、もともと例外が外に出る
+_RESUMABLE_JOBS = (
+    "event_remind",
+    "stats_notice_closed",
+    "digest_flush",
+)
+
+def _is_job(event) -> bool:
+    return isinstance(event, dict) and (
+        event.get("kind") == "notice_remind"
+        or event.get("job") in _WORKER_JOBS
+    )
+
+# ギルド単位の公平性・同時実行数（1ギルドが全体の同時実行数や Discord のレート枠を食い潰さないように）
+#   GUILD_MAX_INFLIGHT         : ギルドごとの同時実行ジョブ数（既定1）
+#   GUILD_WEIGHTS              : DRR の重み "guild_id=2,guild_id=0.5"（既定 1）
+#   GUILD_MAX_QUEUED_PER_BATCH : 1バッチで処理するギルドあたりの上限。超過分は後回し
+#   GUILD_DEFER_DELAY_SEC      : 後回しにしたジョブを DelaySeconds 付きで送り直す遅延（既定5秒）
+#     送り直した元メッセージは成功扱いで削除する（受信回数が増えて DLQ に落ちないように）
+#     batchItemFailures は本当に失敗したジョブだけ
+# ※ SQS 消費（handle_sqs_batch）だけの仕組み。JOB_TRANSPORT=lambda / Scheduler から直接の invoke は通らない
+#   GUILD_QUOTA_TABLE          : 指定するとコンテナをまたいだ in-flight 上限をリース項目で守る
+#   JOB_BATCH_CONCURRENCY      : バッチ内の並列実行スレッド数（既定1）
+GUILD_SLOT_LEASE_SEC_DEFAULT = 900
+GUILD_DEFER_DELAY_SEC_DEFAULT = 5
+SQS_MAX_DELAY_SEC = 900
+
+def _job_guild_id(job: dict) -> str:
+    return str(job.get("guild_id") or (job.get("payload") or {}).get("guild_id") or "-")
+
+def _guild_weights() -> dict:
+    weights = {}
+    for part in (os.environ.get("GUILD_WEIGHTS") or "").split(","):
+        g, _, w = part.partition("=")
+        if g.strip() and w.strip():
+            try:
+                weights[g.strip()] = float(w)
+            except ValueError:
+                pass
+    return weights
+
+def _guild_max_inflight() -> int:
+    return int(os.environ.get("GUILD_MAX_INFLIGHT") or 1)
+
+def _acquire_guild_slot(guild_id: str):
+    """
+    GUILD_QUOTA_TABLE（PK: guild_id, SK: slot）のリース項目を1つ取る
+    取れたら slot 番号、上限に達していたら None（テーブル未設定なら常に -1 = 制限なし）
+    リースは期限付きなので、途中でコンテナが落ちても枠は戻る
+    """
+    table_name = os.environ.get("GUILD_QUOTA_TABLE")
+    if not table_name:
+        return -1
+    table = ddb.Table(table_name)
+    now = int(time.time())
+    lease = int(os.environ.get("GUILD_SLOT_LEASE_SEC") or GUILD_SLOT_LEASE_SEC_DEFAULT)
+    for slot in range(_guild_max_inflight()):
+        try:
+            table.put_item(
+                Item={"guild_id": guild_id, "slot": slot, "lease_until": now + lease},
+                ConditionExpression="attribute_not_exists(guild_id) OR lease_until < :now",
+                ExpressionAttributeValues={":now": now},
+            )
+            return slot
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+    return None
+
+def _release_guild_slot(guild_id: str, slot: int):
+    if slot is None or slot < 0:
+        return
+    ddb.Table(os.environ["GUILD_QUOTA_TABLE"]).delete_item(Key={"guild_id": guild_id, "slot": slot})
+
+def _requeue_deferred(records: list[dict]) -> list[dict]:
+    """
+    後回しにしたレコードを同じ本文で DelaySeconds 付きで送り直す
+    送り直せなかったレコードを返す（呼び出し側は batchItemFailures で返して再配信に任せる）
+    """
+    if not records:
+        return []
+    delay = int(os.environ.get("GUILD_DEFER_DELAY_SEC") or GUILD_DEFER_DELAY_SEC_DEFAULT)
+    delay = max(0, min(delay, SQS_MAX_DELAY_SEC))
+    queue_url = os.environ["JOB_QUEUE_URL"]
+    sqs = _get_sqs()
+    not_sent = []
+    for i in range(0, len(records), SQS_SEND_BATCH_MAX):
+        chunk = records[i:i + SQS_SEND_BATCH_MAX]
+        try:
+            resp = sqs.send_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": str(n), "MessageBody": rec.get("body") or "{}", "DelaySeconds": delay}
+                    for n, rec in enumerate(chunk)
+                ],
+            )
+        except Exception as e:
+            log.exception("GUILD_DEFER_REQUEUE_ERROR", e, count=len(chunk))
+            not_sent += chunk
+            continue
+        failed = resp.get("Failed") or []
+        if failed:
+            log.error("GUILD_DEFER_REQUEUE_FAILED", failed=failed, failed_count=len(failed))
+            not_sent += [chunk[int(f["Id"])] for f in failed]
+    return not_sent
+
+def handle_sqs_batch(event: dict):
+    """
+    SQS イベントソースからのバッチ消費
+    失敗したレコードだけ batchItemFailures で返す（ReportBatchItemFailures 前提）
+    → 成功分は削除され、失敗分だけ再配信 / 上限超過で DLQ へ
+
+    ジョブはギルドごとに分けて DRR で公平に取り出す。ギルドの上限を超えた分は
+    DelaySeconds 付きでキューへ送り直して元メッセージは成功扱いにする（受信回数を増やさない）
+    """
+    import threading
+
+    failures = []
+    records = event.get("Records") or []
+    log.info("SQS_BATCH_START", count=len(records))
+
+    dispatcher = FairDispatcher(max_inflight_per_guild=_guild_max_inflight(), weights=_guild_weights())
+    max_queued = int(os.environ.get("GUILD_MAX_QUEUED_PER_BATCH") or 0)
+    per_guild = {}
+    deferred = []
+
+    for rec in records:
+        try:
+            job = json.loads(rec.get("body") or "{}")
+        except ValueError as e:
+            log.exception("SQS_JOB_ERROR", e, message_id=rec.get("messageId"))
+            failures.append({"itemIdentifier": rec.get("messageId")})
+            continue
+        guild_id = _job_guild_id(job)
+        per_guild[guild_id] = per_guild.get(guild_id, 0) + 1
+        if max_queued and per_guild[guild_id] > max_queued:
+            deferred.append(rec)
+            continue
+        sent_ms = (rec.get("attributes") or {}).get("SentTimestamp")
+        dispatcher.submit(guild_id, (rec, job), enqueued_at=int(sent_ms) / 1000 if sent_ms else None)
+
+    # 並列実行時は failures / deferred を複数スレッドから更新する
+    results_lock = threading.Lock()
+    # request_id と DynamoDB の消費キャパシティの集計先はスレッドごとなので、ワーカースレッドにはこの呼び出しの分を引き継ぐ
+    request_id = log.request_id
+    capacity_totals = ddb_capacity.current()
+
+    def fail(rec):
+        with results_lock:
+            failures.append({"itemIdentifier": rec.get("messageId")})
+
+    def defer(rec):
+        with results_lock:
+            deferred.append(rec)
+
+    def run():
+        if log.request_id != request_id:
+            log.set_request_id(request_id)
+        ddb_capacity.attach(capacity_totals)
+        while True:
+            picked = dispatcher.next(block=True)
+            if picked is None:
+                return
+            guild_id, (rec, job) = picked
+            slot = None
+            try:
+                slot = _acquire_guild_slot(guild_id)
+                if slot is None:
+                    # 他コンテナで上限まで実行中 → 後回し
+                    defer(rec)
+                    continue
+                dispatch_job(job)
+            except Exception as e:
+                log.exception("SQS_JOB_ERROR", e, message_id=rec.get("messageId"), guild_id=guild_id)
+                fail(rec)
+            finally:
+                # リースの返却に失敗しても done は必ず呼ぶ（呼ばないと他スレッドが next で待ち続ける）。
+                # 返却できなかったリースは期限切れで解放されるので、ここではログだけ
+                try:
+                    _release_guild_slot(guild_id, slot)
+                except Exception as e:
+                    log.exception("GUILD_SLOT_RELEASE_ERROR", e, guild_id=guild_id)
+                finally:
+                    dispatcher.done(guild_id)
+
+    concurrency = max(1, int(os.environ.get("JOB_BATCH_CONCURRENCY") or 1))
+    if concurrency == 1:
+        run()
+    else:
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    for rec in _requeue_deferred(deferred):
+        failures.append({"itemIdentifier": rec.get("messageId")})
+
+    log.info("GUILD_QUEUE_STATS", guilds=dispatcher.stats())
+    log.info("SQS_BATCH_DONE", count=len(records), failed=len(failures), deferred=len(deferred))
+    return {"batchItemFailures": failures}
+
+# =========
+# Profiling（1回の呼び出しだけ cProfile + tracemalloc で計測）
+# =========
+# PROFILE_INVOCATIONS=1   : 全呼び出しを計測
+# PROFILE_SAMPLE_RATE=0.01: 1% の呼び出しを計測
+# PROFILE_TOP_N           : 出力する上位件数（既定 15）
+# 無効時のコストは環境変数1つの参照だけ（PROFILE_SAMPLE_RATE は初回に1回だけ数値にする）
+PROFILE_TOP_N_DEFAULT = 15
+
+_profile_sample_rate = None
+
+def _get_profile_sample_rate() -> float:
+    """PROFILE_SAMPLE_RATE をコンテナごとに1回だけ読む（数値でなければログを出して 0 = 計測しない）"""
+    global _profile_sample_rate
+    if _profile_sample_rate is None:
+        raw = os.environ.get("PROFILE_SAMPLE_RATE") or "0"
+        try:
+            _profile_sample_rate = float(raw)
+        except ValueError:
+            log.warn("PROFILE_SAMPLE_RATE_INVALID", value=raw)
+            _profile_sample_rate = 0.0
+    return _profile_sample_rate
+
+def _profile_this_invocation() -> bool:
+    if os.environ.get("PROFILE_INVOCATIONS") == "1":
+        return True
+    rate = _get_profile_sample_rate()
+    return rate > 0 and random.random() < rate
+
+def _invocation_tags(event) -> dict:
+    """
+    計測結果のタグ: interaction type / custom_id の prefix / コマンド名 / ジョブ名
+    """
+    event = event or {}
+    records = event.get("Records")
+    if records:
+        return {"source": "sqs", "records": len(records)}
+    if _is_job(event):
+        return {"source": "job", "job": event.get("job") or event.get("kind")}
+    try:
+        payload = json.loads(_parse_body(event) or "{}")
+    except ValueError:
+        return {"source": "interaction"}
+    data = payload.get("data") or {}
+    custom_id = data.get("custom_id") or ""
+    return {
+        "source": "interaction",
+        "itype": payload.get("type"),
+        "custom_id_prefix": custom_id.split(":", 1)[0] if custom_id else None,
+        "command": data.get("name"),
+    }
+
+def _profiled(fn, event, context):
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    top_n = int(os.environ.get("PROFILE_TOP_N") or PROFILE_TOP_N_DEFAULT)
+    started = time.perf_counter()
+    tracemalloc.start()
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        return fn(event, context)
+    finally:
+        prof.disable()
+        wall_ms = (time.perf_counter() - started) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        st = pstats.Stats(prof)
+        st.sort_stats("cumulative")
+        top_funcs = []
+        for func in st.fcn_list[:top_n]:
+            filename, lineno, name = func
+            cc, nc, tt, ct, _ = st.stats[func]
+            top_funcs.append(
+                f"{ct * 1000:.1f}ms cum {tt * 1000:.1f}ms self x{nc} "
+                f"{os.path.basename(filename)}:{lineno}({name})"
+            )
+        top_allocs = [
+            f"{stat.size / 1024:.1f}KiB x{stat.count} "
+            f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}"
+            for stat in snapshot.statistics("lineno")[:top_n]
+        ]
+        log.summary(
+            "PROFILE",
+            wall_ms=round(wall_ms, 1),
+            mem_peak_kib=round(peak / 1024, 1),
+            top_cumulative=top_funcs,
+            top_alloc=top_allocs,
+            **_invocation_tags(event),
+        )
 
-    if kind == "notice_remind":
-        return handle_notice_remind(event)
+# =========
+# DynamoDB 消費キャパシティ（1呼び出しごとの合計）
+# =========
+# dynamo.py の Table が全呼び出しで ConsumedCapacity を受け取り ddb_capacity に積む。
+# ここでは呼び出しの最後に1行だけ DDB_CAPACITY を出す（タグは PROFILE と同じ itype / custom_id_prefix / job）
+# 件数を絞るときは LOG_SAMPLE_RATES="DDB_CAPACITY=0.1"
+
+def _log_ddb_capacity(event):
+    totals = ddb_capacity.snapshot()
+    if not totals["calls"]:
+        return
+    log.info("DDB_CAPACITY", **totals, **_invocation_tags(event))
 
-    # ===== 非同期ワーカー =====
-    if isinstance(event, dict) and event.get("job") in ("event_create_worker", "event_remind"): 
-        print("WORKER_START")
-        payload = event.get("payload") or event
+def lambda_handler(event, context):
+    log.set_request_id(getattr(context, "aws_request_id", None))
+    ddb_capacity.reset()
+    try:
+        if _profile_this_invocation():
+            return _profiled(_handle_invocation, event, context)
+        return _handle_invocation(event, context)
+    finally:
+        _log_ddb_capacity(event)
+
+def _handle_invocation(event, context):
+    # ===== SQS バッチ（JOB_TRANSPORT=sqs） =====
+    records = (event or {}).get("Records")
+    if records and records[0].get("eventSource") == "aws:sqs":
+        return handle_sqs_batch(event)
+
+    # ===== 非同期ワーカー / Scheduler =====
+    if _is_job(event):
+        if event.get("kind") == "notice_remind":
+            return dispatch_job(event)
+        log.info("WORKER_START", job=event.get("job"))
         try:
-            job = event.get("job")
-            if job == "event_create_worker":
-                handle_event_create_deferred(payload)
-            elif job == "event_remind":
-                handle_event_remind(payload)
-            print("WORKER_DONE")
-            return {"ok": True}
+            result = dispatch_job(event)
+            log.info("WORKER_DONE", job=event.get("job"))
+            return result if isinstance(result, dict) else {"ok": True}
         except Exception as e:
-            import traceback
-            print("WORKER ERROR:", repr(e))
-            print(traceback.format_exc())
+            log.exception("WORKER_ERROR", e, job=event.get("job"))
+            # 進捗から再開できるジョブは投げ直して非同期 invoke のリトライ（SQS なら再配信）に任せる
+            if event.get("job") in _RESUMABLE_JOBS:
+                raise
             return {"ok": False}
 
     # ===== Discord Interaction =====
@@ -924,9 +3357,14 @@ def lambda_handler(event, context):
         return _resp({"error": err}, 401)
 
     payload = json.loads(raw_body) if raw_body else {}
+    # trace_id は interaction id（起点 = クリック時刻）。ワーカー / Scheduler のジョブへ引き継ぐ
+    with tracing.activate(tracing.from_interaction(payload)):
+        with tracing.span("interaction", itype=payload.get("type")):
+            return _handle_interaction(payload, context)
+
+def _handle_interaction(payload: dict, context):
     itype = payload.get("type")
-    print("ITYPE =", payload.get("type"))
-    print("CUSTOM_ID =", ((payload.get("data") or {}).get("custom_id")))
+    log.info("INTERACTION", itype=itype, custom_id=(payload.get("data") or {}).get("custom_id"))
 
     # ---- PING ----
     if itype == 1:
@@ -940,6 +3378,15 @@ def lambda_handler(event, context):
         if name == "ping":
             return _resp({"type": 4, "data": {"content": "pong"}}, 200)
 
+        if name == "event" and _subcommand_name(data) == "stats":
+            user_id = ((payload.get("member") or {}).get("user") or {}).get("id")
+            return _resp(build_stats_ephemeral(payload.get("guild_id"), user_id), 200)
+
+        if name == "event" and _subcommand_name(data) == "list":
+            # 1回の bounded query（gsi_status_start）で返せるので同期で応答する
+            items, prev_cursor, next_cursor = query_event_list_page(payload.get("guild_id"))
+            return _resp(build_event_list_ephemeral(payload.get("guild_id"), items, prev_cursor, next_cursor), 200)
+
         if name == "event":
             #ack = defer_ephemeral()
             try:
@@ -949,9 +3396,7 @@ def lambda_handler(event, context):
                     200
                 )
             except Exception as e:
-                import traceback
-                print("INVOKE_WORKER_ERROR:", repr(e))
-                print(traceback.format_exc())
+                log.exception("INVOKE_WORKER_ERROR", e)
                 return _resp(
                     {"type": 4, "data": {"flags": 64, "content": "{❌ 作成に失敗しました（ログ確認）"}},
                     200
@@ -986,7 +3431,7 @@ def lambda_handler(event, context):
             return _resp({"type": 4, "data": {"flags": 64, "content": "⛔ 作成できるのはイベント作成者だけです"}}, 200)
 
         # OPEN notice は1つだけ
-        open_notice = get_open_notice(guild_id, event_id)
+        open_notice = get_open_notice(guild_id, event_id, ev)
         if open_notice:
             return _resp({"type": 4, "data": {"flags": 64, "content": "⚠️ OPEN中の連絡があります。closeしてから作成してください。"}}, 200)
 
@@ -1000,6 +3445,7 @@ def lambda_handler(event, context):
         title = (values.get("title") or "").strip()
         body = (values.get("body") or "").strip()
         remind_at_str = (values.get("remind_at") or "").strip()
+        remind_steps_str = (values.get("remind_steps") or "").strip()
 
         if not title or not body:
             return _resp({"type": 4, "data": {"flags": 64, "content": "❌ タイトルと本文は必須です"}}, 200)
@@ -1014,6 +3460,20 @@ def lambda_handler(event, context):
                 }
             }, 200)
 
+        # 連絡ごとのリマインド段階（空欄なら NOTICE_REMIND_STEPS）
+        if remind_steps_str:
+            remind_steps = _parse_notice_remind_steps(remind_steps_str)
+            if remind_steps is None:
+                return _resp({
+                    "type": 4,
+                    "data": {
+                        "flags": 64,
+                        "content": f"❌ リマインド段階は remind_at からのオフセットをカンマ区切りで（最大 {NOTICE_REMIND_STEPS_MAX} 段）。例: 0,6h,24h"
+                    }
+                }, 200)
+        else:
+            remind_steps = _parse_remind_steps(os.environ.get("NOTICE_REMIND_STEPS"))
+
         notice_channel_id = ev.get("notice_channel_id")
         if not notice_channel_id:
             return _resp({"type": 4, "data": {"flags": 64, "content": "❌ notice_channel_id が未設定です"}}, 200)
@@ -1039,30 +3499,47 @@ def lambda_handler(event, context):
             "created_by_name": username,
             "created_at": created_at,
         }
+        # 未確認者集合は参加者全員から始める（空集合は保存できないので0人なら属性なし）
+        join_ids = get_event_member_ids(guild_id, event_id)
+        notice_item["unacked_tracked"] = True
+        if join_ids:
+            notice_item["unacked_ids"] = join_ids
 
         # (B) DDB 作成（まだmessage_id無し）
         notices_table.put_item(Item=notice_item)
+        # join / leave が OPEN 中の連絡を強い整合性で引けるように Event に記録し、
+        # その間に入れ違った join / leave を読み直して反映する
+        events_table.update_item(
+            Key={"guild_id": guild_id, "event_id": event_id},
+            UpdateExpression="SET open_notice_id = :n",
+            ExpressionAttributeValues={":n": notice_id},
+        )
+        join_ids = reconcile_notice_unacked(guild_id, event_id, notice_id, join_ids)
 
-        # (B2) remind_at があれば Scheduler 作成/更新
+        # (B2) remind_at があれば Scheduler 作成/更新（最初の段も remind_at + steps[0]）
         if remind_at_dt:
+            steps = remind_steps
+            first_at_dt = max(remind_at_dt + timedelta(minutes=steps[0]), datetime.now(JST) + timedelta(minutes=1))
             schedule_name = upsert_notice_remind_schedule(
                 guild_id=guild_id,
                 notice_id=notice_id,
                 event_id=event_id,
                 notice_channel_id=notice_channel_id,
-                remind_at_dt=remind_at_dt,
+                remind_at_dt=first_at_dt,
             )
             notices_table.update_item(
                 Key={"guild_id": guild_id, "notice_id": notice_id},
-                UpdateExpression="SET remind_schedule_name=:sn, remind_at=:ra",
+                UpdateExpression="SET remind_schedule_name=:sn, remind_at=:ra, remind_steps=:rs, remind_step=:st",
                 ExpressionAttributeValues={
                     ":sn": schedule_name,
                     ":ra": remind_at_dt.isoformat(),
+                    ":rs": steps,
+                    ":st": 0,
                 },
             )
 
         # (C) 参加者数 → メッセージ生成 → Discord投稿（1回だけ）
-        member_count = count_event_members(guild_id, event_id)
+        member_count = len(join_ids)
         msg = build_notice_message(guild_id, notice_item, ack_count=0, member_count=member_count)
         sent = discord_send_message_bot(notice_channel_id, msg)
         message_id = sent.get("id")
@@ -1109,7 +3586,7 @@ def lambda_handler(event, context):
                 return _resp({"type": 4, "data": {"flags": 64, "content": "⛔ 連絡を作れるのはイベント作成者だけです"}}, 200)
 
             # OPEN notice は1つだけ
-            open_notice = get_open_notice(guild_id, event_id)
+            open_notice = get_open_notice(guild_id, event_id, ev)
             if open_notice:
                 return _resp({"type": 4, "data": {"flags": 64, "content": "⚠️ OPEN中の連絡があります。closeしてから作成してください。"}}, 200)
 
@@ -1127,6 +3604,9 @@ def lambda_handler(event, context):
                         ]},
                         {"type": 1, "components": [
                             {"type": 4, "custom_id": "remind_at", "style": 1, "label": "リマインド時刻(JST)", "required": False, "max_length": 16, "placeholder": "例: 2026-01-18 21:00" }
+                        ]},
+                        {"type": 1, "components": [
+                            {"type": 4, "custom_id": "remind_steps", "style": 1, "label": "リマインド段階（空欄なら既定）", "required": False, "max_length": 60, "placeholder": "例: 0,6h,24h" }
                         ]}
                     ],
                 },
@@ -1137,19 +3617,44 @@ def lambda_handler(event, context):
         # ===== Notice: list (ephemeral) =====
         if k == "notice_list":
             event_id = v
-            items = query_notices_by_event(guild_id, event_id, include_hidden=True)
-            msg = build_notice_list_ephemeral(guild_id, event_id, items)
+            items, prev_cursor, next_cursor = query_notice_page(guild_id, event_id)
+            msg = build_notice_list_ephemeral(guild_id, event_id, items, prev_cursor, next_cursor)
             return _resp(msg, 200)
 
+        # ===== Notice: list page (ephemeral) =====
+        if k == "notice_page":
+            # custom_id = "notice_page:{event_id}:{n|p}{cursor}"
+            event_id, _, page = (v or "").partition(":")
+            direction, cursor = (page[:1] or "n"), (page[1:] or None)
+            items, prev_cursor, next_cursor = query_notice_page(guild_id, event_id, cursor, direction)
+            msg = build_notice_list_ephemeral(guild_id, event_id, items, prev_cursor, next_cursor)
+            # 一覧（ephemeral）上のボタンなので、新しい ephemeral を出さずに一覧をその場で書き換える
+            return _resp(update_message_response(msg), 200)
+
+        # ===== Event: list page (ephemeral) =====
+        if k == "event_list":
+            # custom_id = "event_list:{n|p}{cursor}"
+            direction, cursor = ((v or "")[:1] or "n"), ((v or "")[1:] or None)
+            items, prev_cursor, next_cursor = query_event_list_page(guild_id, cursor, direction)
+            return _resp(update_message_response(build_event_list_ephemeral(guild_id, items, prev_cursor, next_cursor)), 200)
+
         # ===== Notice: close/hide/show =====
         if k in ("notice_close", "notice_hide", "notice_show"):
-            notice_id = v
-            notice = get_notice_item(guild_id, notice_id)
+            # custom_id = "{k}:{notice_id}:{event_id}"（旧形式は event_id なし）
+            notice_id, _, event_id_hint = (v or "").partition(":")
+            wants = {"notice": ("notices", {"guild_id": guild_id, "notice_id": notice_id})}
+            if event_id_hint:
+                wants["event"] = ("events", {"guild_id": guild_id, "event_id": event_id_hint})
+            preload = batch_get_items(wants)
+
+            notice = preload["notice"]
             if not notice:
                 return _resp({"type": 4, "data": {"flags": 64, "content": "❌ 連絡が見つかりません"}}, 200)
 
             event_id = notice.get("event_id")
-            ev = events_table.get_item(Key={"guild_id": guild_id, "event_id": event_id}, ConsistentRead=True).get("Item")
+            ev = preload.get("event")
+            if not ev or ev.get("event_id") != event_id:
+                ev = events_table.get_item(Key={"guild_id": guild_id, "event_id": event_id}, ConsistentRead=True).get("Item")
             if not ev:
                 return _resp({"type": 4, "data": {"flags": 64, "content": "❌ イベントが見つかりません"}}, 200)
 
@@ -1165,13 +3670,35 @@ def lambda_handler(event, context):
                     ExpressionAttributeNames={"#st": "status"},
                     ExpressionAttributeValues={":c": "CLOSED", ":t": _now_iso()},
                 )
-                delete_notice_remind_schedule(guild_id, notice_id)
+                delete_notice_remind_schedule(guild_id, notice_id, notice.get("remind_schedule_name"))
                 notice["status"] = "CLOSED"
-                # NoticeメッセージからAckボタンを消す（再描画）
+                try:
+                    events_table.update_item(
+                        Key={"guild_id": guild_id, "event_id": event_id},
+                        UpdateExpression="REMOVE open_notice_id",
+                        ConditionExpression="open_notice_id = :n",
+                        ExpressionAttributeValues={":n": notice_id},
+                    )
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+                # 確認率の集計は参加者ごとの更新になるのでワーカーへ
+                if _get_stats_table() is not None:
+                    try:
+                        enqueue_jobs([{"job": "stats_notice_closed", "guild_id": guild_id, "notice_id": notice_id}], context)
+                    except Exception as e:
+                        log.exception("STATS_ENQUEUE_ERROR", e, notice_id=notice_id)
+                # NoticeメッセージからAckボタンを消す（再描画。Discord 不調ならワーカーへ）
                 ack_count = count_notice_acks(guild_id, notice_id)
                 member_count = count_event_members(guild_id, event_id)
                 new_msg = build_notice_message(guild_id, notice, ack_count, member_count)
-                discord_edit_message_bot(notice["notice_channel_id"], notice["notice_message_id"], new_msg)
+                rerender_or_defer(
+                    {"job": "notice_refresh", "guild_id": guild_id, "notice_id": notice_id},
+                    lambda t: discord_edit_message_bot(
+                        notice["notice_channel_id"], notice["notice_message_id"], new_msg, timeout=t
+                    ),
+                    context,
+                )
 
             elif k == "notice_hide":
                 notices_table.update_item(
@@ -1179,6 +3706,7 @@ def lambda_handler(event, context):
                     UpdateExpression="SET is_hidden=:t",
                     ExpressionAttributeValues={":t": True},
                 )
+                notice["is_hidden"] = True
 
             elif k == "notice_show":
                 notices_table.update_item(
@@ -1186,16 +3714,25 @@ def lambda_handler(event, context):
                     UpdateExpression="SET is_hidden=:f",
                     ExpressionAttributeValues={":f": False},
                 )
+                notice["is_hidden"] = False
 
-            # 操作後は一覧を返す
-            items = query_notices_by_event(guild_id, event_id, include_hidden=True)
-            msg = build_notice_list_ephemeral(guild_id, event_id, items)
-            return _resp(msg, 200)
+            # 操作後は一覧（先頭ページ）を返す
+            items, prev_cursor, next_cursor = query_notice_page(guild_id, event_id)
+            # GSI は結果整合なので、いま更新した連絡は手元の値で差し替える
+            items = [notice if it.get("notice_id") == notice_id else it for it in items]
+            msg = build_notice_list_ephemeral(guild_id, event_id, items, prev_cursor, next_cursor)
+            return _resp(update_message_response(msg), 200)
 
         # ===== Notice: ack =====
         if k == "notice_ack":
-            notice_id = v
-            notice = get_notice_item(guild_id, notice_id)
+            # custom_id = "notice_ack:{notice_id}:{event_id}"（旧形式は event_id なし）
+            notice_id, _, event_id_hint = (v or "").partition(":")
+            wants = {"notice": ("notices", {"guild_id": guild_id, "notice_id": notice_id})}
+            if event_id_hint:
+                wants["member"] = ("members", {"guild_id": guild_id, "member_key": f"{event_id_hint}#USER#{user_id}"})
+            preload = batch_get_items(wants)
+
+            notice = preload["notice"]
             if not notice:
                 return _resp({"type": 4, "data": {"flags": 64, "content": "❌ 連絡が見つかりません"}}, 200)
 
@@ -1204,7 +3741,11 @@ def lambda_handler(event, context):
                 return _resp({"type": 4, "data": {"flags": 64, "content": "🔒 この連絡は確認受付が終了しています"}}, 200)
 
             # 参加者限定
-            if not has_event_member(guild_id, event_id, user_id):
+            if event_id_hint == event_id:
+                is_member = preload.get("member") is not None
+            else:
+                is_member = has_event_member(guild_id, event_id, user_id)
+            if not is_member:
                 return _resp({"type": 4, "data": {"flags": 64, "content": "⛔ 確認できるのは参加者のみです"}}, 200)
 
             # 二重Ack防止（AcksテーブルのSK名は member_key に揃える想定）
@@ -1225,18 +3766,44 @@ def lambda_handler(event, context):
                 if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
                     return _resp({"type": 4, "data": {"flags": 64, "content": "⚠️ すでに確認済みです"}}, 200)
                 raise
+            bump_stats(guild_id, user_id, acks=1)
+            remaining = mark_notice_acked(guild_id, notice_id, user_id)
 
-            ack_count = count_notice_acks(guild_id, notice_id)
+            # 直前の ack を数えに含める（type 7 の応答では後から描き直さない）
+            ack_count = count_notice_acks(guild_id, notice_id, consistent=True)
             member_count = count_event_members(guild_id, event_id)
+
+            # 全員確認済みになったら未発火のリマインド（段階リマインドの残り）を消す
+            if notice.get("remind_schedule_name"):
+                try:
+                    if remaining is not None:
+                        all_acked = not remaining
+                    else:
+                        all_acked = ack_count >= member_count and not get_unacked_user_ids(
+                            guild_id, event_id, notice_id, notice
+                        )
+                    if all_acked:
+                        delete_notice_remind_schedule(guild_id, notice_id, notice["remind_schedule_name"])
+                except Exception as e:
+                    log.exception("SCHEDULE_DELETE_ERROR", e, notice_id=notice_id)
+
             new_msg = build_notice_message(guild_id, notice, ack_count, member_count)
             channel_id = notice.get("notice_channel_id") or notice.get("channel_id")
             message_id = notice.get("notice_message_id") or notice.get("message_id")
 
+            # 連絡メッセージ上のボタンなら、そのメッセージを応答で書き換える（PATCH 不要）
+            if _is_clicked_message(payload, message_id):
+                return _resp(update_message_with_followup(payload, new_msg, "✅ 確認しました！", context), 200)
+
             if not channel_id or not message_id:
-                print("NOTICE_KEYS:", list((notice or {}).keys()))
+                log.warn("NOTICE_KEYS_MISSING", notice_id=notice_id, keys=",".join((notice or {}).keys()))
                 return _resp({"type": 4, "data": {"flags": 64, "content": "❌ 投稿先/メッセージIDが見つかりません（ログ確認）"}}, 200)
 
-            discord_edit_message_bot(channel_id, message_id, new_msg)
+            rerender_or_defer(
+                {"job": "notice_refresh", "guild_id": guild_id, "notice_id": notice_id},
+                lambda t: discord_edit_message_bot(channel_id, message_id, new_msg, timeout=t),
+                context,
+            )
 
             return _resp({"type": 4, "data": {"flags": 64, "content": "✅ 確認しました！"}}, 200)
 
@@ -1267,14 +3834,25 @@ def lambda_handler(event, context):
                 if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
                     return _resp({"type": 4, "data": {"flags": 64, "content": "⚠️ すでに参加しています！"}}, 200)
                 raise
+            bump_member_count(guild_id, event_id, 1)
+            bump_stats(guild_id, user_id, joins=1)
+            track_open_notice_member(guild_id, event_id, user_id, joined=True)
+
+            if ev.get("role_id"):
+                enqueue_event_role_sync(guild_id, event_id, user_id, context)
+
+            # 募集メッセージ上のボタンなら、そのメッセージを応答で書き換える（PATCH 不要）
+            if _is_clicked_message(payload, ev.get("recruit_message_id")):
+                return _resp(update_message_with_followup(
+                    payload, render_recruit_message(guild_id, event_id, ev), "✅ 参加を受け付けました！", context
+                ), 200)
 
             # 募集メッセージ更新
-            try:
-                refresh_recruit_message(guild_id, event_id)
-            except Exception as e:
-                import traceback
-                print("RECRUIT_REFRESH_ERROR(join):", repr(e))
-                print(traceback.format_exc())
+            rerender_or_defer(
+                {"job": "recruit_refresh", "guild_id": guild_id, "event_id": event_id},
+                lambda t: refresh_recruit_message(guild_id, event_id, timeout=t),
+                context,
+            )
 
             return _resp({"type": 4, "data": {"flags": 64, "content": "✅ 参加を受け付けました！"}}, 200)
 
@@ -1283,20 +3861,39 @@ def lambda_handler(event, context):
             event_id = custom_id.split(":", 1)[1]
 
             # 参加取り消し：該当アイテム削除（存在しなくてもOK）
-            members_table.delete_item(
+            removed = members_table.delete_item(
                 Key={
                     "guild_id": guild_id,
                     "member_key": f"{event_id}#USER#{user_id}",
-                }
-            )
+                },
+                ReturnValues="ALL_OLD",
+            ).get("Attributes")
+            if removed:
+                bump_member_count(guild_id, event_id, -1)
+                bump_stats(guild_id, user_id, leaves=1)
+                track_open_notice_member(guild_id, event_id, user_id, joined=False)
+
+            ev = None
+            if removed or (payload.get("message") or {}).get("id"):
+                ev = events_table.get_item(
+                    Key={"guild_id": guild_id, "event_id": event_id}, ConsistentRead=True
+                ).get("Item")
+
+            if removed and ev and ev.get("role_id"):
+                enqueue_event_role_sync(guild_id, event_id, user_id, context)
+
+            # 募集メッセージ上のボタンなら、そのメッセージを応答で書き換える（PATCH 不要）
+            if ev and _is_clicked_message(payload, ev.get("recruit_message_id")):
+                return _resp(update_message_with_followup(
+                    payload, render_recruit_message(guild_id, event_id, ev), "✅ 参加を取り消しました！", context
+                ), 200)
 
             # 募集メッセージ更新(取消)
-            try:
-                refresh_recruit_message(guild_id, event_id)
-            except Exception as e:
-                import traceback
-                print("RECRUIT_REFRESH_ERROR(leave):", repr(e))
-                print(traceback.format_exc())
+            rerender_or_defer(
+                {"job": "recruit_refresh", "guild_id": guild_id, "event_id": event_id},
+                lambda t: refresh_recruit_message(guild_id, event_id, timeout=t),
+                context,
+            )
 
             return _resp({"type": 4, "data": {"flags": 64, "content": "✅ 参加を取り消しました！"}}, 200)
         
@@ -1326,18 +3923,34 @@ def lambda_handler(event, context):
             # 締切
             events_table.update_item(
                 Key={"guild_id": guild_id, "event_id": event_id},
-                UpdateExpression="SET #status = :closed",
+                UpdateExpression="SET #status = :closed, closed_at = :t, status_start = :ss",
                 ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={":closed": "CLOSED"},
+                ExpressionAttributeValues={
+                    ":closed": "CLOSED",
+                    ":t": _now_iso(),
+                    ":ss": _event_status_start("CLOSED", ev.get("event_start_at") or ""),
+                },
             )
 
-            # 募集メッセージ更新(締切)
+            # 締切したイベントの未発火リマインドは消す
             try:
-                refresh_recruit_message(guild_id, event_id)
+                delete_event_remind_schedule(ev)
             except Exception as e:
-                import traceback
-                print("RECRUIT_REFRESH_ERROR(close):", repr(e))
-                print(traceback.format_exc())
+                log.exception("SCHEDULE_DELETE_ERROR", e, event_id=event_id)
+
+            # 募集メッセージ上のボタンなら、そのメッセージを応答で書き換える（PATCH 不要）
+            if _is_clicked_message(payload, ev.get("recruit_message_id")):
+                ev["status"] = "CLOSED"
+                return _resp(update_message_with_followup(
+                    payload, render_recruit_message(guild_id, event_id, ev), "🔒 募集を締め切りました！", context
+                ), 200)
+
+            # 募集メッセージ更新(締切)
+            rerender_or_defer(
+                {"job": "recruit_refresh", "guild_id": guild_id, "event_id": event_id},
+                lambda t: refresh_recruit_message(guild_id, event_id, timeout=t),
+                context,
+            )
 
             return _resp({"type": 4, "data": {"flags": 64, "content": "🔒 募集を締め切りました！"}}, 200)
 
@@ -0,0 +1,72 @@
+"""
+サーキットブレーカー（Discord REST などの外部呼び出し用）
+
+    breaker = CircuitBreaker(failure_threshold=5, open_sec=30)
+    if not breaker.allow():
+        ... 呼ばずに即失敗 / 後回し ...
+    try:
+        call()
+        breaker.record_success()
+    except TransientError:
+        breaker.record_failure()
+
+- CLOSED   : 通常。連続失敗が failure_threshold に達したら OPEN
+- OPEN     : open_sec の間は allow() が False（呼び出し自体をしない）
+- HALF_OPEN: open_sec 経過後、half_open_probes 件だけ試しに通す
+             成功すれば CLOSED、失敗すれば再び OPEN（open_sec からやり直し）
+- 時刻は clock()（既定 time.monotonic）。テストでは偽の clock を渡す
+"""
+import threading
+import time
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, open_sec: float = 30.0, half_open_probes: int = 1, clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_sec = open_sec
+        self.half_open_probes = max(1, half_open_probes)
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_inflight = 0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.open_sec:
+                    return False
+                self.state = HALF_OPEN
+                self.probes_inflight = 0
+            if self.probes_inflight >= self.half_open_probes:
+                return False
+            self.probes_inflight += 1
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.probes_inflight = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self.probes_inflight = 0
+
+    def retry_in(self) -> float:
+        """OPEN のとき、次に試せるまでの秒数（それ以外は 0）"""
+        with self.lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_sec - (self.clock() - self.opened_at))
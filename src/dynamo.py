@@ -0,0 +1,458 @@
+"""
+DynamoDB 低レベルクライアント用の薄いデータ層（boto3.resource の代わり）
+
+boto3.resource("dynamodb") は起動時にリソースモデルを読み込み、1件ごとに
+TypeSerializer / TypeDeserializer（全数値を Decimal 化）を通すので重い。
+ここでは boto3.client("dynamodb") の上に、このアプリで使う形だけを扱う
+marshaller と Table ラッパーを置く。呼び出し側のメソッド名・引数・戻り値の形は
+resource の Table と同じにしてあるので、既存コードはほぼそのまま動く。
+
+    ddb = DynamoDB(boto3.client("dynamodb"))
+    table = ddb.Table("Events")
+    table.get_item(Key={"guild_id": g, "event_id": e}).get("Item")
+    table.query(KeyConditionExpression=Key("guild_id").eq(g) & Key("member_key").begins_with(p))
+
+型の対応:
+  str → S / bool → BOOL / None → NULL / int・Decimal → N / set[str] → SS / set[数値] → NS
+  list → L / dict → M
+  N は整数なら int、小数なら Decimal で返す（resource と違い整数は int）
+  float は resource と同じく受け付けない（精度が落ちるため Decimal を使う）
+
+消費キャパシティ:
+  全呼び出しに ReturnConsumedCapacity="TOTAL" を付け（呼び出し側が指定していればそのまま）、
+  応答の ConsumedCapacity をモジュール共通の capacity に積む。
+  1呼び出し（Lambda invocation）ごとに capacity.reset() → 最後に capacity.snapshot() を出す。
+  集計先はスレッドごとに reset() で作る（local_runner の並列 invoke が互いの合計を消さない）。
+  同じ呼び出しの中で起こしたスレッドは capacity.attach(capacity.current()) で同じ集計先に積む
+  ConditionalCheckFailed などのエラー応答に付いてくる分も数える（失敗した条件付き書き込みも WCU を消費する）
+"""
+import threading
+import time
+from decimal import Decimal
+
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_RETRIES = 8
+
+
+# =========
+# Marshaller
+# =========
+
+def marshal(value) -> dict:
+    # 大半は文字列なので先に判定する。bool は int のサブクラスなので int より先
+    t = type(value)
+    if t is str:
+        return {"S": value}
+    if t is bool:
+        return {"BOOL": value}
+    if value is None:
+        return {"NULL": True}
+    if t is int or t is Decimal:
+        return {"N": str(value)}
+    if t is dict:
+        return {"M": {k: marshal(v) for k, v in value.items()}}
+    if t is list or t is tuple:
+        return {"L": [marshal(v) for v in value]}
+    if t is set or t is frozenset:
+        if not value:
+            raise ValueError("empty sets are not supported by DynamoDB")
+        if all(type(v) is str for v in value):
+            return {"SS": list(value)}
+        if all(type(v) in (int, Decimal) for v in value):
+            return {"NS": [str(v) for v in value]}
+        raise TypeError(f"unsupported set members: {value!r}")
+    if t is float:
+        raise TypeError("float is not supported; use Decimal")
+    raise TypeError(f"unsupported type for DynamoDB: {t.__name__}")
+
+
+def _number(raw: str):
+    if "." in raw or "e" in raw or "E" in raw:
+        return Decimal(raw)
+    return int(raw)
+
+
+def unmarshal(av: dict):
+    # 属性値は必ず1キーの dict
+    for tag, v in av.items():
+        if tag == "S":
+            return v
+        if tag == "BOOL":
+            return v
+        if tag == "N":
+            return _number(v)
+        if tag == "NULL":
+            return None
+        if tag == "M":
+            return {k: unmarshal(x) for k, x in v.items()}
+        if tag == "L":
+            return [unmarshal(x) for x in v]
+        if tag == "SS":
+            return set(v)
+        if tag == "NS":
+            return {_number(x) for x in v}
+        if tag == "B":
+            return v
+        if tag == "BS":
+            return set(v)
+        raise TypeError(f"unknown attribute type: {tag}")
+    raise ValueError("empty attribute value")
+
+
+def marshal_item(item: dict) -> dict:
+    return {k: marshal(v) for k, v in item.items()}
+
+
+def unmarshal_item(item: dict | None) -> dict | None:
+    if item is None:
+        return None
+    return {k: unmarshal(v) for k, v in item.items()}
+
+
+# =========
+# Conditions（boto3.dynamodb.conditions の Key / Attr のうち使う分だけ）
+# =========
+
+class Cond:
+    __slots__ = ("op", "args")
+
+    def __init__(self, op: str, *args):
+        self.op = op
+        self.args = args
+
+    def __and__(self, other):
+        return Cond("AND", self, other)
+
+    def __or__(self, other):
+        return Cond("OR", self, other)
+
+    def __invert__(self):
+        return Cond("NOT", self)
+
+
+class Key:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def eq(self, value):
+        return Cond("=", self.name, value)
+
+    def lt(self, value):
+        return Cond("<", self.name, value)
+
+    def lte(self, value):
+        return Cond("<=", self.name, value)
+
+    def gt(self, value):
+        return Cond(">", self.name, value)
+
+    def gte(self, value):
+        return Cond(">=", self.name, value)
+
+    def between(self, low, high):
+        return Cond("BETWEEN", self.name, low, high)
+
+    def begins_with(self, value):
+        return Cond("begins_with", self.name, value)
+
+
+class Attr(Key):
+    __slots__ = ()
+
+    def ne(self, value):
+        return Cond("<>", self.name, value)
+
+    def exists(self):
+        return Cond("attribute_exists", self.name)
+
+    def not_exists(self):
+        return Cond("attribute_not_exists", self.name)
+
+    def contains(self, value):
+        return Cond("contains", self.name, value)
+
+    def is_in(self, values):
+        return Cond("IN", self.name, *values)
+
+
+class _Expr:
+    """
+    1リクエスト内の Cond を式文字列に落とす。プレースホルダは #cnN / :cvN
+    （呼び出し側が直接書いたプレースホルダとは番号をずらして衝突させない）
+    """
+
+    def __init__(self, names: dict, values: dict):
+        self.names = names
+        self.values = values
+
+    @staticmethod
+    def _free(prefix: str, used: dict) -> str:
+        n = len(used)
+        while f"{prefix}{n}" in used:
+            n += 1
+        return f"{prefix}{n}"
+
+    def name(self, attr: str) -> str:
+        ph = self._free("#cn", self.names)
+        self.names[ph] = attr
+        return ph
+
+    def value(self, v) -> str:
+        ph = self._free(":cv", self.values)
+        self.values[ph] = marshal(v)
+        return ph
+
+    def render(self, c: Cond) -> str:
+        op, args = c.op, c.args
+        if op in ("AND", "OR"):
+            return f"({self.render(args[0])} {op} {self.render(args[1])})"
+        if op == "NOT":
+            return f"(NOT {self.render(args[0])})"
+        n = self.name(args[0])
+        if op in ("begins_with", "contains"):
+            return f"{op}({n}, {self.value(args[1])})"
+        if op in ("attribute_exists", "attribute_not_exists"):
+            return f"{op}({n})"
+        if op == "BETWEEN":
+            return f"{n} BETWEEN {self.value(args[1])} AND {self.value(args[2])}"
+        if op == "IN":
+            return f"{n} IN ({', '.join(self.value(v) for v in args[1:])})"
+        return f"{n} {op} {self.value(args[1])}"
+
+
+_CONDITION_PARAMS = ("KeyConditionExpression", "FilterExpression", "ConditionExpression")
+
+
+def _build_params(kwargs: dict) -> dict:
+    """
+    resource 形式の引数を client 形式へ（Cond の展開と値の marshal）
+    """
+    params = dict(kwargs)
+    names = dict(params.pop("ExpressionAttributeNames", None) or {})
+    values = {k: marshal(v) for k, v in (params.pop("ExpressionAttributeValues", None) or {}).items()}
+    expr = _Expr(names, values)
+    for p in _CONDITION_PARAMS:
+        c = params.get(p)
+        if isinstance(c, Cond):
+            params[p] = expr.render(c)
+    if names:
+        params["ExpressionAttributeNames"] = names
+    if values:
+        params["ExpressionAttributeValues"] = values
+    for p in ("Key", "ExclusiveStartKey"):
+        if p in params:
+            params[p] = marshal_item(params[p])
+    if "Item" in params:
+        params["Item"] = marshal_item(params["Item"])
+    return params
+
+
+# =========
+# Consumed capacity
+# =========
+
+_READ_OPS = ("GetItem", "Query", "Scan", "BatchGetItem")
+
+
+class CapacityTotals:
+    """
+    1呼び出し分のテーブルごとの RCU / WCU と呼び出し回数の合計（SQS バッチ内の並列ジョブからも積むのでロック付き）
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables = {}
+
+    def add(self, op: str, consumed):
+        # 単発の操作は dict、Batch* はテーブルごとの list
+        if not consumed:
+            return
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        unit = "rcu" if op in _READ_OPS else "wcu"
+        with self.lock:
+            for cc in consumed:
+                t = self.tables.get(cc.get("TableName"))
+                if t is None:
+                    t = self.tables[cc.get("TableName")] = {"rcu": 0.0, "wcu": 0.0, "calls": 0}
+                t[unit] += float(cc.get("CapacityUnits") or 0)
+                t["calls"] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            tables = {
+                name: {"rcu": round(t["rcu"], 1), "wcu": round(t["wcu"], 1), "calls": t["calls"]}
+                for name, t in self.tables.items()
+            }
+        return {
+            "rcu": round(sum(t["rcu"] for t in tables.values()), 1),
+            "wcu": round(sum(t["wcu"] for t in tables.values()), 1),
+            "calls": sum(t["calls"] for t in tables.values()),
+            "tables": tables,
+        }
+
+
+class CapacityMeter:
+    """
+    スレッドごとに今の呼び出しの CapacityTotals を指す（reset していないスレッドはモジュール共通の集計先）
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shared = CapacityTotals()
+
+    def current(self) -> CapacityTotals:
+        return getattr(self._local, "totals", None) or self._shared
+
+    def reset(self):
+        self._local.totals = CapacityTotals()
+
+    def attach(self, totals: CapacityTotals):
+        self._local.totals = totals
+
+    def add(self, op: str, consumed):
+        self.current().add(op, consumed)
+
+    def snapshot(self) -> dict:
+        return self.current().snapshot()
+
+
+capacity = CapacityMeter()
+
+
+def _call(client, op: str, method: str, **params) -> dict:
+    params.setdefault("ReturnConsumedCapacity", "TOTAL")
+    try:
+        resp = getattr(client, method)(**params)
+    except Exception as e:
+        # botocore の ClientError は e.response に ConsumedCapacity を持つ
+        capacity.add(op, (getattr(e, "response", None) or {}).get("ConsumedCapacity"))
+        raise
+    capacity.add(op, resp.get("ConsumedCapacity"))
+    return resp
+
+
+# =========
+# Table
+# =========
+
+class Table:
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self.table_name = name
+
+    def get_item(self, **kwargs) -> dict:
+        resp = _call(self.client, "GetItem", "get_item", TableName=self.name, **_build_params(kwargs))
+        if "Item" in resp:
+            resp["Item"] = unmarshal_item(resp["Item"])
+        return resp
+
+    def put_item(self, **kwargs) -> dict:
+        resp = _call(self.client, "PutItem", "put_item", TableName=self.name, **_build_params(kwargs))
+        if "Attributes" in resp:
+            resp["Attributes"] = unmarshal_item(resp["Attributes"])
+        return resp
+
+    def update_item(self, **kwargs) -> dict:
+        resp = _call(self.client, "UpdateItem", "update_item", TableName=self.name, **_build_params(kwargs))
+        if "Attributes" in resp:
+            resp["Attributes"] = unmarshal_item(resp["Attributes"])
+        return resp
+
+    def delete_item(self, **kwargs) -> dict:
+        resp = _call(self.client, "DeleteItem", "delete_item", TableName=self.name, **_build_params(kwargs))
+        if "Attributes" in resp:
+            resp["Attributes"] = unmarshal_item(resp["Attributes"])
+        return resp
+
+    def _read_page(self, resp: dict) -> dict:
+        if "Items" in resp:
+            resp["Items"] = [{k: unmarshal(v) for k, v in it.items()} for it in resp["Items"]]
+        if "LastEvaluatedKey" in resp:
+            resp["LastEvaluatedKey"] = unmarshal_item(resp["LastEvaluatedKey"])
+        return resp
+
+    def query(self, **kwargs) -> dict:
+        return self._read_page(_call(self.client, "Query", "query", TableName=self.name, **_build_params(kwargs)))
+
+    def scan(self, **kwargs) -> dict:
+        return self._read_page(_call(self.client, "Scan", "scan", TableName=self.name, **_build_params(kwargs)))
+
+    def batch_writer(self):
+        return BatchWriter(self.client, self.name)
+
+
+class BatchWriter:
+    """
+    resource の batch_writer 相当: 25件ずつ BatchWriteItem にまとめ、UnprocessedItems は再送する
+    """
+
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self.buffer = []
+
+    def put_item(self, Item: dict):
+        self.buffer.append({"PutRequest": {"Item": marshal_item(Item)}})
+        if len(self.buffer) >= BATCH_WRITE_MAX_ITEMS:
+            self.flush()
+
+    def delete_item(self, Key: dict):
+        self.buffer.append({"DeleteRequest": {"Key": marshal_item(Key)}})
+        if len(self.buffer) >= BATCH_WRITE_MAX_ITEMS:
+            self.flush()
+
+    def flush(self):
+        while self.buffer:
+            chunk, self.buffer = self.buffer[:BATCH_WRITE_MAX_ITEMS], self.buffer[BATCH_WRITE_MAX_ITEMS:]
+            request = {self.table_name: chunk}
+            for attempt in range(BATCH_WRITE_MAX_RETRIES + 1):
+                resp = _call(self.client, "BatchWriteItem", "batch_write_item", RequestItems=request)
+                request = resp.get("UnprocessedItems") or {}
+                if not request:
+                    break
+                if attempt == BATCH_WRITE_MAX_RETRIES:
+                    raise RuntimeError(f"batch_write: unprocessed items remain: {self.table_name}")
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+class DynamoDB:
+    """
+    resource("dynamodb") の代わり。Table(name) と batch_get_item だけ持つ
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._tables = {}
+
+    def Table(self, name: str) -> Table:
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = Table(self.client, name)
+        return table
+
+    def batch_get_item(self, RequestItems: dict) -> dict:
+        request = {}
+        for table_name, spec in RequestItems.items():
+            spec = dict(spec)
+            spec["Keys"] = [marshal_item(k) for k in spec["Keys"]]
+            request[table_name] = spec
+        resp = _call(self.client, "BatchGetItem", "batch_get_item", RequestItems=request)
+        resp["Responses"] = {
+            t: [unmarshal_item(it) for it in items] for t, items in (resp.get("Responses") or {}).items()
+        }
+        unprocessed = resp.get("UnprocessedKeys") or {}
+        resp["UnprocessedKeys"] = {
+            t: dict(spec, Keys=[unmarshal_item(k) for k in spec["Keys"]]) for t, spec in unprocessed.items()
+        }
+        return resp
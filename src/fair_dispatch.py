@@ -0,0 +1,124 @@
+"""
+ギルド単位の公平スケジューリング（Deficit Round Robin）
+
+1つのバッチ（SQS から受け取ったジョブ群など）を、ギルドごとのキューに分けて
+重み付き DRR で取り出す。ギルドごとの同時実行数（in-flight）上限も守る。
+
+    d = FairDispatcher(max_inflight_per_guild=1, weights={"123": 2.0})
+    d.submit("123", job_a, enqueued_at=...)
+    d.submit("456", job_b)
+    while (picked := d.next()) is not None:
+        guild_id, job = picked
+        ... 実行 ...
+        d.done(guild_id)
+
+- weight: 1ラウンドで加算される deficit（quantum * weight）。大きいほど多く取り出される
+- cost:   ジョブ1件の重さ（既定1）。deficit が cost 以上のときだけ取り出せる
+- stats(): ギルドごとのキュー長 / in-flight / 待ち時間
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class _GuildQueue:
+    __slots__ = ("jobs", "deficit", "inflight", "dispatched", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.jobs = deque()
+        self.deficit = 0.0
+        self.inflight = 0
+        self.dispatched = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class FairDispatcher:
+    def __init__(self, max_inflight_per_guild: int = 1, quantum: float = 1.0, weights: dict | None = None, clock=time.time):
+        self.max_inflight = max(1, max_inflight_per_guild)
+        self.quantum = quantum
+        self.weights = weights or {}
+        self.clock = clock
+        self.queues = OrderedDict()  # guild_id → _GuildQueue（ラウンドロビン順）
+        self.lock = threading.Condition()
+
+    def submit(self, guild_id: str, job, cost: float = 1.0, enqueued_at: float | None = None):
+        with self.lock:
+            q = self.queues.get(guild_id)
+            if q is None:
+                q = self.queues[guild_id] = _GuildQueue()
+            q.jobs.append((job, cost, self.clock() if enqueued_at is None else enqueued_at))
+            self.lock.notify_all()
+
+    def pending(self) -> int:
+        with self.lock:
+            return sum(len(q.jobs) for q in self.queues.values())
+
+    def inflight(self) -> int:
+        with self.lock:
+            return sum(q.inflight for q in self.queues.values())
+
+    def _pick(self):
+        # 取り出せるギルドが1つも無ければ None（全ギルドが in-flight 上限 or 空）
+        eligible = [g for g, q in self.queues.items() if q.jobs and q.inflight < self.max_inflight]
+        if not eligible:
+            return None
+        while True:
+            for guild_id in list(self.queues):
+                q = self.queues[guild_id]
+                if not q.jobs or q.inflight >= self.max_inflight:
+                    continue
+                job, cost, enqueued_at = q.jobs[0]
+                if q.deficit < cost:
+                    q.deficit += self.quantum * max(float(self.weights.get(guild_id, 1.0)), 0.01)
+                    if q.deficit < cost:
+                        continue
+                q.jobs.popleft()
+                q.deficit -= cost
+                if not q.jobs:
+                    q.deficit = 0.0  # 空になったギルドは持ち越さない（DRR の定石）
+                q.inflight += 1
+                q.dispatched += 1
+                waited = max(0.0, self.clock() - enqueued_at)
+                q.wait_total += waited
+                q.wait_max = max(q.wait_max, waited)
+                # 取り出したギルドは末尾へ（次は別ギルドから）
+                self.queues.move_to_end(guild_id)
+                return guild_id, job
+
+    def next(self, block: bool = False):
+        """
+        次に実行するジョブを (guild_id, job) で返す。無ければ None
+        block=True なら in-flight の完了待ちで取り出せるまで待つ（キューが空なら None）
+        """
+        with self.lock:
+            while True:
+                picked = self._pick()
+                if picked is not None or not block:
+                    return picked
+                if not any(q.jobs for q in self.queues.values()):
+                    return None
+                self.lock.wait()
+
+    def done(self, guild_id: str):
+        with self.lock:
+            q = self.queues.get(guild_id)
+            if q is not None and q.inflight > 0:
+                q.inflight -= 1
+            self.lock.notify_all()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        with self.lock:
+            out = {}
+            for guild_id, q in self.queues.items():
+                oldest = (now - q.jobs[0][2]) if q.jobs else 0.0
+                out[guild_id] = {
+                    "queued": len(q.jobs),
+                    "inflight": q.inflight,
+                    "dispatched": q.dispatched,
+                    "wait_avg_ms": round(q.wait_total / q.dispatched * 1000) if q.dispatched else 0,
+                    "wait_max_ms": round(q.wait_max * 1000),
+                    "oldest_queued_ms": round(oldest * 1000),
+                }
+            return out
@@ -0,0 +1,161 @@
+"""
+構造化ログ（1行 = 1 JSON）
+
+    from jsonlog import log
+    log.info("REMIND_SENT", event_id=event_id, user_ids=user_ids)
+
+- レベル: LOG_LEVEL（DEBUG / INFO / WARN / ERROR、既定 INFO）
+- サンプリング: LOG_SAMPLE_RATES="ITYPE=0.1,CUSTOM_ID=0.1"（メッセージ名ごと、ERROR は常に出す）
+- サイズ制限:
+    - set / list / tuple は既定で件数だけ（{"count": n}）。LOG_FULL_IDS=1 で先頭 LOG_MAX_ITEMS 件まで出す
+    - 文字列は LOG_MAX_FIELD_CHARS 文字で切る
+- 全行に request_id（set_request_id で呼び出しごとに設定）
+- request_id と bind / bound で付けるフィールドはスレッドごと
+  （local_runner の並列 invoke やバッチ内の並列ジョブで混ざらない。新しいスレッドでは set_request_id し直す）
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+MAX_FIELD_CHARS_DEFAULT = 512
+MAX_ITEMS_DEFAULT = 20
+
+
+def _parse_rates(raw: str) -> dict:
+    rates = {}
+    for part in (raw or "").split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            try:
+                rates[name.strip()] = float(rate)
+            except ValueError:
+                pass
+    return rates
+
+
+class JsonLogger:
+    def __init__(self):
+        self._local = threading.local()
+        self.reload()
+
+    @property
+    def request_id(self) -> str | None:
+        return getattr(self._local, "request_id", None)
+
+    @property
+    def context(self) -> dict:
+        ctx = getattr(self._local, "context", None)
+        if ctx is None:
+            ctx = self._local.context = {}
+        return ctx
+
+    def reload(self):
+        """環境変数を読み直す（テストや設定変更時用）"""
+        self.level = LEVELS.get((os.environ.get("LOG_LEVEL") or "INFO").upper(), 20)
+        self.sample_rates = _parse_rates(os.environ.get("LOG_SAMPLE_RATES"))
+        self.full_ids = os.environ.get("LOG_FULL_IDS") == "1"
+        self.max_chars = int(os.environ.get("LOG_MAX_FIELD_CHARS") or MAX_FIELD_CHARS_DEFAULT)
+        self.max_items = int(os.environ.get("LOG_MAX_ITEMS") or MAX_ITEMS_DEFAULT)
+
+    def set_request_id(self, request_id: str | None):
+        self._local.request_id = request_id
+        self._local.context = {}
+
+    def bind(self, **fields):
+        """この呼び出しの間、全行に付けるフィールド"""
+        self.context.update(fields)
+
+    @contextmanager
+    def bound(self, **fields):
+        """with の間だけ付けるフィールド（抜けたら元に戻す）"""
+        ctx = self.context
+        saved = {k: ctx[k] for k in fields if k in ctx}
+        ctx.update(fields)
+        try:
+            yield
+        finally:
+            for k in fields:
+                if k in saved:
+                    ctx[k] = saved[k]
+                else:
+                    ctx.pop(k, None)
+
+    def _cap(self, value):
+        if isinstance(value, (set, frozenset, list, tuple)):
+            if not self.full_ids:
+                return {"count": len(value)}
+            items = sorted(value, key=str) if isinstance(value, (set, frozenset)) else list(value)
+            out = [self._cap(v) for v in items[: self.max_items]]
+            if len(items) > self.max_items:
+                return {"count": len(items), "head": out}
+            return out
+        if isinstance(value, dict):
+            return {str(k): self._cap(v) for k, v in value.items()}
+        if isinstance(value, str):
+            if len(value) > self.max_chars:
+                return value[: self.max_chars] + f"...(+{len(value) - self.max_chars})"
+            return value
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        return self._cap(str(value))
+
+    def _enabled(self, level: str, msg: str) -> bool:
+        if LEVELS[level] < self.level:
+            return False
+        if level == "ERROR":
+            return True
+        rate = self.sample_rates.get(msg)
+        return rate is None or random.random() < rate
+
+    def _emit(self, level: str, msg: str, fields: dict, cap: bool = True):
+        if not self._enabled(level, msg):
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "level": level,
+            "msg": msg,
+            "request_id": self.request_id,
+        }
+        for k, v in self.context.items():
+            record[k] = self._cap(v)
+        for k, v in fields.items():
+            record[k] = self._cap(v) if cap else v
+        sys.stdout.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        sys.stdout.flush()
+
+    def debug(self, msg: str, **fields):
+        self._emit("DEBUG", msg, fields)
+
+    def info(self, msg: str, **fields):
+        self._emit("INFO", msg, fields)
+
+    def warn(self, msg: str, **fields):
+        self._emit("WARN", msg, fields)
+
+    def error(self, msg: str, **fields):
+        self._emit("ERROR", msg, fields)
+
+    def summary(self, msg: str, **fields):
+        """
+        集計済み（件数が上限で抑えてある）レコード用。リストを件数に丸めずそのまま出す
+        """
+        self._emit("INFO", msg, fields, cap=False)
+
+    def exception(self, msg: str, exc: BaseException, **fields):
+        fields["error"] = repr(exc)
+        fields["traceback"] = traceback.format_exc()
+        # スタックトレースは長いので上限を広げる
+        max_chars, self.max_chars = self.max_chars, max(self.max_chars, 8000)
+        try:
+            self._emit("ERROR", msg, fields)
+        finally:
+            self.max_chars = max_chars
+
+
+log = JsonLogger()
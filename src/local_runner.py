@@ -0,0 +1,97 @@
+"""
+self-hosted 実行用ランナー（AWS Lambda / EventBridge Scheduler なし）
+
+- Discord Interactions を HTTP で受けて app.lambda_handler に渡す（API Gateway 相当）
+- リマインドは階層タイミングホイール（timer_wheel.TimerWheel）で発火
+  - 未発火タイマーは DDB_TIMERS_TABLE に永続化され、起動時に積み直す
+- ワーカージョブは同一プロセスのスレッドで実行
+
+    SCHEDULER_BACKEND=local JOB_TRANSPORT=thread python src/local_runner.py --port 8080
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+os.environ.setdefault("SCHEDULER_BACKEND", "local")
+os.environ.setdefault("JOB_TRANSPORT", "thread")
+
+import app  # noqa: E402
+from jsonlog import log  # noqa: E402
+from timer_wheel import TimerWheel  # noqa: E402
+
+
+def _context():
+    return SimpleNamespace(aws_request_id=uuid.uuid4().hex, invoked_function_arn=None)
+
+
+def fire_timer(timer_id: str, payload: dict):
+    try:
+        app.lambda_handler(payload, _context())
+    except Exception as e:
+        log.exception("TIMER_FIRE_ERROR", e, timer_id=timer_id)
+    # EventBridge の ActionAfterCompletion=DELETE 相当
+    app.delete_schedule_quietly(timer_id)
+
+
+def run_wheel(wheel: TimerWheel, stop: threading.Event):
+    while not stop.is_set():
+        for timer_id, payload in wheel.advance():
+            threading.Thread(target=fire_timer, args=(timer_id, payload), daemon=True).start()
+        stop.wait(wheel.tick_sec)
+
+
+class InteractionHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8")
+        event = {
+            "headers": {k.lower(): v for k, v in self.headers.items()},
+            "body": body,
+            "isBase64Encoded": False,
+        }
+        resp = app.lambda_handler(event, _context())
+        data = (resp.get("body") or "").encode("utf-8")
+        self.send_response(resp.get("statusCode") or 200)
+        for k, v in (resp.get("headers") or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        log.debug("HTTP", line=fmt % args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="self-hosted runner")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("LOCAL_PORT") or 8080))
+    parser.add_argument("--tick-sec", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    wheel = TimerWheel(tick_sec=args.tick_sec, clock=time.time)
+    app.rebuild_local_timers(wheel)
+    app.set_local_timer_wheel(wheel)
+
+    stop = threading.Event()
+    threading.Thread(target=run_wheel, args=(wheel, stop), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), InteractionHandler)
+    log.info("LOCAL_RUNNER_START", host=args.host, port=args.port, pending_timers=len(wheel))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+階層タイミングホイール（self-hosted 用のローカル Scheduler バックエンド）
+
+- add / cancel は O(1)（スロットは dict、timer_id → エントリの索引を持つ）
+- 階層 i の1スロット = tick * wheel_size**i 秒。上位階層のスロットが回ってきたら下位へ振り直す（cascade）
+- 時刻は clock()（既定 time.time）から取る。テストでは偽の clock を渡して advance(now) で進める
+
+    wheel = TimerWheel(tick_sec=1.0, clock=fake_clock)
+    wheel.add("ntc-...-remind", fire_at_epoch, {"kind": "notice_remind", ...})
+    for timer_id, payload in wheel.advance():
+        ...
+"""
+import threading
+import time
+
+
+class _Timer:
+    __slots__ = ("timer_id", "expire_tick", "payload", "level", "slot")
+
+    def __init__(self, timer_id, expire_tick, payload):
+        self.timer_id = timer_id
+        self.expire_tick = expire_tick
+        self.payload = payload
+        self.level = 0
+        self.slot = 0
+
+
+class TimerWheel:
+    def __init__(self, tick_sec: float = 1.0, wheel_size: int = 256, levels: int = 4, clock=time.time):
+        self.tick_sec = tick_sec
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self.clock = clock
+        self.wheels = [[{} for _ in range(wheel_size)] for _ in range(levels)]
+        self.timers = {}
+        self.current_tick = self._tick_of(clock())
+        self.lock = threading.RLock()
+
+    def _tick_of(self, epoch: float) -> int:
+        return int(epoch // self.tick_sec)
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, timer_id):
+        return timer_id in self.timers
+
+    def _place(self, t: _Timer, min_delta: int = 1):
+        """
+        期限に応じた階層/スロットへ置く
+        階層 l は「l 単位で見た現在との差」が wheel_size 未満になる最小の l
+        （差が wheel_size 以上だと一周して既に処理済みのスロットに入ってしまうため）
+        """
+        size = self.wheel_size
+        # 過去/現在の期限は次の tick で発火（cascade 中は現在の tick で発火）
+        e = max(t.expire_tick, self.current_tick + min_delta)
+        for level in range(self.levels):
+            unit = size ** level
+            if e // unit - self.current_tick // unit < size:
+                slot = (e // unit) % size
+                break
+        else:
+            # 最上位を超える遠い期限は最上位の一番遠いスロットに置き、回ってきたら振り直す
+            level = self.levels - 1
+            unit = size ** level
+            slot = (self.current_tick // unit + size - 1) % size
+        t.level = level
+        t.slot = slot
+        self.wheels[level][slot][t.timer_id] = t
+
+    def add(self, timer_id: str, fire_at: float, payload=None):
+        """
+        fire_at（epoch秒）に発火するタイマーを登録する。同じ timer_id があれば置き換える
+        過去時刻なら次の advance で発火する
+        """
+        with self.lock:
+            self.cancel(timer_id)
+            t = _Timer(timer_id, self._tick_of(fire_at), payload)
+            self.timers[timer_id] = t
+            self._place(t)
+
+    def cancel(self, timer_id: str) -> bool:
+        with self.lock:
+            t = self.timers.pop(timer_id, None)
+            if t is None:
+                return False
+            self.wheels[t.level][t.slot].pop(timer_id, None)
+            return True
+
+    def _cascade(self, level: int):
+        size = self.wheel_size
+        slot = (self.current_tick // (size ** level)) % size
+        bucket = self.wheels[level][slot]
+        self.wheels[level][slot] = {}
+        for t in bucket.values():
+            self._place(t, min_delta=0)
+
+    def advance(self, now: float | None = None) -> list:
+        """
+        now（既定 clock()）まで時計を進め、期限が来たタイマーを [(timer_id, payload), ...] で返す
+        """
+        target = self._tick_of(self.clock() if now is None else now)
+        expired = []
+        with self.lock:
+            if not self.timers:
+                self.current_tick = max(self.current_tick, target)
+                return expired
+            while self.current_tick < target:
+                self.current_tick += 1
+                # 上位階層の境界をまたいだら下位へ振り直す（上位から順に）
+                size = self.wheel_size
+                boundary_levels = []
+                level = 1
+                while level < self.levels and self.current_tick % (size ** level) == 0:
+                    boundary_levels.append(level)
+                    level += 1
+                for level in reversed(boundary_levels):
+                    self._cascade(level)
+
+                slot = self.current_tick % size
+                bucket = self.wheels[0][slot]
+                if bucket:
+                    self.wheels[0][slot] = {}
+                    for t in bucket.values():
+                        if t.expire_tick > self.current_tick:
+                            self._place(t)
+                            continue
+                        del self.timers[t.timer_id]
+                        expired.append((t.timer_id, t.payload))
+                if not self.timers:
+                    self.current_tick = target
+                    break
+        return expired
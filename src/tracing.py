@@ -0,0 +1,118 @@
+"""
+トレースコンテキスト（interaction → ワーカー → Scheduler 発火まで同じ trace_id でつなぐ）
+
+    trace = tracing.from_interaction(payload)   # interaction id から trace_id と起点時刻（クリック時刻）
+    with tracing.activate(trace):               # この間のログに trace_id が付く
+        job = tracing.inject(job)               # ジョブ payload / Scheduler Input に載せる
+        with tracing.span("discord", api="SEND_MESSAGE"):
+            ...                                 # 終了時に SPAN ログ（duration_ms / since_origin_ms）
+
+payload 上の形: job["trace"] = {"trace_id": "...", "origin_ms": <起点 epoch ms>}
+Scheduler 経由のジョブは job["scheduled_ms"]（予定時刻）を持ち、発火側ではそれを起点にする
+（since_origin_ms = 予定時刻からの遅れ）。元のクリック時刻は root_origin_ms に残す
+"""
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from jsonlog import log
+
+# Discord snowflake の epoch（2015-01-01T00:00:00Z）
+DISCORD_EPOCH_MS = 1420070400000
+
+_local = threading.local()
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def snowflake_ms(snowflake) -> int | None:
+    """Discord の ID（snowflake）に埋め込まれた作成時刻（epoch ms）"""
+    try:
+        return (int(snowflake) >> 22) + DISCORD_EPOCH_MS
+    except (TypeError, ValueError):
+        return None
+
+
+def from_interaction(payload: dict) -> dict:
+    iid = payload.get("id")
+    return {
+        "trace_id": str(iid) if iid else uuid.uuid4().hex,
+        "origin_ms": snowflake_ms(iid) or _now_ms(),
+    }
+
+
+def from_job(job: dict) -> dict:
+    trace = dict(job.get("trace") or {})
+    if not trace.get("trace_id"):
+        trace = {"trace_id": uuid.uuid4().hex, "origin_ms": _now_ms()}
+    scheduled_ms = job.get("scheduled_ms")
+    if scheduled_ms:
+        trace.setdefault("root_origin_ms", trace.get("origin_ms"))
+        trace["origin_ms"] = int(scheduled_ms)
+    return trace
+
+
+def current() -> dict | None:
+    return getattr(_local, "trace", None)
+
+
+def since_origin_ms() -> int | None:
+    """起点（クリック時刻 / Scheduler の予定時刻）からの経過 ms"""
+    trace = current()
+    if not trace or not trace.get("origin_ms"):
+        return None
+    return _now_ms() - int(trace["origin_ms"])
+
+
+@contextmanager
+def activate(trace: dict | None):
+    prev = current()
+    prev_spans = getattr(_local, "spans", None)
+    _local.trace = trace
+    _local.spans = []
+    try:
+        with log.bound(trace_id=(trace or {}).get("trace_id")):
+            yield trace
+    finally:
+        _local.trace = prev
+        _local.spans = prev_spans
+
+
+def inject(job: dict, **extra) -> dict:
+    """job に現在の trace を載せた新しい dict を返す（既に trace があればそのまま）"""
+    trace = current()
+    if not trace or job.get("trace"):
+        return dict(job, **extra) if extra else job
+    carried = {k: trace[k] for k in ("trace_id", "origin_ms", "root_origin_ms") if trace.get(k)}
+    return dict(job, trace=carried, **extra)
+
+
+@contextmanager
+def span(name: str, **fields):
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        spans = _local.spans = []
+    parent = spans[-1] if spans else None
+    spans.append(name)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        spans.pop()
+        record = {
+            "span": name,
+            "parent": parent,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        elapsed = since_origin_ms()
+        if elapsed is not None:
+            record["since_origin_ms"] = elapsed
+        log.info("SPAN", **record, **fields)